@@ -39,5 +39,8 @@ urlpatterns = [
     path('git-commit/', views.GitCommitView.as_view()),  # returns this app's git commit
     path('open-subtitles/auth/', views.OpenSubtitlesAuthView.as_view()),  # auths against open subtitles
     path('queue-task/', views.QueueTaskView.as_view()),  # queues task
-    path('notifications/', views.SendNotificationView.as_view())  # sends notification
+    path('notifications/', views.SendNotificationView.as_view()),  # sends notification
+    path('stats/http/', views.HTTPPoolStatsView.as_view()),  # outbound http connection pool stats
+    path('stats/indexers/', views.IndexerStatsView.as_view()),  # jackett indexer search stats
+    path('stats/search-tiers/', views.SearchTierStatsView.as_view()),  # search query tier stats
 ]
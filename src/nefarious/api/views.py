@@ -1,5 +1,4 @@
 import os
-import requests
 from celery_once import AlreadyQueued
 from django.conf import settings
 from django.utils.dateparse import parse_date
@@ -16,11 +15,14 @@ from rest_framework import exceptions
 from nefarious.api.serializers import (
     WatchMovieSerializer, WatchTVShowSerializer, WatchTVEpisodeSerializer, WatchTVSeasonRequestSerializer, WatchTVSeasonSerializer,
     TransmissionTorrentSerializer, RottenTomatoesSearchResultsSerializer, )
+from nefarious import http_client
+from nefarious.indexers import get_indexers, indexer_stats
 from nefarious.media_category import MEDIA_CATEGORIES
 from nefarious.models import NefariousSettings, WatchMovie, WatchTVShow, WatchTVEpisode, WatchTVSeasonRequest, WatchTVSeason
 from nefarious.notification import send_message
 from nefarious.opensubtitles import OpenSubtitles
 from nefarious.search import SEARCH_MEDIA_TYPE_MOVIE, SEARCH_MEDIA_TYPE_TV, SearchTorrents
+from nefarious.search_tiers import tier_stats
 from nefarious.quality import PROFILES
 from nefarious.tasks import (
     import_library_task, completed_media_task, wanted_media_task, auto_watch_new_seasons_task,
@@ -181,14 +183,17 @@ class SearchRecommendedMediaView(views.APIView):
 @method_decorator(gzip_page, name='dispatch')
 class SearchTorrentsView(views.APIView):
 
-    @method_decorator(cache_page(CACHE_HALF_DAY))
+    # results are cached by the search itself (see SearchTorrents)
     def get(self, request):
         query = request.query_params.get('q')
         media_type = request.query_params.get('media_type', SEARCH_MEDIA_TYPE_MOVIE)
         search = SearchTorrents(media_type, query)
         if not search.ok:
             return Response({'error': search.error_content}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        return Response(search.results)
+        response = Response([result.to_dict() for result in search.results])
+        if search.cache_age is not None:
+            response['X-Jackett-Cache-Age'] = int(search.cache_age)
+        return response
 
 
 @method_decorator(gzip_page, name='dispatch')
@@ -494,7 +499,7 @@ class DiscoverRottenTomatoesMediaView(views.APIView):
             url = f'{url}~critics:{critics}'
 
         # get results
-        response = requests.get(url, params=params)
+        response = http_client.get(url, params=params)
         response.raise_for_status()
         body = response.json()
 
@@ -577,3 +582,35 @@ class QualitiesView(views.APIView):
     def get(self, request):
         return Response([p.name for p in PROFILES])
 
+
+
+class HTTPPoolStatsView(views.APIView):
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        # outbound connection pools of this (web) process
+        return Response({
+            'pid': os.getpid(),
+            'pools': http_client.pool_stats(),
+        })
+
+
+class IndexerStatsView(views.APIView):
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        # per-indexer search latency, errors, result counts and whether it's currently excluded from searches
+        nefarious_settings = NefariousSettings.get()
+        try:
+            indexers = get_indexers(nefarious_settings)
+        except Exception as e:
+            raise exceptions.APIException('Could not fetch jackett indexers: {}'.format(e))
+        return Response(indexer_stats(indexers))
+
+
+class SearchTierStatsView(views.APIView):
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        # how often each search query tier is searched and finds the downloaded result
+        return Response(tier_stats())
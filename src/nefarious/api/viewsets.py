@@ -19,11 +19,11 @@ from nefarious.api.serializers import (
     UserSerializer, WatchMovieSerializer, NefariousPartialSettingsSerializer,
     WatchTVSeasonSerializer, WatchTVSeasonRequestSerializer, TorrentBlacklistSerializer, QualityProfileSerializer,
 )
+from nefarious.indexers import get_indexers
 from nefarious.models import NefariousSettings, WatchTVEpisode, WatchTVShow, WatchMovie, WatchTVSeason, WatchTVSeasonRequest, TorrentBlacklist, QualityProfile
 from nefarious.tasks import watch_tv_episode_task, watch_tv_show_season_task, watch_movie_task, send_websocket_message_task
 from nefarious.utils import (
-    verify_settings_jackett, verify_settings_transmission, verify_settings_tmdb,
-    fetch_jackett_indexers, destroy_transmission_result)
+    verify_settings_jackett, verify_settings_transmission, verify_settings_tmdb, destroy_transmission_result)
 
 
 @method_decorator(gzip_page, name='dispatch')
@@ -195,7 +195,8 @@ class SettingsViewSet(viewsets.ModelViewSet):
     @action(methods=['get'], detail=False, url_path='configured-indexers', permission_classes=(IsAdminUser,))
     def configured_indexers(self, request):
         nefarious_settings = NefariousSettings.get()
-        return Response(fetch_jackett_indexers(nefarious_settings))
+        # also refreshes the cached indexers used for searching
+        return Response(get_indexers(nefarious_settings, refresh=True))
 
 
 @method_decorator(gzip_page, name='dispatch')
@@ -0,0 +1,113 @@
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# default timeout (seconds) for requests that don't define one, i.e tmdbsimple and rotten tomatoes
+HTTP_DEFAULT_TIMEOUT = 30
+
+# number of hosts to keep connection pools for and the number of connections kept alive per host
+HTTP_POOL_CONNECTIONS = 20
+HTTP_POOL_MAXSIZE = 10
+
+# retry connection errors and temporary server errors for idempotent requests with an exponential backoff (.5s, 1s, 2s).
+# read errors aren't retried since a slow indexer would just multiply the search time
+HTTP_RETRY_TOTAL = 3
+HTTP_RETRY_BACKOFF_FACTOR = .5
+HTTP_RETRY_STATUS_CODES = (502, 503, 504)
+HTTP_RETRY_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """
+    Applies a default timeout to every request without one.
+
+    Callers like tmdbsimple explicitly pass timeout=None so the default has to be applied here rather than relying on the caller.
+    """
+
+    def __init__(self, *args, timeout: float = HTTP_DEFAULT_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = self.timeout
+        return super().send(request, timeout=timeout, **kwargs)
+
+
+def _retry() -> Retry:
+    options = dict(
+        total=HTTP_RETRY_TOTAL,
+        read=0,
+        backoff_factor=HTTP_RETRY_BACKOFF_FACTOR,
+        status_forcelist=HTTP_RETRY_STATUS_CODES,
+        raise_on_status=False,  # return the last response rather than raising
+    )
+    # urllib3 renamed "method_whitelist" to "allowed_methods"
+    if hasattr(Retry, 'DEFAULT_ALLOWED_METHODS'):
+        options['allowed_methods'] = HTTP_RETRY_METHODS
+    else:
+        options['method_whitelist'] = HTTP_RETRY_METHODS
+    return Retry(**options)
+
+
+def create_session() -> requests.Session:
+    session = requests.Session()
+    adapter = TimeoutHTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=_retry(),
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """
+    Returns the keep-alive session shared by every outbound request in this process.
+
+    Connections can't be shared across processes so a forked process (i.e celery workers) creates its own session.
+    """
+    global _session, _session_pid
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            _session = create_session()
+            _session_pid = os.getpid()
+        return _session
+
+
+def get(url, params=None, **kwargs) -> requests.Response:
+    return get_session().get(url, params=params, **kwargs)
+
+
+def post(url, data=None, **kwargs) -> requests.Response:
+    return get_session().post(url, data=data, **kwargs)
+
+
+def pool_stats() -> list:
+    # connection pool stats per host for this process
+    stats = []
+    adapters = set(get_session().adapters.values())
+    for adapter in adapters:
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            stats.append({
+                'scheme': pool.scheme,
+                'host': pool.host,
+                'port': pool.port,
+                'connections': pool.num_connections,  # connections opened
+                'requests': pool.num_requests,
+                'idle': len([conn for conn in list(pool.pool.queue) if conn]) if pool.pool else 0,  # kept alive and ready to be re-used
+                'max_size': pool.pool.maxsize if pool.pool else 0,
+            })
+    return sorted(stats, key=lambda s: (s['host'], s['port']))
@@ -10,7 +10,7 @@ class MovieImporter(ImporterBase):
     media_class = WatchMovie
 
     def _get_parser(self, file_name):
-        return MovieParser(file_name)
+        return MovieParser.cached(file_name)
 
     def _get_tmdb_search_results(self, title):
         return self.tmdb_search.movie(query=title, language=self.nefarious_settings.language)
@@ -18,7 +18,7 @@ class TVImporter(ImporterBase):
         return self.tmdb_search.tv(query=title, language=self.nefarious_settings.language)
 
     def _get_parser(self, file_name):
-        return TVParser(file_name)
+        return TVParser.cached(file_name)
 
     def _is_result_match_title(self, parser, tmdb_result, title):
         if not tmdb_result.get('name'):
@@ -42,7 +42,7 @@ class TVImporter(ImporterBase):
                     os.path.basename(os.sep.join(file_path_split[:-(self._ingest_depth(file_path))])), file_name),
             ]
             for parent_title in parent_titles:
-                parent_parser = TVParser(parent_title)
+                parent_parser = TVParser.cached(parent_title)
                 # define the title and merge the parent and the file parser matches
                 if parent_parser.match and parent_parser.match['title']:
                     title = parent_parser.match['title']
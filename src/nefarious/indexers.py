@@ -0,0 +1,183 @@
+import threading
+import time
+from typing import List
+
+from django.conf import settings
+from django.core.cache import cache
+
+from nefarious import http_client
+from nefarious.jackett import get_jackett_search_url, iter_results
+from nefarious.models import NefariousSettings
+from nefarious.utils import fetch_jackett_indexers
+
+# seconds to cache the list of configured jackett indexers
+INDEXERS_CACHE_TIMEOUT = 60 * 60
+
+# seconds to keep an indexer's stats after its last search
+INDEXER_STATS_TIMEOUT = 60 * 60 * 24 * 7
+
+# weight of the latest search in the average latency
+INDEXER_LATENCY_WEIGHT = .2
+
+# jackett's status of each indexer in an aggregate search response
+JACKETT_INDEXER_STATUS_ERROR = 1
+
+# every indexer whose circuit has opened (see _update_circuit)
+INDEXER_CIRCUITS_KEY = 'jackett-indexer-circuits'
+
+# serializes updating the stats (and list of circuits) from concurrent searches in this process
+_stats_lock = threading.Lock()
+
+
+def get_indexers(nefarious_settings: NefariousSettings, refresh: bool = False) -> List[str]:
+    # configured jackett indexer ids
+    cache_key = 'jackett-indexers:{}:{}'.format(nefarious_settings.jackett_host, nefarious_settings.jackett_port)
+    indexers = None if refresh else cache.get(cache_key)
+    if indexers is None:
+        indexers = fetch_jackett_indexers(nefarious_settings)
+        cache.set(cache_key, indexers, timeout=INDEXERS_CACHE_TIMEOUT)
+    return indexers
+
+
+def search_indexer(nefarious_settings: NefariousSettings, indexer: str, params: dict, deadline: float) -> list:
+    # searches a single indexer and records how it went
+    started = time.monotonic()
+    try:
+        res = http_client.get(get_jackett_search_url(nefarious_settings, indexer), params, timeout=deadline, stream=True)
+        try:
+            res.raise_for_status()
+            results = list(iter_results(res))
+        finally:
+            res.close()
+    except Exception as e:
+        record_search(indexer, time.monotonic() - started, deadline, error=str(e))
+        raise
+    record_search(indexer, time.monotonic() - started, deadline, results=len(results))
+    return results
+
+
+def _stats_key(indexer: str) -> str:
+    return 'jackett-indexer-stats:{}'.format(indexer)
+
+
+def _failures_key(indexer: str) -> str:
+    return 'jackett-indexer-failures:{}'.format(indexer)
+
+
+def _circuit_key(indexer: str) -> str:
+    return 'jackett-indexer-circuit:{}'.format(indexer)
+
+
+def record_statuses(statuses: list) -> int:
+    """
+    Records each indexer's search from the "Indexers" of an aggregate jackett search response, i.e
+    [{"ID": "tracker", "Status": 2, "Results": 100, "Error": null, "ElapsedTime": 1500}, ...]
+    and returns how many failed.
+    """
+    failed = 0
+    for status in statuses:
+        if not isinstance(status, dict) or not status.get('ID'):
+            continue
+        error = status.get('Error') or ('error' if status.get('Status') == JACKETT_INDEXER_STATUS_ERROR else None)
+        record_search(status['ID'], (status.get('ElapsedTime') or 0) / 1000, results=status.get('Results') or 0, error=error)
+        failed += bool(error)
+    return failed
+
+
+def _new_stats() -> dict:
+    return {
+        'searches': 0,
+        'errors': 0,
+        'timeouts': 0,  # searches which finished after the deadline so their results were dropped
+        'results': 0,
+        'results_last': None,
+        'latency_last': None,
+        'latency_avg': None,
+        'latency_max': None,
+        'last_error': None,
+        'updated': None,
+    }
+
+
+def record_search(indexer: str, latency: float, deadline: float = None, results: int = 0, error: str = None):
+    timed_out = deadline is not None and latency > deadline
+
+    with _stats_lock:
+        # stats recorded before any newer fields were added start with their defaults
+        stats = dict(_new_stats(), **(cache.get(_stats_key(indexer)) or {}))
+        stats['searches'] += 1
+        stats['latency_last'] = latency
+        stats['latency_max'] = max(stats['latency_max'] or 0, latency)
+        if stats['latency_avg'] is None:
+            stats['latency_avg'] = latency
+        else:
+            stats['latency_avg'] += (latency - stats['latency_avg']) * INDEXER_LATENCY_WEIGHT
+        if error:
+            stats['errors'] += 1
+            stats['last_error'] = error
+        elif timed_out:
+            stats['timeouts'] += 1
+        else:
+            stats['results'] += results
+            stats['results_last'] = results
+        stats['updated'] = time.time()
+        cache.set(_stats_key(indexer), stats, timeout=INDEXER_STATS_TIMEOUT)
+
+    _update_circuit(indexer, failed=bool(error) or timed_out)
+
+
+def _update_circuit(indexer: str, failed: bool):
+    """
+    Circuit breaker which excludes an indexer from searches for a cool-down (settings.JACKETT_INDEXER_COOL_DOWN)
+    after several failures in a row (settings.JACKETT_INDEXER_FAILURES).
+
+    Once the cool-down is over the indexer is searched again, and a single success closes the circuit
+    while another failure opens it for a further cool-down.
+    The failures are an atomic counter and each circuit is its own key so concurrent searches (in any process) don't
+    lose each other's updates.
+    """
+    if not failed:
+        cache.delete_many([_failures_key(indexer), _circuit_key(indexer)])
+        return
+
+    cache.add(_failures_key(indexer), 0, timeout=INDEXER_STATS_TIMEOUT)
+    try:
+        failures = cache.incr(_failures_key(indexer))
+    except ValueError:
+        # reset by a concurrent success
+        cache.add(_failures_key(indexer), 1, timeout=INDEXER_STATS_TIMEOUT)
+        failures = 1
+
+    if settings.JACKETT_INDEXER_FAILURES and failures >= settings.JACKETT_INDEXER_FAILURES:
+        cache.set(_circuit_key(indexer), time.time() + settings.JACKETT_INDEXER_COOL_DOWN, timeout=INDEXER_STATS_TIMEOUT)
+        # list it for open_circuits(), which is checked every time it opens in case another process' update was lost
+        with _stats_lock:
+            circuits = cache.get(INDEXER_CIRCUITS_KEY) or set()
+            if indexer not in circuits:
+                cache.set(INDEXER_CIRCUITS_KEY, circuits | {indexer}, timeout=None)
+
+
+def open_circuits() -> List[str]:
+    # indexers currently excluded from searches
+    now = time.time()
+    indexers = cache.get(INDEXER_CIRCUITS_KEY) or set()
+    circuits = cache.get_many([_circuit_key(indexer) for indexer in indexers])
+    return sorted(indexer for indexer in indexers if (circuits.get(_circuit_key(indexer)) or 0) > now)
+
+
+def indexer_stats(indexers: List[str]) -> List[dict]:
+    keys = [key(indexer) for indexer in indexers for key in (_stats_key, _failures_key, _circuit_key)]
+    values = cache.get_many(keys)
+    now = time.time()
+    stats = []
+    for indexer in indexers:
+        circuit_open_until = values.get(_circuit_key(indexer))
+        entry = dict(_new_stats(), **(values.get(_stats_key(indexer)) or {}))
+        entry.update(
+            indexer=indexer,
+            healthy=not circuit_open_until or circuit_open_until <= now,
+            failures_consecutive=values.get(_failures_key(indexer)) or 0,  # errors or timeouts in a row
+            circuit_open_until=circuit_open_until,  # excluded from searches until then (see _update_circuit)
+        )
+        stats.append(entry)
+    return stats
@@ -1,10 +1,120 @@
+import codecs
+import json
+from typing import Iterable, Iterator
+
 from nefarious.models import NefariousSettings
+from nefarious.search_result import SearchResult
+
+# bytes read from the response at a time
+RESULTS_CHUNK_SIZE = 64 * 1024
 
+_json_decoder = json.JSONDecoder()
+_whitespace = ' \t\n\r'
 
-def get_jackett_search_url(nefarious_settings: NefariousSettings):
+
+def get_jackett_search_url(nefarious_settings: NefariousSettings, indexer: str = None):
+    # searches a single indexer when one's supplied
     return "http://{}:{}/api/v2.0/indexers/{}/results".format(
         nefarious_settings.jackett_host,
         nefarious_settings.jackett_port,
         # https://github.com/Jackett/Jackett#filter-indexers
-        nefarious_settings.jackett_filter_index or 'all',
+        indexer or nefarious_settings.jackett_filter_index or 'all',
     )
+
+
+def iter_results(response, indexers: list = None) -> Iterator[SearchResult]:
+    # streams the results from a jackett search response requested with "stream=True"
+    return iter_json_results(response.iter_content(chunk_size=RESULTS_CHUNK_SIZE), indexers)
+
+
+class _Buffer:
+    """
+    Decoded text of a stream of json bytes which is only read as far as it's needed, and discarded once it's consumed.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.text = ''
+        self.pos = 0
+
+    def read(self) -> bool:
+        # appends the next chunk and returns whether there was anything left to read
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            return False
+        # drop everything already consumed
+        self.text = self.text[self.pos:] + self.decoder.decode(chunk)
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        # next non-whitespace character, or an empty string at the end of the stream
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _whitespace:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.read():
+                return ''
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError('Expected "{}" at position {} of jackett response'.format(char, self.pos))
+        self.pos += 1
+
+    def value(self):
+        # decodes the next json value, reading more of the stream until it's complete
+        self.peek()
+        while True:
+            try:
+                value, self.pos = _json_decoder.raw_decode(self.text, self.pos)
+                # a number at the end of the buffer could still be incomplete
+                if self.pos < len(self.text) or not isinstance(value, (int, float)):
+                    return value
+            except json.JSONDecodeError:
+                pass
+            if not self.read():
+                # let the decoder raise for a truncated or malformed response
+                value, self.pos = _json_decoder.raw_decode(self.text, self.pos)
+                return value
+
+
+def iter_json_results(chunks: Iterable[bytes], indexers: list = None) -> Iterator[SearchResult]:
+    """
+    Incrementally reads the "Results" of a jackett json response, i.e {"Results": [{...}, ...], "Indexers": [...]},
+    and yields each one as a compact SearchResult.
+    The (small) per-indexer statuses of an aggregate search are appended to "indexers" when it's supplied.
+
+    Only a single result (and a chunk of the response) is held in memory at a time rather than the entire response,
+    which can be several megabytes for broad searches.
+    """
+    buffer = _Buffer(chunks)
+    buffer.expect('{')
+    if buffer.peek() == '}':
+        return
+    while True:
+        key = buffer.value()
+        buffer.expect(':')
+        if key == 'Results':
+            buffer.expect('[')
+            if buffer.peek() == ']':
+                buffer.pos += 1
+            else:
+                while True:
+                    yield SearchResult.from_jackett(buffer.value())
+                    if buffer.peek() == ',':
+                        buffer.pos += 1
+                        continue
+                    buffer.expect(']')
+                    break
+        elif key == 'Indexers' and indexers is not None:
+            indexers += buffer.value() or []
+        else:
+            # skip everything else
+            buffer.value()
+        if buffer.peek() == ',':
+            buffer.pos += 1
+            continue
+        buffer.expect('}')
+        return
@@ -0,0 +1,65 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from nefarious.parsers.benchmark import ParserBenchmark, CORPUS_PARSERS
+
+
+class Command(BaseCommand):
+    help = 'Benchmark parser throughput against the release name corpus'
+
+    # default pass/fail thresholds (overall throughput and per-corpus p99 latency)
+    DEFAULT_MIN_TITLES_PER_SEC = 1000
+    DEFAULT_MAX_P99_US = 5000
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corpus', action='append', choices=list(CORPUS_PARSERS.keys()), help='corpus to run (defaults to all)')
+        parser.add_argument('--iterations', type=int, default=3)
+        parser.add_argument('--min-titles-per-sec', type=float, default=self.DEFAULT_MIN_TITLES_PER_SEC)
+        parser.add_argument('--max-p99-us', type=float, default=self.DEFAULT_MAX_P99_US)
+        parser.add_argument('--families', action='store_true', help='include per pattern family results')
+        parser.add_argument('--no-allocations', action='store_true', help='skip measuring allocations')
+        parser.add_argument('--json', action='store_true', help='output the full report as json')
+
+    def handle(self, *args, **options):
+        benchmark = ParserBenchmark(
+            corpora=options['corpus'],
+            iterations=options['iterations'],
+            track_allocations=not options['no_allocations'],
+        )
+        report = benchmark.run()
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self._write_report(report, options['families'])
+
+        # thresholds
+        failures = []
+        if report['total']['titles_per_sec'] < options['min_titles_per_sec']:
+            failures.append('throughput {:.0f} titles/sec is below {:.0f}'.format(
+                report['total']['titles_per_sec'], options['min_titles_per_sec']))
+        for name, result in report['corpora'].items():
+            if result['p99_us'] > options['max_p99_us']:
+                failures.append('{} p99 {:.0f}us is above {:.0f}us'.format(name, result['p99_us'], options['max_p99_us']))
+        if failures:
+            raise CommandError('Parser benchmark failed: {}'.format('; '.join(failures)))
+
+    def _write_report(self, report: dict, include_families: bool):
+        row = '{:<60} {:>8} {:>12} {:>10} {:>10} {:>12}'
+        self.stdout.write(row.format('', 'titles', 'titles/sec', 'p50 us', 'p99 us', 'alloc max'))
+        for name, result in report['corpora'].items():
+            self.stdout.write(row.format(
+                '{} ({})'.format(name, result['parser']), result['titles'], '{:.0f}'.format(result['titles_per_sec']),
+                '{:.1f}'.format(result['p50_us']), '{:.1f}'.format(result['p99_us']), result.get('alloc_max_bytes', '-')))
+        total = report['total']
+        self.stdout.write(row.format(
+            'total', total['count'], '{:.0f}'.format(total['titles_per_sec']),
+            '{:.1f}'.format(total['p50_us']), '{:.1f}'.format(total['p99_us']), '-'))
+
+        if include_families:
+            self.stdout.write('')
+            for family, result in sorted(report['families'].items(), key=lambda f: -f[1]['p99_us']):
+                self.stdout.write(row.format(
+                    family[:60], result['count'], '{:.0f}'.format(result['titles_per_sec']),
+                    '{:.1f}'.format(result['p50_us']), '{:.1f}'.format(result['p99_us']), '-'))
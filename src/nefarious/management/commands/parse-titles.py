@@ -0,0 +1,47 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from nefarious.parsers.bulk import bulk_parse, PARSER_CLASSES, BULK_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Bulk parse release titles (one per line) from a file or stdin and write json lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('media_type', type=str, choices=list(PARSER_CLASSES.keys()))
+        parser.add_argument('input', type=str, nargs='?', default='-', help='file of titles, or "-" for stdin')
+        parser.add_argument('--output', type=str, default='-', help='file to write json lines to, or "-" for stdout')
+        parser.add_argument('--processes', type=int, default=None, help='worker processes (defaults to the number of CPUs)')
+        parser.add_argument('--chunk-size', type=int, default=BULK_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+
+        try:
+            input_file = sys.stdin if options['input'] == '-' else open(options['input'], encoding='utf-8', errors='replace')
+        except OSError as e:
+            raise CommandError(str(e))
+        output_file = self.stdout if options['output'] == '-' else open(options['output'], 'w', encoding='utf-8')
+
+        total = 0
+        matched = 0
+        started = time.monotonic()
+
+        try:
+            for lines, chunk_matched in bulk_parse(input_file, options['media_type'], processes=options['processes'], chunk_size=options['chunk_size']):
+                for line in lines:
+                    output_file.write(line + '\n')
+                total += len(lines)
+                matched += chunk_matched
+        finally:
+            if input_file is not sys.stdin:
+                input_file.close()
+            if output_file is not self.stdout:
+                output_file.close()
+
+        elapsed = time.monotonic() - started
+        self.stderr.write('Parsed {} titles ({} matched) in {:.2f}s ({:.0f} titles/sec)'.format(
+            total, matched, elapsed, total / elapsed if elapsed else 0))
@@ -0,0 +1,48 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from nefarious.match_plan import MatchPlan, MISMATCH_PARSE_TIMEOUT
+
+# bump to forget every remembered decision, i.e when the parsers change how titles are matched
+MATCH_DECISIONS_VERSION = 1
+
+
+class RejectedResults:
+    """
+    Remembers which search results (by jackett Guid) were rejected for a wanted media, and why.
+
+    Every search of the same media returns mostly the same results, so later searches skip the known rejects
+    rather than parsing and rejecting them all over again.
+    The match plan's fingerprint is part of the key so changing the quality profile, keyword filters or the
+    hardcoded subs setting starts over with nothing remembered (the old decisions just expire).
+    """
+
+    def __init__(self, media_type: str, watch_media_id: int, match_plan: MatchPlan):
+        self.prefix = 'match-rejected:{}:{}:{}:{}'.format(
+            MATCH_DECISIONS_VERSION, media_type, watch_media_id, match_plan.fingerprint())
+
+    @staticmethod
+    def enabled() -> bool:
+        return bool(settings.MATCH_REJECTED_CACHE_TTL)
+
+    def key(self, guid: str) -> str:
+        # guids are usually urls of any length
+        return '{}:{}'.format(self.prefix, hashlib.sha1(guid.encode('utf-8')).hexdigest())
+
+    def get(self, results: list) -> dict:
+        # returns the reason each previously rejected result was rejected, keyed by its guid
+        if not self.enabled():
+            return {}
+        keys = {self.key(result.guid): result.guid for result in results if result.guid}
+        return {keys[key]: reason for key, reason in cache.get_many(list(keys.keys())).items()}
+
+    def set(self, rejected: dict):
+        # "rejected" is the reason keyed by the result guid.
+        # parse timeouts can be transient (i.e cpu load) so those results are tried again next time
+        if not self.enabled():
+            return
+        cache.set_many(
+            {self.key(guid): reason for guid, reason in rejected.items() if guid and reason != MISMATCH_PARSE_TIMEOUT},
+            timeout=settings.MATCH_REJECTED_CACHE_TTL)
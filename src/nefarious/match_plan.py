@@ -0,0 +1,121 @@
+import hashlib
+import regex
+from typing import NamedTuple, Optional, Type
+
+from nefarious.parsers.base import ParserBase
+from nefarious.quality import Profile, QUALITIES_BY_NAME
+
+GB = 1024 ** 3
+
+# mismatch reason for a title which exceeded the parsing time budget (see ParserBase.first_match)
+MISMATCH_PARSE_TIMEOUT = 'parse timeout'
+
+
+class MatchPlan(NamedTuple):
+    """
+    Everything needed to decide whether a search result is a match, compiled once per search.
+
+    The quality profile, normalized media titles and keyword exclusions are resolved up front so checking
+    each result is only attribute lookups, a bit test and a single exclusion search.
+    It's immutable and picklable so it can be shared with other threads and processes.
+    """
+    parser_class: Type[ParserBase]
+    titles: frozenset  # normalized media titles
+    year: Optional[str] = None  # movies
+    season_number: Optional[int] = None  # tv
+    episode_number: Optional[int] = None  # tv single episodes
+    profile_name: str = ''  # for logging, i.e "hd (hd-720p)"
+    profile_mask: int = 0  # quality bitset (see quality.Profile)
+    min_size_bytes: Optional[float] = None
+    max_size_bytes: Optional[float] = None
+    allow_hardcoded_subs: bool = False
+    require_hdr: bool = False
+    require_five_point_one: bool = False
+    exclusions: frozenset = frozenset()  # lower cased keyword exclusions
+    exclusions_regex: Optional[regex.Pattern] = None
+
+    @classmethod
+    def compile(cls, parser_class: Type[ParserBase], titles: list, quality_profile, nefarious_settings, **media) -> 'MatchPlan':
+        # "media" is the year (movies) or the season/episode numbers (tv) to match
+        profile = Profile.get_from_name(quality_profile.quality)
+        parser = parser_class.__new__(parser_class)
+        keywords = nefarious_settings.keyword_search_filters.keys() if nefarious_settings.keyword_search_filters else []
+        exclusions = frozenset(keyword.lower() for keyword in keywords)
+        return cls(
+            parser_class=parser_class,
+            titles=frozenset(parser.normalize_media_title(title) for title in titles),
+            profile_name=str(quality_profile),
+            profile_mask=profile.mask,
+            min_size_bytes=quality_profile.min_size_gb * GB if quality_profile.min_size_gb is not None else None,
+            max_size_bytes=quality_profile.max_size_gb * GB if quality_profile.max_size_gb is not None else None,
+            allow_hardcoded_subs=bool(nefarious_settings.allow_hardcoded_subs),
+            require_hdr=bool(quality_profile.require_hdr),
+            require_five_point_one=bool(quality_profile.require_five_point_one),
+            exclusions=exclusions,
+            exclusions_regex=cls._exclusions_regex(exclusions),
+            **media,
+        )
+
+    @staticmethod
+    def _exclusions_regex(exclusions: frozenset) -> Optional[regex.Pattern]:
+        # matches an exclusion as an entire word of the lower cased title, the same as comparing it against regex.findall(r'\w+', title).
+        # exclusions with non-word characters can never equal a word so they're left out
+        words = sorted(e for e in exclusions if regex.fullmatch(r'\w+', e))
+        if not words:
+            return None
+        return regex.compile(r'(?<!\w)(?:{})(?!\w)'.format('|'.join(regex.escape(word) for word in words)))
+
+    def fingerprint(self) -> str:
+        # stable digest of everything a decision depends on, so it changes with the profile, keyword filters, hardcoded subs setting etc
+        fields = self._asdict()
+        fields['parser_class'] = self.parser_class.__name__
+        fields['titles'] = sorted(self.titles)
+        fields['exclusions'] = sorted(self.exclusions)
+        fields.pop('exclusions_regex')  # derived from the exclusions
+        return hashlib.sha1(repr(sorted(fields.items())).encode('utf-8')).hexdigest()
+
+    def media_kwargs(self) -> dict:
+        if self.season_number is not None:
+            return dict(season_number=self.season_number, episode_number=self.episode_number)
+        return dict(year=self.year)
+
+    def mismatch(self, parser: ParserBase, size_bytes: int) -> Optional[str]:
+        # returns the reason the parsed result isn't a match, otherwise None
+        match = parser.match
+
+        # parsing timed out
+        if parser.timed_out:
+            return MISMATCH_PARSE_TIMEOUT
+        # title
+        if not parser.is_normalized_match(self.titles, **self.media_kwargs()):
+            return 'title'
+        # quality
+        if not self.profile_mask & self._quality_mask(match.quality):
+            return 'quality'
+        # size
+        if self.min_size_bytes is not None and size_bytes < self.min_size_bytes:
+            return f'size min: {size_bytes / GB} < {self.min_size_bytes / GB}'
+        if self.max_size_bytes is not None and size_bytes > self.max_size_bytes:
+            return f'size max: {size_bytes / GB} > {self.max_size_bytes / GB}'
+        # subs
+        if not self.allow_hardcoded_subs and match.hc:
+            return 'hardcoded subs'
+        # hdr
+        if self.require_hdr and not match.hdr:
+            return 'hdr'
+        # 5.1 surround sound
+        if self.require_five_point_one and not match.five_point_one:
+            return 'five_point_one'
+        # keyword filters
+        if self.exclusions_regex and self.exclusions_regex.search(parser.title_query.lower()):
+            return 'keyword search filters'
+
+        return None
+
+    def is_match(self, parser: ParserBase, size_bytes: int) -> bool:
+        return self.mismatch(parser, size_bytes) is None
+
+    @staticmethod
+    def _quality_mask(quality_name: str) -> int:
+        quality = QUALITIES_BY_NAME.get(quality_name.lower()) if quality_name else None
+        return quality.mask if quality else 0
@@ -0,0 +1,84 @@
+import atexit
+import os
+import threading
+
+import billiard
+from django.conf import settings
+
+from nefarious.match_plan import MatchPlan
+from nefarious.utils import logger_background
+
+# number of results sent to a pool worker at a time
+MATCH_POOL_CHUNK_SIZE = 250
+
+# seconds to wait on a chunk before giving up (i.e a worker was killed)
+MATCH_POOL_TIMEOUT = 60 * 5
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def _init_worker():
+    # workers started with "spawn" need django configured for the parser settings
+    import django
+    django.setup()
+
+
+def get_pool():
+    """
+    Returns the process pool shared by everything in this process, creating it on first use.
+    Every celery worker process has its own pool, which is why it's small (settings.PARSER_POOL_PROCESSES).
+
+    billiard is used (vs multiprocessing) since it allows creating children from the daemonic celery worker processes.
+    A forked process gets its own pool rather than inheriting its parent's.
+    """
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = billiard.Pool(settings.PARSER_POOL_PROCESSES or None, initializer=_init_worker)
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def close_pool():
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.terminate()
+            _pool.join()
+        _pool = None
+        _pool_pid = None
+
+
+atexit.register(close_pool)
+
+
+def use_pool(total: int) -> bool:
+    # whether a result set of this size is large enough to be matched in the pool
+    return bool(settings.PARSER_POOL_THRESHOLD) and total >= settings.PARSER_POOL_THRESHOLD
+
+
+def match_chunk(plan: MatchPlan, titles: list, sizes: list) -> list:
+    # worker entry point which parses and matches a chunk of results and returns each one's mismatch reason (None for a match)
+    parsers = plan.parser_class.parse_many(titles)
+    return [plan.mismatch(parser, size) for parser, size in zip(parsers, sizes)]
+
+
+def match_in_pool(plan: MatchPlan, titles: list, sizes: list, chunk_size: int = MATCH_POOL_CHUNK_SIZE) -> list:
+    # returns the mismatch reason of every result in order, where None is a match
+    try:
+        pool = get_pool()
+        pending = [
+            pool.apply_async(match_chunk, (plan, titles[offset:offset + chunk_size], sizes[offset:offset + chunk_size]))
+            for offset in range(0, len(titles), chunk_size)
+        ]
+        mismatches = []
+        for result in pending:
+            mismatches += result.get(timeout=MATCH_POOL_TIMEOUT)
+        return mismatches
+    except Exception as e:
+        # i.e a worker was killed or timed out, so start over with a new pool next time and match them here instead
+        logger_background.warning('parser pool failed ({}), matching {} results in process'.format(repr(e), len(titles)))
+        close_pool()
+        return match_chunk(plan, titles, sizes)
@@ -0,0 +1,21 @@
+# Generated by Django 3.0.2 on 2026-10-18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nefarious', '0099_nefarioussettings_remove_completed_torrents_from_transmission'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='nefarioussettings',
+            name='jackett_fan_out_search',
+            field=models.BooleanField(
+                default=False,
+                help_text='Search each configured Jackett indexer individually so a slow indexer can be skipped',
+            ),
+        ),
+    ]
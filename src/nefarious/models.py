@@ -51,6 +51,10 @@ class NefariousSettings(models.Model):
 
     jackett_filter_index = models.CharField(  # https://github.com/Jackett/Jackett#filter-indexers
         max_length=500, null=True, blank=True, help_text='Optional Jackett index filter to use for searches')
+    jackett_fan_out_search = models.BooleanField(
+        default=False,
+        help_text='Search each configured Jackett indexer individually so a slow indexer can be skipped',
+    )
 
     # transmission
     transmission_host = models.CharField(max_length=500, default='transmission')
@@ -0,0 +1,167 @@
+from typing import Dict, List, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from nefarious.models import WatchMovie, WatchTVEpisode, WatchTVSeason, MEDIA_TYPE_MOVIE, MEDIA_TYPE_TV_SEASON, MEDIA_TYPE_TV_EPISODE
+from nefarious.parsers.movie import MovieParser
+from nefarious.parsers.tv import TVParser
+from nefarious.search import SearchTorrents, SEARCH_MEDIA_TYPE_MOVIE, SEARCH_MEDIA_TYPE_TV
+from nefarious.utils import logger_background
+
+# seconds to remember a release was already seen so it's only matched once
+RELEASE_SEEN_TIMEOUT = 60 * 60 * 24 * 7
+
+# set while the monitor is polling successfully
+RELEASE_MONITOR_HEALTHY_KEY = 'release-monitor-healthy'
+
+
+def _seen_key(guid: str) -> str:
+    return 'release-monitor-seen:{}'.format(guid)
+
+
+def mark_releases_seen(guids: list):
+    # remembers releases once they've been processed so they aren't matched again
+    cache.set_many({_seen_key(guid): True for guid in guids if guid}, timeout=RELEASE_SEEN_TIMEOUT)
+
+
+class WantedIndex:
+    """
+    Every wanted (and released) movie, season and episode keyed by its normalized title (and season/episode number)
+    so a new release can be routed to the media it's for with a few dictionary lookups.
+    """
+
+    def __init__(self):
+        self.movies: Dict[str, List[Tuple[str, int]]] = {}  # title -> [(year, id)]
+        self.seasons: Dict[Tuple[str, int], List[int]] = {}  # (title, season) -> [id]
+        self.episodes: Dict[Tuple[str, int, int], List[int]] = {}  # (title, season, episode) -> [id]
+
+    def __len__(self):
+        return sum(len(ids) for index in (self.movies, self.seasons, self.episodes) for ids in index.values())
+
+    @classmethod
+    def build(cls) -> 'WantedIndex':
+        index = cls()
+        today = timezone.now().date()
+        wanted_kwargs = dict(collected=False, transmission_torrent_hash__isnull=True)
+        movie_parser = MovieParser.__new__(MovieParser)
+        tv_parser = TVParser.__new__(TVParser)
+
+        def wanted(query):
+            # media missing its release date is wanted anyway
+            return [media for media in query.filter(**wanted_kwargs) if not media.release_date or media.release_date <= today]
+
+        for watch_movie in wanted(WatchMovie.objects.all()):
+            year = watch_movie.release_date.strftime('%Y') if watch_movie.release_date else None
+            index.movies.setdefault(movie_parser.normalize_media_title(watch_movie.name), []).append((year, watch_movie.id))
+        for watch_season in wanted(WatchTVSeason.objects.select_related('watch_tv_show')):
+            key = (tv_parser.normalize_media_title(watch_season.watch_tv_show.name), watch_season.season_number)
+            index.seasons.setdefault(key, []).append(watch_season.id)
+        for watch_episode in wanted(WatchTVEpisode.objects.select_related('watch_tv_show')):
+            key = (tv_parser.normalize_media_title(watch_episode.watch_tv_show.name), watch_episode.season_number, watch_episode.episode_number)
+            index.episodes.setdefault(key, []).append(watch_episode.id)
+
+        return index
+
+    def has_movies(self) -> bool:
+        return bool(self.movies)
+
+    def has_tv(self) -> bool:
+        return bool(self.seasons or self.episodes)
+
+    def match_movie(self, parser: MovieParser) -> List[Tuple[str, int]]:
+        # returns the (media type, id) of the wanted movies the release is for
+        if not parser.match:
+            return []
+        years = parser.match.years
+        return [
+            (MEDIA_TYPE_MOVIE, watch_movie_id) for year, watch_movie_id in self.movies.get(parser.match.title, [])
+            # match year if the media and release included it
+            if not year or not years or year in years
+        ]
+
+    def match_tv(self, parser: TVParser) -> List[Tuple[str, int]]:
+        # returns the (media type, id) of the wanted seasons or episodes the release is for
+        if not parser.match or not parser.match.seasons:
+            return []
+        title = parser.match.title
+        if parser.is_full_season():
+            return [
+                (MEDIA_TYPE_TV_SEASON, watch_season_id)
+                for season in parser.match.seasons for watch_season_id in self.seasons.get((title, season), [])
+            ]
+        if parser.is_single_episode():
+            return [
+                (MEDIA_TYPE_TV_EPISODE, watch_episode_id)
+                for season in parser.match.seasons for episode in parser.match.episodes
+                for watch_episode_id in self.episodes.get((title, season, episode), [])
+            ]
+        return []
+
+
+class ReleaseMonitor:
+    """
+    Polls the latest jackett releases and matches them against the index of wanted media.
+
+    Each new release is only parsed once no matter how many media are wanted, so a single request per media type
+    replaces searching for every wanted item. The matched releases still go through each media's processor for the
+    full match (quality, size etc).
+
+    Releases which matched nothing are remembered right away, whereas matched releases are only remembered once they've
+    been processed (see mark_releases_seen) so they're matched again if processing them fails.
+    While the monitor is healthy (see is_healthy) searching each wanted media is only a backfill (see tasks.wanted_media_task).
+    """
+
+    def __init__(self, index: WantedIndex = None):
+        self.index = index if index is not None else WantedIndex.build()
+
+    def poll(self) -> Dict[Tuple[str, int], list]:
+        # returns the new releases for each wanted media, keyed by (media type, id)
+        matches = {}
+        ok = True
+        if self.index.has_tv():
+            ok = self._match(SEARCH_MEDIA_TYPE_TV, TVParser, self.index.match_tv, matches) and ok
+        if self.index.has_movies():
+            ok = self._match(SEARCH_MEDIA_TYPE_MOVIE, MovieParser, self.index.match_movie, matches) and ok
+        if ok:
+            # healthy until it misses a couple of polls
+            cache.set(RELEASE_MONITOR_HEALTHY_KEY, True, timeout=settings.RELEASE_MONITOR_INTERVAL * 2)
+        return matches
+
+    @staticmethod
+    def is_healthy() -> bool:
+        return bool(settings.RELEASE_MONITOR_INTERVAL) and bool(cache.get(RELEASE_MONITOR_HEALTHY_KEY))
+
+    def _match(self, media_type: str, parser_class, match_index, matches: dict) -> bool:
+        # returns whether the latest releases were searched
+        # an empty query returns the latest releases
+        search = SearchTorrents(media_type, '', use_cache=False)
+        if not search.ok:
+            logger_background.warning('release monitor: search error: {}'.format(search.error_content))
+            return False
+
+        releases = self._new_releases(search.results)
+        parsers = parser_class.parse_many([release.title for release in releases])
+
+        matched = 0
+        unmatched = []
+        for release, parser in zip(releases, parsers):
+            keys = match_index(parser)
+            for key in keys:
+                matches.setdefault(key, []).append(release)
+                matched += 1
+            if not keys:
+                unmatched.append(release.guid)
+        mark_releases_seen(unmatched)
+
+        logger_background.info('release monitor: {} latest {} releases, {} new, {} matched wanted media'.format(
+            len(search.results), media_type, len(releases), matched))
+        return True
+
+    @staticmethod
+    def _new_releases(results: list) -> list:
+        # releases which haven't been seen before
+        keys = {_seen_key(result.guid): result for result in results if result.guid}
+        seen = cache.get_many(list(keys.keys()))
+        return [result for key, result in keys.items() if key not in seen]
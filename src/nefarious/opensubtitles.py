@@ -1,7 +1,7 @@
 import os
 import struct
-import requests
 from typing import Union
+from nefarious import http_client
 from nefarious.models import NefariousSettings, WatchMovie, WatchTVEpisode
 from nefarious.parsers.base import ParserBase
 from nefarious.utils import logger_foreground, logger_background
@@ -24,7 +24,7 @@ class OpenSubtitles:
         self.nefarious_settings = NefariousSettings.get()
 
     def auth(self):
-        self._response = requests.post(
+        self._response = http_client.post(
             self.API_URL_AUTH,
             data={
                 'username': self.nefarious_settings.open_subtitles_username,
@@ -54,7 +54,7 @@ class OpenSubtitles:
 
     def search(self, open_subtitle_type: str, tmdb_id: int, path: str) -> Union[dict, bool]:
         media_hash = self.media_hash(path)
-        self._response = requests.get(
+        self._response = http_client.get(
             self.API_URL_SEARCH,
             params={
                 'type': open_subtitle_type,  # movie|episode
@@ -117,7 +117,7 @@ class OpenSubtitles:
         # retrieve the file id (guaranteed to have a single file from previous validation)
         file_id = search_result['attributes']['files'][0]['file_id']
 
-        response = requests.post(
+        response = http_client.post(
             self.API_URL_DOWNLOAD,
             data={
                 'file_id': file_id,
@@ -136,7 +136,7 @@ class OpenSubtitles:
 
         download_result = response.json()
 
-        response = requests.get(download_result['link'], timeout=30)
+        response = http_client.get(download_result['link'], timeout=30)
         response.raise_for_status()
 
         logger_background.info('found subtitle {} for {}'.format(
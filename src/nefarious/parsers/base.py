@@ -1,7 +1,12 @@
 import regex
+from django.conf import settings
 from unidecode import unidecode
 from nefarious import quality
 from nefarious.quality import Resolution, Profile
+from nefarious.parsers.cache import parse_cache
+from nefarious.parsers.dispatch import PatternDispatcher, PatternTimeout
+from nefarious.parsers.result import ParseResult
+from nefarious.parsers.timeouts import parser_timeouts
 
 # piracy nomenclature
 # https://en.wikipedia.org/wiki/Pirated_movie_release_types
@@ -14,7 +19,10 @@ from nefarious.quality import Resolution, Profile
 class ParserBase:
     title_query: str = None
     media_regex_list = list()
-    match: dict = None
+    media_regex_features = dict()  # pattern name -> title feature the pattern requires to match (see parsers.dispatch)
+    dispatcher: PatternDispatcher = None
+    match: ParseResult = None
+    timed_out = False  # the title exceeded the parsing time budget, which may be transient (i.e cpu load)
 
     word_delimiter_regex = regex.compile(r"(\s|\.|,|_|-|=|\|)+")
     punctuation_regex = regex.compile(r"[^\w\s]")
@@ -58,62 +66,111 @@ class ParserBase:
     anime_bluray_regex = regex.compile(r"bd(?:720|1080)|(?<=[-_. (\[])bd(?=[-_. )\]])", regex.I)
     high_def_pdtv_regex = regex.compile(r"hr[-_. ]ws", regex.I)
     raw_hd_regex = regex.compile(r"\b(?<rawhd>RawHD|1080i[-_. ]HDTV|Raw[-_. ]HD|MPEG[-_. ]?2)\b", regex.I)
-    hardcoded_subs_regex = regex.compile(r"\b(?<hc>hc|korsub)\b", regex.I)
-    hdr_regex = regex.compile(r"\bhdr\b", regex.I)
-    five_point_one_regex  = regex.compile(r'\b(ddp?)?5[. ]1\b', regex.I)  # # 5.1 surround sound
+
+    # resolution and the boolean tags (hardcoded subs, hdr & 5.1 surround sound) never overlap so they're found in a single scan
+    tags_regex = regex.compile(
+        r"\b(?:"
+        r"(?<R480p>480p|640x480|848x480)|"
+        r"(?<R576p>576p)|"
+        r"(?<R720p>720p|1280x720)|"
+        r"(?<R1080p>1080p|1920x1080|1440p|FHD|1080i)|"
+        r"(?<R2160p>2160p|4k[-_. ](?:UHD|HEVC|BD)|"
+        r"(?:UHD|HEVC|BD)[-_. ]4k)|"
+        r"(?<hc>hc|korsub)|"  # hardcoded subs
+        r"(?<hdr>hdr)|"  # high dynamic range
+        r"(?<five_point_one>(?:ddp?)?5[. ]1))\b",  # 5.1 surround sound
+        regex.I)
+    tags_resolutions = {
+        'R480p': Resolution.R480P,
+        'R576p': Resolution.R576p,
+        'R720p': Resolution.R720p,
+        'R1080p': Resolution.R1080p,
+        'R2160p': Resolution.R2160p,
+    }
 
     def __init__(self, title):
         self.title_query = title
         self.parse()
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # every parser gets its own dispatcher (and hit counters) for its pattern list
+        cls.dispatcher = PatternDispatcher(cls.media_regex_list, cls.media_regex_features)
+
+    @classmethod
+    def parse_many(cls, titles: list) -> list:
+        # parses a batch of titles (i.e an entire search result set) where repeated titles share the same parser
+        parsers = {}
+        for title in titles:
+            if title not in parsers:
+                parsers[title] = cls.cached(title)
+        return [parsers[title] for title in titles]
+
+    @classmethod
+    def cached(cls, title: str):
+        # returns a parser for the title re-using a previous parse of the exact same title (see ParseCache)
+        parser = cls.__new__(cls)
+        parser.title_query = title
+        found, match = parse_cache.get(cls, title)
+        if found:
+            parser.match = match
+        else:
+            parser.parse()
+            # a timed out parse isn't kept so it's tried again next time
+            if not parser.timed_out:
+                parse_cache.set(cls, title, parser.match)
+        return parser
+
     def parse(self):
         title = self.normalize_title(self.title_query)
-        matches = self.matches(title)
-        if matches:
+        match = self.first_match(title)
+        if match:
 
             # get the first match
-            self.match = matches[0]
+            self.match = match
 
             # title
-            if 'title' in self.match and self.match['title']:
-                self.match['title'] = self.normalize_media_title(self.match['title'][0])
+            if self.match.title:
+                self.match.title = self.normalize_media_title(self.match.title)
 
             self.parse_tags()
 
         return self.match
 
     def parse_tags(self):
-
-        # quality
-        title_quality = self.parse_quality(self.title_query)
-        self.match['quality'] = title_quality.name
-        self.match['resolution'] = self.parse_resolution(self.title_query)
-
-        # hardcoded subs
-        self.match['hc'] = self.parse_hardcoded_subs()
-
-        # hdr (high dynamic range)
-        self.match['hdr'] = self.parse_hdr()
-
-        # 5.1 surround sound
-        self.match['five_point_one'] = self.parse_five_point_one()
-
-    def parse_five_point_one(self):
-        # 5.1 surround sound
-        match = self.five_point_one_regex.search(self.title_query)
-        return True if match else False
-
-    def parse_hdr(self):
-        match = self.hdr_regex.search(self.title_query)
-        return True if match else False
-
-    def parse_hardcoded_subs(self):
-        match = self.hardcoded_subs_regex.search(self.title_query)
-        return True if match else False
+        tags = self.parse_release_tags(self.title_query)
+        self.match.quality = tags['quality'].name
+        self.match.resolution = tags['resolution']
+        self.match.hc = tags['hc']  # hardcoded subs
+        self.match.hdr = tags['hdr']  # hdr (high dynamic range)
+        self.match.five_point_one = tags['five_point_one']  # 5.1 surround sound
+
+    def parse_release_tags(self, title: str) -> dict:
+        # scans the title once for its resolution, hardcoded subs, hdr and 5.1 tags, then derives the quality from them
+        name = title.strip().lower()
+        tags = {
+            'resolution': Resolution.Unknown,
+            'hc': False,
+            'hdr': False,
+            'five_point_one': False,
+        }
+        for match in self.tags_regex.finditer(name):
+            tag = match.lastgroup
+            if tag in self.tags_resolutions:
+                # only the first resolution counts
+                if tags['resolution'] == Resolution.Unknown:
+                    tags['resolution'] = self.tags_resolutions[tag]
+            else:
+                tags[tag] = True
+        tags['quality'] = self._parse_quality(name, tags['resolution'])
+        return tags
 
     def parse_quality(self, name: str):
         name = name.strip().lower()
-        resolution = self.parse_resolution(name)
+        return self._parse_quality(name, self.parse_resolution(name))
+
+    def _parse_quality(self, name: str, resolution: str):
+        # expects a stripped & lower cased name
 
         # raw hd match
         if self.raw_hd_regex.search(name):
@@ -248,15 +305,27 @@ class ParserBase:
 
         return Resolution.Unknown
 
+    def first_match(self, name):
+        # stops at the first matching pattern, which is the same as matches()[0] but without searching every pattern
+        try:
+            match_name, match = self.dispatcher.first_match(
+                name, pattern_timeout=settings.PARSER_PATTERN_TIMEOUT, title_timeout=settings.PARSER_TITLE_TIMEOUT)
+        except PatternTimeout as e:
+            # treat a title exceeding the time budget as a non-match
+            self.timed_out = True
+            parser_timeouts.record(self.__class__, self.title_query or name, e.pattern_name, e.elapsed)
+            return None
+        if match:
+            return ParseResult.from_match(match_name, match)
+        return None
+
     def matches(self, name):
 
         results = []
         for match_name, match_re in self.media_regex_list:
             match = match_re.search(name)
             if match:
-                result = match.capturesdict()
-                result['match_name'] = match_name
-                results.append(result)
+                results.append(ParseResult.from_match(match_name, match))
         return results
 
     def normalize_media_title(self, title: str):
@@ -274,11 +343,8 @@ class ParserBase:
 
         # remove known extensions
         extension = self._get_extension(title)
-        if extension:
-            for ext, _ in quality.EXTENSIONS.items():
-                if extension == ext:
-                    title = title.replace(extension, '')
-                    break
+        if extension in quality.EXTENSIONS:
+            title = title.replace(extension, '')
 
         title = self.simple_title_regex.sub(' ', title)
         title = self.clean_quality_brackets_regex.sub('', title)
@@ -292,18 +358,24 @@ class ParserBase:
             return False
         return self._is_match(title, *args, **kwargs)
 
+    def is_normalized_match(self, titles: set, *args, **kwargs) -> bool:
+        # same as is_match() but against titles which were already normalized (see normalize_media_title)
+        if not self.match:
+            return False
+        return self._is_normalized_match(titles, *args, **kwargs)
+
     def is_five_point_one_match(self, needs_five_point_one = False):
         # 5.1 surround sound
-        return self.match['five_point_one'] if needs_five_point_one else True
+        return self.match.five_point_one if needs_five_point_one else True
 
     def is_hdr_match(self, needs_hdr = False):
-        return self.match['hdr'] if needs_hdr else True
+        return self.match.hdr if needs_hdr else True
 
     def is_quality_match(self, profile: Profile) -> bool:
-        return self.match['quality'] in profile.qualities
+        return profile.allows(self.match.quality)
 
     def is_hardcoded_subs_match(self, allows: bool) -> bool:
-        if not allows and self.match['hc']:
+        if not allows and self.match.hc:
             return False
         return True
 
@@ -312,7 +384,10 @@ class ParserBase:
         words = regex.findall(r'\w+', self.title_query.lower())
         return not set([e.lower() for e in exclusions]).intersection(words)
 
-    def _is_match(self, *args, **kwargs) -> bool:
+    def _is_match(self, title, *args, **kwargs) -> bool:
+        return self._is_normalized_match({self.normalize_media_title(title)}, *args, **kwargs)
+
+    def _is_normalized_match(self, titles: set, *args, **kwargs) -> bool:
         raise NotImplementedError
 
     def _get_extension(self, name):
@@ -334,3 +409,6 @@ class ParserBase:
         if number.isalpha():
             number = number.lower()
             return numbers.index(number) if number in numbers else None
+
+
+ParserBase.dispatcher = PatternDispatcher(ParserBase.media_regex_list)
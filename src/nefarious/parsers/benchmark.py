@@ -0,0 +1,128 @@
+import math
+import os
+import time
+import tracemalloc
+from collections import defaultdict
+from nefarious.parsers.movie import MovieParser
+from nefarious.parsers.tv import TVParser
+
+# checked-in release names (test titles plus generated Sonarr/Radarr style variations)
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), 'corpus')
+
+CORPUS_MOVIE = 'movie'
+CORPUS_TV = 'tv'
+CORPUS_ANIME = 'anime'
+
+# which parser each corpus is run through
+CORPUS_PARSERS = {
+    CORPUS_MOVIE: MovieParser,
+    CORPUS_TV: TVParser,
+    CORPUS_ANIME: TVParser,
+}
+
+# pattern family reported for titles that don't match any pattern
+FAMILY_NO_MATCH = 'No match'
+
+
+def load_corpus(name: str) -> list:
+    with open(os.path.join(CORPUS_PATH, '{}.txt'.format(name)), encoding='utf-8') as fh:
+        return [line.rstrip('\n') for line in fh if line.strip()]
+
+
+def percentile(values: list, pct: float) -> float:
+    # nearest-rank percentile of an already sorted list
+    if not values:
+        return 0.0
+    index = max(0, min(len(values), math.ceil(pct / 100 * len(values))) - 1)
+    return values[index]
+
+
+def latency_summary(latencies: list) -> dict:
+    # latencies are in nanoseconds and reported in microseconds
+    latencies = sorted(latencies)
+    total = sum(latencies)
+    return {
+        'count': len(latencies),
+        'titles_per_sec': len(latencies) / (total / 1e9) if total else 0.0,
+        'p50_us': percentile(latencies, 50) / 1e3,
+        'p99_us': percentile(latencies, 99) / 1e3,
+        'max_us': latencies[-1] / 1e3 if latencies else 0.0,
+    }
+
+
+class ParserBenchmark:
+    """
+    Measures parser throughput over the release name corpus.
+
+    Titles are parsed with the uncached parser constructors so repeated runs measure the regex work and not the ParseCache.
+    Allocations are measured in a separate pass since tracing slows everything down and would skew the timings.
+    """
+
+    def __init__(self, corpora: list = None, iterations: int = 3, track_allocations: bool = True):
+        self.corpora = corpora or list(CORPUS_PARSERS.keys())
+        self.iterations = iterations
+        self.track_allocations = track_allocations
+
+        for name in self.corpora:
+            if name not in CORPUS_PARSERS:
+                raise Exception('Unknown corpus "{}"'.format(name))
+
+    def run(self) -> dict:
+        report = {
+            'corpora': {},
+            'families': {},
+        }
+        all_latencies = []
+        family_latencies = defaultdict(list)
+
+        for name in self.corpora:
+            parser_class = CORPUS_PARSERS[name]
+            titles = load_corpus(name)
+            latencies = []
+
+            # warm up
+            for title in titles:
+                parser_class(title)
+
+            for _ in range(self.iterations):
+                for title in titles:
+                    start = time.perf_counter_ns()
+                    parser = parser_class(title)
+                    elapsed = time.perf_counter_ns() - start
+                    latencies.append(elapsed)
+                    family = parser.match.match_name if parser.match else None
+                    family_latencies['{}: {}'.format(parser_class.__name__, family or FAMILY_NO_MATCH)].append(elapsed)
+
+            result = latency_summary(latencies)
+            result['parser'] = parser_class.__name__
+            result['titles'] = len(titles)
+            if self.track_allocations:
+                result.update(self._allocations(parser_class, titles))
+            report['corpora'][name] = result
+            all_latencies += latencies
+
+        report['families'] = {family: latency_summary(values) for family, values in family_latencies.items()}
+        report['total'] = latency_summary(all_latencies)
+        return report
+
+    @staticmethod
+    def _allocations(parser_class, titles: list) -> dict:
+        # peak bytes allocated while parsing each title
+        peaks = []
+        already_tracing = tracemalloc.is_tracing()
+        if not already_tracing:
+            tracemalloc.start()
+        try:
+            for title in titles:
+                current, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                parser_class(title)
+                _, peak = tracemalloc.get_traced_memory()
+                peaks.append(max(0, peak - current))
+        finally:
+            if not already_tracing:
+                tracemalloc.stop()
+        return {
+            'alloc_mean_bytes': sum(peaks) / len(peaks) if peaks else 0,
+            'alloc_max_bytes': max(peaks) if peaks else 0,
+        }
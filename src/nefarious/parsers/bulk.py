@@ -0,0 +1,83 @@
+import json
+import multiprocessing
+from collections import deque
+from typing import Iterable, Iterator
+
+from nefarious.parsers.movie import MovieParser
+from nefarious.parsers.tv import TVParser
+
+MEDIA_TYPE_MOVIE = 'movie'
+MEDIA_TYPE_TV = 'tv'
+
+PARSER_CLASSES = {
+    MEDIA_TYPE_MOVIE: MovieParser,
+    MEDIA_TYPE_TV: TVParser,
+}
+
+# number of titles sent to a worker at a time
+BULK_CHUNK_SIZE = 500
+
+
+def parse_title(media_type: str, title: str) -> dict:
+    parser = PARSER_CLASSES[media_type](title)
+    return {
+        'title': title,
+        'match': parser.match.to_dict() if parser.match else None,
+    }
+
+
+def parse_chunk(media_type: str, titles: list) -> tuple:
+    # worker entry point which returns json lines (and how many matched) so only strings are sent back to the parent process
+    results = [parse_title(media_type, title) for title in titles]
+    return [json.dumps(result) for result in results], sum(1 for result in results if result['match'])
+
+
+def iter_chunks(titles: Iterable[str], size: int) -> Iterator[list]:
+    chunk = []
+    for title in titles:
+        title = title.rstrip('\r\n')
+        if not title.strip():
+            continue
+        chunk.append(title)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _init_worker():
+    # workers started with "spawn" (i.e macOS) need django configured for the parser settings
+    import django
+    django.setup()
+
+
+def bulk_parse(titles: Iterable[str], media_type: str, processes: int = None, chunk_size: int = BULK_CHUNK_SIZE) -> Iterator[tuple]:
+    """
+    Parses a stream of titles across a process pool and yields chunks of json lines (and how many matched) in the input order.
+
+    Only a few chunks per process are in flight at a time so arbitrarily large inputs are streamed
+    instead of being read into memory up front.
+    """
+    if media_type not in PARSER_CLASSES:
+        raise Exception('Unknown media type "{}"'.format(media_type))
+
+    chunks = iter_chunks(titles, chunk_size)
+
+    # parse in this process
+    if processes == 1:
+        for chunk in chunks:
+            yield parse_chunk(media_type, chunk)
+        return
+
+    processes = processes or multiprocessing.cpu_count()
+    max_pending = processes * 2
+    pending = deque()
+
+    with multiprocessing.Pool(processes, initializer=_init_worker) as pool:
+        for chunk in chunks:
+            pending.append(pool.apply_async(parse_chunk, (media_type, chunk)))
+            if len(pending) >= max_pending:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
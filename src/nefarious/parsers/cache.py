@@ -0,0 +1,64 @@
+import copy
+import threading
+from collections import OrderedDict
+
+# maximum number of parsed titles to hold onto per process
+PARSE_CACHE_MAX_SIZE = 10000
+
+
+class ParseCache:
+    """
+    Process-wide, thread-safe LRU cache of parse results keyed by the parser class and the raw title.
+
+    Indexers return the same release titles over and over again (every wanted media cycle and every episode of a show)
+    so this saves re-running the entire regex list on identical strings.
+    Cached matches are copied in and out since callers are free to mutate their parser's match.
+    """
+
+    def __init__(self, max_size: int = PARSE_CACHE_MAX_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, parser_class, title: str) -> tuple:
+        # returns a tuple of whether the title was found and its (copied) match
+        key = (parser_class, title)
+        with self._lock:
+            if key in self._results:
+                self.hits += 1
+                self._results.move_to_end(key)
+                match = self._results[key]
+            else:
+                self.misses += 1
+                return False, None
+        return True, copy.deepcopy(match)
+
+    def set(self, parser_class, title: str, match):
+        key = (parser_class, title)
+        match = copy.deepcopy(match)
+        with self._lock:
+            self._results[key] = match
+            self._results.move_to_end(key)
+            # evict the least recently used results
+            while len(self._results) > self.max_size:
+                self._results.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'size': len(self._results),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+parse_cache = ParseCache()
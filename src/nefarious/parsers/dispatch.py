@@ -0,0 +1,146 @@
+import threading
+import time
+from collections import Counter
+import regex
+
+# cheap features of a normalized (lower cased) title which some patterns can't match without
+FEATURE_LEADING_BRACKET = 'leading_bracket'  # i.e "[SubGroup] Title - 01"
+FEATURE_SEASON_TOKEN = 'season_token'  # i.e "S01" or "S2016"
+FEATURE_EPISODE_TOKEN = 'episode_token'  # i.e "E05" or "1x05"
+FEATURE_FOUR_DIGITS = 'four_digits'  # i.e years and air dates "2018.04.28"
+FEATURE_PART_WORD = 'part_word'  # i.e "Part One"
+
+FEATURES = [
+    FEATURE_LEADING_BRACKET,
+    FEATURE_SEASON_TOKEN,
+    FEATURE_EPISODE_TOKEN,
+    FEATURE_FOUR_DIGITS,
+    FEATURE_PART_WORD,
+]
+
+season_token_regex = regex.compile(r"s\d", regex.I)
+episode_token_regex = regex.compile(r"[ex]\d", regex.I)
+four_digits_regex = regex.compile(r"\d{4}")
+
+
+class PatternTimeout(Exception):
+    # a title exceeded its per-pattern or per-title time budget
+    def __init__(self, pattern_name: str, elapsed: float):
+        self.pattern_name = pattern_name
+        self.elapsed = elapsed
+        super().__init__('Pattern "{}" timed out after {:.3f}s'.format(pattern_name, elapsed))
+
+
+def title_features(title: str) -> set:
+    features = set()
+    if title.startswith('['):
+        features.add(FEATURE_LEADING_BRACKET)
+    if season_token_regex.search(title):
+        features.add(FEATURE_SEASON_TOKEN)
+    if episode_token_regex.search(title):
+        features.add(FEATURE_EPISODE_TOKEN)
+    if four_digits_regex.search(title):
+        features.add(FEATURE_FOUR_DIGITS)
+    if 'part' in title.lower():
+        features.add(FEATURE_PART_WORD)
+    return features
+
+
+class PatternDispatcher:
+    """
+    Runs a parser's ordered pattern list and stops at the first match.
+
+    Patterns can declare a title feature they require (see FEATURES) so they're skipped entirely when the title doesn't have it.
+    A required feature must be a necessary condition of the pattern so the first match is always the same as running every pattern in order.
+    Per-pattern hit counters are kept so the ordering can be reviewed against real traffic.
+
+    Searches can be given a time budget per pattern and per title which guards against catastrophic backtracking.
+    Exceeding either raises PatternTimeout so the caller can treat the title as a non-match.
+    """
+
+    def __init__(self, patterns: list, required_features: dict = None):
+        required_features = required_features or {}
+
+        # validate the required features reference actual patterns and features
+        pattern_names = [name for name, _ in patterns]
+        for name, feature in required_features.items():
+            if name not in pattern_names:
+                raise Exception('Required feature defined for unknown pattern "{}"'.format(name))
+            if feature not in FEATURES:
+                raise Exception('Unknown feature "{}" for pattern "{}"'.format(feature, name))
+
+        self.patterns = [(name, pattern, required_features.get(name)) for name, pattern in patterns]
+        self.hits = Counter()
+        self.misses = 0
+        self.searches = 0
+        self.skips = 0
+        self.timeouts = 0
+        self._lock = threading.Lock()
+
+    def first_match(self, title: str, pattern_timeout: float = None, title_timeout: float = None) -> tuple:
+        # returns a tuple of the matching pattern name and the match
+        features = title_features(title)
+        searches = 0
+        evaluated = len(self.patterns)
+        result = (None, None)
+        started = time.monotonic() if title_timeout else None
+
+        try:
+            for i, (name, pattern, feature) in enumerate(self.patterns):
+                # skip patterns that can't possibly match
+                if feature and feature not in features:
+                    continue
+                searches += 1
+                timeout = self._timeout(name, started, pattern_timeout, title_timeout)
+                try:
+                    match = pattern.search(title, timeout=timeout)
+                except TimeoutError:
+                    raise PatternTimeout(name, time.monotonic() - started if started else timeout)
+                if match:
+                    evaluated = i + 1
+                    result = (name, match)
+                    break
+        except PatternTimeout:
+            with self._lock:
+                self.searches += searches
+                self.timeouts += 1
+            raise
+
+        with self._lock:
+            self.searches += searches
+            self.skips += evaluated - searches
+            if result[1]:
+                self.hits[result[0]] += 1
+            else:
+                self.misses += 1
+
+        return result
+
+    @staticmethod
+    def _timeout(name: str, started: float, pattern_timeout: float, title_timeout: float):
+        # the time this pattern may take, which is the lesser of the per-pattern budget and what's left of the title's budget
+        if not title_timeout:
+            return pattern_timeout
+        elapsed = time.monotonic() - started
+        remaining = title_timeout - elapsed
+        if remaining <= 0:
+            raise PatternTimeout(name, elapsed)
+        return min(pattern_timeout, remaining) if pattern_timeout else remaining
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'hits': dict(self.hits),
+                'misses': self.misses,
+                'searches': self.searches,
+                'skips': self.skips,
+                'timeouts': self.timeouts,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits.clear()
+            self.misses = 0
+            self.searches = 0
+            self.skips = 0
+            self.timeouts = 0
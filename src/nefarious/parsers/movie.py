@@ -1,5 +1,6 @@
 import regex
 from nefarious.parsers.base import ParserBase
+from nefarious.parsers.dispatch import FEATURE_FOUR_DIGITS
 
 # regex parsing taken from:
 # https://github.com/Radarr/Radarr/blob/64e8fde0e1881cd8a61e34619c85e4334da291f8/src/NzbDrone.Core/Parser/Parser.cs
@@ -34,13 +35,21 @@ class MovieParser(ParserBase):
         ),
     ]
 
-    def _is_match(self, title, year: str = None) -> bool:
+    # title features each pattern can't match without so they can be skipped (see parsers.dispatch)
+    media_regex_features = {
+        'Special, Despecialized, etc. Edition Movies, e.g: Mission.Impossible.3.Special.Edition.2011': FEATURE_FOUR_DIGITS,
+        'Normal movie format, e.g: Mission.Impossible.3.2011': FEATURE_FOUR_DIGITS,
+        'That did not work? Maybe some tool uses [] for years. Who would do that?': FEATURE_FOUR_DIGITS,
+        'As a last resort for movies that have ( or [ in their title.': FEATURE_FOUR_DIGITS,
+    }
 
-        title_matches = self.match.get('title') == self.normalize_media_title(title)
+    def _is_normalized_match(self, titles: set, year: str = None) -> bool:
+
+        title_matches = self.match.title in titles
 
         # match year if the media and parser included it
-        if year and 'year' in self.match:
-            year_matches = year in self.match['year']
+        if year and self.match.years is not None:
+            year_matches = year in self.match.years
             return title_matches and year_matches
 
         return title_matches
@@ -0,0 +1,149 @@
+class ParseResult:
+    """
+    Compact result of parsing a release title.
+
+    Only the fields the app uses are kept (instead of every capture group of the matching pattern) and
+    __slots__ avoids a per-instance dict, which adds up when parsing thousands of search results.
+
+    It's also a mapping view for existing callers, i.e parser.match['season'], where a field set to None is an absent key.
+    This keeps the difference between a pattern without a group ("episode" not in match) and a group
+    that didn't capture anything (match["episode"] == []).
+    """
+
+    __slots__ = (
+        'title',  # str
+        'seasons',  # list of ints (strings before normalizing)
+        'episodes',  # list of ints (strings before normalizing)
+        'years',  # list of strings
+        'quality',  # quality name
+        'resolution',  # quality.Resolution
+        'hc',  # hardcoded subs
+        'hdr',  # hdr (high dynamic range)
+        'five_point_one',  # 5.1 surround sound
+        'match_name',  # name of the matching pattern
+    )
+
+    # mapping keys -> slots
+    KEYS = {
+        'title': 'title',
+        'season': 'seasons',
+        'episode': 'episodes',
+        'year': 'years',
+        'quality': 'quality',
+        'resolution': 'resolution',
+        'hc': 'hc',
+        'hdr': 'hdr',
+        'five_point_one': 'five_point_one',
+        'match_name': 'match_name',
+    }
+
+    # capture groups read from the matching pattern
+    CAPTURES = ('title', 'season', 'episode', 'year')
+
+    def __init__(self, title: str = None, seasons: list = None, episodes: list = None, years: list = None,
+                 quality: str = None, resolution: str = None, hc: bool = None, hdr: bool = None,
+                 five_point_one: bool = None, match_name: str = None):
+        self.title = title
+        self.seasons = seasons
+        self.episodes = episodes
+        self.years = years
+        self.quality = quality
+        self.resolution = resolution
+        self.hc = hc
+        self.hdr = hdr
+        self.five_point_one = five_point_one
+        self.match_name = match_name
+
+    @classmethod
+    def from_match(cls, match_name: str, match):
+        # only reads the captures this pattern actually defines, leaving the rest absent
+        groups = match.re.groupindex
+        captures = {name: match.captures(name) for name in cls.CAPTURES if name in groups}
+        title = captures.get('title')
+        return cls(
+            # the title is normalized by the parser
+            title=title[0] if title else ('' if title is not None else None),
+            seasons=captures.get('season'),
+            episodes=captures.get('episode'),
+            years=captures.get('year'),
+            match_name=match_name,
+        )
+
+    def copy(self):
+        return ParseResult(
+            title=self.title,
+            seasons=list(self.seasons) if self.seasons is not None else None,
+            episodes=list(self.episodes) if self.episodes is not None else None,
+            years=list(self.years) if self.years is not None else None,
+            quality=self.quality,
+            resolution=self.resolution,
+            hc=self.hc,
+            hdr=self.hdr,
+            five_point_one=self.five_point_one,
+            match_name=self.match_name,
+        )
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def to_dict(self) -> dict:
+        return dict(self.items())
+
+    #
+    # mapping view
+    #
+
+    def __getitem__(self, key):
+        value = getattr(self, self._slot(key))
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        setattr(self, self._slot(key), value)
+
+    def __contains__(self, key):
+        return key in self.KEYS and getattr(self, self.KEYS[key]) is not None
+
+    def get(self, key, default=None):
+        if key not in self.KEYS:
+            return default
+        value = getattr(self, self.KEYS[key])
+        return default if value is None else value
+
+    def update(self, other):
+        # like dict.update() where absent keys in the other result are left alone
+        for key, value in other.items():
+            self[key] = value
+
+    def keys(self):
+        return [key for key, slot in self.KEYS.items() if getattr(self, slot) is not None]
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __bool__(self):
+        # a result exists only when a pattern matched, even without any captures
+        return True
+
+    def __eq__(self, other):
+        if isinstance(other, (ParseResult, dict)):
+            return self.to_dict() == dict(other.items())
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+    def _slot(self, key: str) -> str:
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return self.KEYS[key]
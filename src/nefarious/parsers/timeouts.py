@@ -0,0 +1,57 @@
+import json
+import logging
+import threading
+from collections import OrderedDict
+
+# dedicated logger (see settings.LOGGING) so timed out titles can be collected and analyzed later
+logger_parser_timeouts = logging.getLogger('nefarious-parser-timeouts')
+
+# number of recently timed out titles remembered so each is only logged once
+PARSER_TIMEOUTS_MAX_SIZE = 1000
+
+
+class ParserTimeoutRecorder:
+    """
+    Records release titles which exceeded the parser's time budget.
+
+    Each (parser, title) is only logged once while it's remembered, so a hostile title that keeps showing up
+    in search results doesn't flood the log.
+    """
+
+    def __init__(self, max_size: int = PARSER_TIMEOUTS_MAX_SIZE):
+        self.max_size = max_size
+        self.count = 0
+        self._titles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, parser_class, title: str, pattern_name: str, elapsed: float) -> bool:
+        # returns whether it was logged, i.e the first time this title timed out
+        key = (parser_class.__name__, title)
+        record = {
+            'parser': parser_class.__name__,
+            'pattern': pattern_name,
+            'elapsed': round(elapsed, 4),
+            'title': title,
+        }
+        with self._lock:
+            self.count += 1
+            if key in self._titles:
+                self._titles.move_to_end(key)
+                return False
+            self._titles[key] = record
+            while len(self._titles) > self.max_size:
+                self._titles.popitem(last=False)
+        logger_parser_timeouts.warning(json.dumps(record))
+        return True
+
+    def recent(self) -> list:
+        with self._lock:
+            return list(self._titles.values())
+
+    def clear(self):
+        with self._lock:
+            self._titles.clear()
+            self.count = 0
+
+
+parser_timeouts = ParserTimeoutRecorder()
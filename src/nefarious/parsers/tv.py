@@ -1,5 +1,8 @@
 import regex
 from nefarious.parsers.base import ParserBase
+from nefarious.parsers.dispatch import (
+    FEATURE_LEADING_BRACKET, FEATURE_SEASON_TOKEN, FEATURE_EPISODE_TOKEN, FEATURE_FOUR_DIGITS, FEATURE_PART_WORD,
+)
 
 
 # regex parsing taken from:
@@ -235,6 +238,42 @@ class TVParser(ParserBase):
         ),
     ]
 
+    # title features each pattern can't match without so they can be skipped (see parsers.dispatch)
+    media_regex_features = {
+        'Multi-Part episodes without a title (S01E05.S01E06)': FEATURE_EPISODE_TOKEN,
+        'Episodes without a title, Single (S01E05, 1x05)': FEATURE_EPISODE_TOKEN,
+        'Anime - [SubGroup] Title Episode Absolute Episode Number ([SubGroup] Series Title Episode 01)': FEATURE_LEADING_BRACKET,
+        'Anime - [SubGroup] Title Absolute Episode Number + Season+Episode': FEATURE_LEADING_BRACKET,
+        'Anime - [SubGroup] Title Season+Episode + Absolute Episode Number': FEATURE_LEADING_BRACKET,
+        'Anime - [SubGroup] Title Season+Episode': FEATURE_LEADING_BRACKET,
+        'Anime - [SubGroup] Title with trailing number Absolute Episode Number': FEATURE_LEADING_BRACKET,
+        'Anime - [SubGroup] Title - Absolute Episode Number': FEATURE_LEADING_BRACKET,
+        'Anime - [SubGroup] Title Absolute Episode Number': FEATURE_LEADING_BRACKET,
+        'Multi-episode Repeated (S01E05 - S01E06, 1x05 - 1x06, etc)': FEATURE_EPISODE_TOKEN,
+        'Anime - Title Season EpisodeNumber + Absolute Episode Number [SubGroup]': FEATURE_EPISODE_TOKEN,
+        'Episodes with airdate AND season/episode number, capture season/epsiode only': FEATURE_FOUR_DIGITS,
+        'Episodes with airdate AND season/episode number': FEATURE_FOUR_DIGITS,
+        'Episodes with a title, Single episodes (S01E05, 1x05, etc) & Multi-episode (S01E05E06, S01E05-06, S01E05 E06, etc)': FEATURE_EPISODE_TOKEN,
+        'Episodes with a title, 4 digit season number, Single episodes (S2016E05, etc) & Multi-episode (S2016E05E06, S2016E05-06, S2016E05 E06, etc)': FEATURE_SEASON_TOKEN,
+        'Episodes with a title, 4 digit season number, Single episodes (2016x05, etc) & Multi-episode (2016x05x06, 2016x05-06, 2016x05 x06, etc)': FEATURE_EPISODE_TOKEN,
+        'Partial season pack': FEATURE_SEASON_TOKEN,
+        'Mini-Series with year in title, treated as season 1, episodes are labelled as Part01, Part 01, Part.1': FEATURE_FOUR_DIGITS,
+        'Mini-Series, treated as season 1, multi episodes are labelled as E1-E2': FEATURE_EPISODE_TOKEN,
+        'Mini-Series, treated as season 1, episodes are labelled as Part One/Two/Three/...Nine, Part.One, Part_One': FEATURE_PART_WORD,
+        'Multi-episode with episodes in square brackets (Series Title [S01E11E12] or Series Title [S01E11-12])': FEATURE_SEASON_TOKEN,
+        'Multi-episode release with no space between series title and season (S01E11E12)': FEATURE_SEASON_TOKEN,
+        'Multi-episode with single episode numbers (S6.E1-E2, S6.E1E2, S6E1E2, etc)': FEATURE_SEASON_TOKEN,
+        'Single episode season or episode S1E1 or S1-E1 or S1.Ep1': FEATURE_SEASON_TOKEN,
+        '3 digit season S010E05': FEATURE_SEASON_TOKEN,
+        'Separated season and episode numbers S01 - E01': FEATURE_SEASON_TOKEN,
+        'Anime - Title with season number - Absolute Episode Number (Title S01 - EP14)': FEATURE_SEASON_TOKEN,
+        '4 digit season only releases': FEATURE_FOUR_DIGITS,
+        '4 digit episode number - Episodes without a title, Single (S01E05, 1x05) AND Multi (S01E04E05, 1x04x05, etc)': FEATURE_FOUR_DIGITS,
+        '4 digit episode number - Episodes with a title, Single episodes (S01E05, 1x05, etc) & Multi-episode (S01E05E06, S01E05-06, S01E05 E06, etc)': FEATURE_FOUR_DIGITS,
+        'Episodes with airdate (2018.04.28)': FEATURE_FOUR_DIGITS,
+        'Episodes with airdate (04.28.2018)': FEATURE_FOUR_DIGITS,
+    }
+
     def normalize_season_episode(self, value: str):
         if value.isdigit():
             return int(value)
@@ -244,32 +283,30 @@ class TVParser(ParserBase):
     def parse(self):
         title = self.normalize_title(self.title_query)
 
-        matches = self.matches(title)
+        match = self.first_match(title)
 
-        if not matches:
+        if not match:
             return None
 
         # get the first match
-        self.match = matches[0]
+        self.match = match
 
         # single title
-        if 'title' in self.match and self.match['title']:
-            self.match['title'] = self.normalize_media_title(self.match['title'][0])
+        if self.match.title:
+            self.match.title = self.normalize_media_title(self.match.title)
         else:
-            self.match['title'] = ''
+            self.match.title = ''
 
         # parse multiple seasons
-        if 'season' in self.match:
-            for i, season in enumerate(self.match['season']):
-                self.match['season'][i] = self.normalize_season_episode(season)
+        if self.match.seasons is not None:
+            self.match.seasons = [self.normalize_season_episode(season) for season in self.match.seasons]
         # default to the first season
         else:
-            self.match['season'] = [1]
+            self.match.seasons = [1]
 
         # parse multiple episodes
-        if 'episode' in self.match:
-            for i, episode in enumerate(self.match['episode']):
-                self.match['episode'][i] = self.normalize_season_episode(episode)
+        if self.match.episodes is not None:
+            self.match.episodes = [self.normalize_season_episode(episode) for episode in self.match.episodes]
 
         self.parse_tags()
 
@@ -277,33 +314,33 @@ class TVParser(ParserBase):
 
     def is_full_season(self):
         # verify no episode is in match
-        return self.match and 'title' in self.match and all([
-            self.match.get('season'),
-            'episode' not in self.match,
+        return self.match and self.match.title is not None and all([
+            self.match.seasons,
+            self.match.episodes is None,
         ])
 
     def is_single_episode(self):
         # must have season and episode
-        return self.match and 'title' in self.match and all([
-            self.match.get('season'),
-            self.match.get('episode'),
+        return self.match and self.match.title is not None and all([
+            self.match.seasons,
+            self.match.episodes,
         ])
 
-    def _is_match(self, title, season_number, episode_number=None):
+    def _is_normalized_match(self, titles: set, season_number, episode_number=None):
         if episode_number is not None:
-            return self._is_episode_match_test(title, season_number, episode_number)
+            return self._is_episode_match_test(titles, season_number, episode_number)
         else:
-            return self._is_season_match_test(title, season_number)
+            return self._is_season_match_test(titles, season_number)
 
-    def _is_season_match_test(self, title, season_number) -> bool:
+    def _is_season_match_test(self, titles: set, season_number) -> bool:
         return self.is_full_season() and all([
-            season_number in self.match['season'],
-            self.match['title'] == self.normalize_media_title(title),
+            season_number in self.match.seasons,
+            self.match.title in titles,
         ])
 
-    def _is_episode_match_test(self, title, season_number, episode_number) -> bool:
+    def _is_episode_match_test(self, titles: set, season_number, episode_number) -> bool:
         return self.is_single_episode() and all([
-            self.match['title'] == self.normalize_media_title(title),
-            season_number in self.match.get('season'),
-            episode_number in self.match.get('episode'),
+            self.match.title in titles,
+            season_number in self.match.seasons,
+            episode_number in self.match.episodes,
         ])
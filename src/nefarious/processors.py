@@ -1,6 +1,7 @@
+import itertools
 import os
 import regex
-from typing import Union
+from typing import List, Optional, Tuple, Union, Type
 from django.apps import apps
 from django.conf import settings
 from django.core.cache import cache
@@ -8,146 +9,195 @@ from datetime import datetime
 from django.utils import dateparse, timezone
 from transmissionrpc import Torrent
 
-from nefarious.models import WatchMovie, NefariousSettings, TorrentBlacklist, WatchTVEpisode, WatchTVSeason, QualityProfile
+from nefarious.match_decisions import RejectedResults
+from nefarious.match_plan import MatchPlan
+from nefarious.match_pool import use_pool, match_in_pool
+from nefarious.models import (
+    WatchMovie, NefariousSettings, TorrentBlacklist, WatchTVEpisode, WatchTVSeason, QualityProfile,
+    MEDIA_TYPE_MOVIE, MEDIA_TYPE_TV_SEASON, MEDIA_TYPE_TV_EPISODE,
+)
 from nefarious.parsers.base import ParserBase
 from nefarious.parsers.movie import MovieParser
 from nefarious.parsers.tv import TVParser
-from nefarious.quality import Profile
-from nefarious.search import SearchTorrents, SEARCH_MEDIA_TYPE_MOVIE, SEARCH_MEDIA_TYPE_TV, SearchTorrentsCombined
-from nefarious.tmdb import get_tmdb_client
+from nefarious.search import SearchTorrents, SEARCH_MEDIA_TYPE_MOVIE, SEARCH_MEDIA_TYPE_TV, SearchTorrentsCombined, SearchResults
+from nefarious.search_tiers import record_tier_search, record_tier_win, TIER_COMBINED, TIER_EPISODE, TIER_SEASON, TIER_TITLE
+from nefarious.tmdb import get_tmdb_client, get_language_countries
 from nefarious.transmission import get_transmission_client
-from nefarious.utils import get_best_torrent_result, results_with_valid_urls, logger_background
+from nefarious.utils import results_with_valid_urls, logger_background
 
 
 CACHE_RESULTS = 60 * 60 * 24 * 7
 
+# most title variants (i.e alternative titles) searched for a single media
+MAX_TITLE_VARIANTS = 4
+
+# alternative titles are only matched against when they're at least this many words and characters (once normalized)
+# since short or generic ones (e.g. "AoT" or "Titans") would match unrelated releases
+MIN_ALTERNATIVE_MATCH_TITLE_WORDS = 2
+MIN_ALTERNATIVE_MATCH_TITLE_LENGTH = 8
+
+# include the alternative titles when fetching a tmdb movie or show
+TMDB_APPEND_TO_RESPONSE = 'alternative_titles'
+
 
 class WatchProcessorBase:
     watch_media: Union[WatchMovie, WatchTVEpisode, WatchTVSeason] = None
     nefarious_settings: NefariousSettings = None
-    _reprocess_without_possessive_apostrophes = False
     _possessive_apostrophes_regex = regex.compile(r"(?!\w)'s\b", regex.I)
 
     tmdb_media = None
     tmdb_client = None
     transmission_client = None
+    match_plan: MatchPlan = None
 
-    def __init__(self, watch_media_id: int):
+    def __init__(self, watch_media_id: int, transmission_client=None):
+        # the transmission client can be shared (i.e processing several episodes of the same show)
         self.nefarious_settings = NefariousSettings.get()
         self.tmdb_client = get_tmdb_client(self.nefarious_settings)
-        self.transmission_client = get_transmission_client(self.nefarious_settings)
+        self.transmission_client = transmission_client or get_transmission_client(self.nefarious_settings)
         self.watch_media = self._get_watch_media(watch_media_id)
         self.tmdb_media = self._get_tmdb_media()
 
     def fetch(self):
-        logger_background.info('Processing request to watch {}'.format(self._sanitize_title(str(self.watch_media))))
+        logger_background.info('Processing request to watch {}'.format(self.watch_media))
 
         # skip attempt if media hasn't been released yet
-        if self.watch_media.release_date and self.watch_media.release_date > datetime.now().date():
+        if not self.is_released():
             logger_background.warning('skipping search for "{}" since it has not been released yet ({})'.format(
                 self.watch_media, self.watch_media.release_date))
             return
 
-        valid_search_results = []
-        search = self._get_search_results()
-
-        if search.ok:
-
-            for result in search.results:
-                if self.is_match(result['Title'], result['Size']):
-                    valid_search_results.append(result)
-
-            if valid_search_results:
-
-                # check if the traced url exists in cache first
-                results_cached = []
-                results_to_trace = []
-                cache_key_template = "search_result: {GUID}"
-
-                # iterate through the search results and populate pre-cached urls
-                for valid_search_result in valid_search_results:
-                    cache_key = cache_key_template.format(GUID=valid_search_result['Guid'])
-                    if cache.has_key(cache_key):
-                        torrent_url = cache.get(cache_key)
-                        logger_background.info(f'Using cached torrent_url: {torrent_url}')
-                        # set the cached torrent url in the search result
-                        valid_search_result['torrent_url'] = torrent_url
-                        results_cached.append(valid_search_result)
-                    else:
-                        results_to_trace.append(valid_search_result)
-
-                # trace the "torrent url" (sometimes magnet) in each result to trace
-                traced_results = self._results_with_valid_urls(results_to_trace)
-
-                logger_background.info("============================")
-                logger_background.info(f"SEARCH_RESULTS_CACHED: {len(results_cached)}")
-                logger_background.info(f"SEARCH_RESULTS_TO_TRACE: {len(results_to_trace)}")
-                logger_background.info("============================")
+        # search the most specific queries first and only widen the search when they don't find anything acceptable.
+        # every query in a tier (one per title variant) is searched concurrently
+        for tier, queries in self._get_search_tiers():
+            logger_background.info('Searching tier "{}": {}'.format(tier, queries))
+            record_tier_search(self._get_watch_media_type(), tier)
+            search = SearchTorrentsCombined([SearchTorrents(self._get_media_type(), query, defer=True) for query in queries])
+            found = self._download_search_results(search, tier)
+            if found is not False:
+                return found
+
+        return self._not_found()
+
+    def is_released(self) -> bool:
+        # media without a release date is tried anyway
+        return not self.watch_media.release_date or self.watch_media.release_date <= datetime.now().date()
+
+    def process_search_results(self, search: Union[SearchTorrents, SearchTorrentsCombined, SearchResults], parsers: list = None,
+                               tier: str = TIER_COMBINED, record_attempt: bool = True):
+        # processes results which were searched elsewhere (i.e shared with other processors).
+        # "parsers" are the already parsed search results, and "record_attempt" is whether not finding anything counts as a search attempt
+        record_tier_search(self._get_watch_media_type(), tier)
+        found = self._download_search_results(search, tier, parsers)
+        if found is not False or not record_attempt:
+            return found
+        return self._not_found()
+
+    def _download_search_results(self, search: Union[SearchTorrents, SearchTorrentsCombined, SearchResults], tier: str, parsers: list = None):
+        # returns True when a torrent was added, False when there wasn't an acceptable result, and None when the media was deleted
+
+        if not search.ok:
+            logger_background.info('Search error: {}'.format(search.error_content))
+            return False
 
-                # cache traced results so we don't have to trace it again
-                for traced_result in traced_results:
-                    logger_background.info(f'Caching GUID: {traced_result["Guid"]}, URL: {traced_result["torrent_url"]}')
-                    cache.set(cache_key_template.format(GUID=traced_result['Guid']), traced_result['torrent_url'], timeout=CACHE_RESULTS)
+        # compile everything needed to match a result once for the whole result set
+        self.match_plan = self._get_match_plan()
 
-                # combine traced results and cached results
-                valid_search_results = traced_results + results_cached
+        # candidates are matched a few at a time from the most seeded and traced together,
+        # stopping as soon as one is added so usually only the first few are ever traced
+        candidates = self._iter_valid_search_results(search.results, parsers)
+        evaluated = 0
+        try:
+            while True:
+                batch = list(itertools.islice(candidates, max(settings.TORRENT_TRACE_CANDIDATES, 1)))
+                if not batch:
+                    break
+                evaluated += len(batch)
 
-                while valid_search_results:
+                # trace the "torrent url" (sometimes magnet) of each candidate unless it's already cached
+                for result in self._with_torrent_urls(batch):
 
                     # quit searching if media no longer exists (user stopped watching it before it found a match)
                     model = apps.get_model('nefarious', self.watch_media._meta.object_name)
                     if not model.objects.filter(id=self.watch_media.id).exists():
                         logger_background.error('Stopped searching for torrents since it was deleted: {}'.format(self.watch_media))
-                        return
+                        return None
 
-                    logger_background.info('Valid Search Results: {}'.format(len(valid_search_results)))
+                    if self._add_torrent(result, tier):
+                        return True
+        finally:
+            # also remembers the rejections when stopping early
+            candidates.close()
 
-                    # find the torrent result with the highest weight (e.g. seeds)
-                    best_result = self._get_best_torrent_result(valid_search_results)
+        if not evaluated:
+            logger_background.info('No valid search results for {}'.format(self.watch_media))
+        return False
+
+    def _with_torrent_urls(self, results: list) -> list:
+        # returns the results (in order) with their torrent urls, either cached or traced concurrently
+        cache_key_template = "search_result: {GUID}"
+        cached = cache.get_many([cache_key_template.format(GUID=result.guid) for result in results])
+
+        results_to_trace = []
+        for result in results:
+            torrent_url = cached.get(cache_key_template.format(GUID=result.guid))
+            if torrent_url:
+                logger_background.info(f'Using cached torrent_url: {torrent_url}')
+                result.torrent_url = torrent_url
+            else:
+                results_to_trace.append(result)
+
+        traced_results = self._results_with_valid_urls(results_to_trace) if results_to_trace else []
+
+        # cache traced results so we don't have to trace them again
+        for traced_result in traced_results:
+            logger_background.info(f'Caching GUID: {traced_result.guid}, URL: {traced_result.torrent_url}')
+        cache.set_many(
+            {cache_key_template.format(GUID=result.guid): result.torrent_url for result in traced_results}, timeout=CACHE_RESULTS)
+
+        # results which couldn't be traced are left out
+        untraced = {id(result) for result in results_to_trace} - {id(result) for result in traced_results}
+        return [result for result in results if id(result) not in untraced]
+
+    def _add_torrent(self, result, tier: str) -> bool:
+        # adds the result's torrent and returns whether it was added, i.e not blacklisted
+        transmission_client = get_transmission_client(self.nefarious_settings)
+        transmission_session = transmission_client.session_stats()
+
+        # add to transmission
+        torrent = transmission_client.add_torrent(
+            result.torrent_url,
+            paused=True,  # start paused so we can verify if the torrent has been blacklisted
+            download_dir=self._get_download_dir(transmission_session),
+        )
 
-                    transmission_client = get_transmission_client(self.nefarious_settings)
-                    transmission_session = transmission_client.session_stats()
+        # verify it's not blacklisted
+        if TorrentBlacklist.objects.filter(hash=torrent.hashString).exists():
+            # remove the blacklisted/paused torrent so the next best result is tried
+            logger_background.info('BLACKLISTED: {} ({}) - trying next best result'.format(result.title, torrent.hashString))
+            transmission_client.remove_torrent([torrent.id])
+            return False
 
-                    # add to transmission
-                    torrent = transmission_client.add_torrent(
-                        best_result['torrent_url'],
-                        paused=True,  # start paused so we can verify if the torrent has been blacklisted
-                        download_dir=self._get_download_dir(transmission_session),
-                    )
+        logger_background.info('Adding torrent for {}'.format(self.watch_media))
+        logger_background.info('Added torrent {} with {} seeders'.format(result.title, result.seeders))
+        logger_background.info('Starting torrent id: {} and hash {}'.format(torrent.id, torrent.hashString))
 
-                    # verify it's not blacklisted and save & start this torrent
-                    if not TorrentBlacklist.objects.filter(hash=torrent.hashString).exists():
-                        logger_background.info('Adding torrent for {}'.format(self.watch_media))
-                        logger_background.info('Added torrent {} with {} seeders'.format(best_result['Title'], best_result['Seeders']))
-                        logger_background.info('Starting torrent id: {} and hash {}'.format(torrent.id, torrent.hashString))
+        # save torrent details on our watch instance
+        self._save_torrent_details(torrent)
 
-                        # save torrent details on our watch instance
-                        self._save_torrent_details(torrent)
+        # start the torrent
+        if not settings.DEBUG:
+            torrent.start()
 
-                        # start the torrent
-                        if not settings.DEBUG:
-                            torrent.start()
+        # set attempt date
+        self._set_last_attempt_date()
 
-                        # set attempt date
-                        self._set_last_attempt_date()
+        # record which query tier found it
+        record_tier_win(self._get_watch_media_type(), tier)
 
-                        return True
-                    else:
-                        # remove the blacklisted/paused torrent and continue to the next result
-                        logger_background.info('BLACKLISTED: {} ({}) - trying next best result'.format(best_result['Title'], torrent.hashString))
-                        transmission_client.remove_torrent([torrent.id])
-                        valid_search_results.remove(best_result)
-                        continue
-            else:
-                logger_background.info('No valid search results for {}'.format(self._sanitize_title(str(self.watch_media))))
-                # try again without possessive apostrophes (e.g. The Handmaids Tale vs The Handmaid's Tale)
-                if not self._reprocess_without_possessive_apostrophes and self._possessive_apostrophes_regex.search(str(self.watch_media)):
-                    self._reprocess_without_possessive_apostrophes = True
-                    logger_background.warning('Retrying without possessive apostrophes: "{}"'.format(self._sanitize_title(str(self.watch_media))))
-                    return self.fetch()
-        else:
-            logger_background.info('Search error: {}'.format(search.error_content))
+        return True
 
+    def _not_found(self):
         logger_background.info('Unable to find any results for media {}'.format(self.watch_media))
 
         # set attempt date
@@ -155,63 +205,137 @@ class WatchProcessorBase:
 
         return False
 
-    def is_match(self, title: str, size_bytes: int) -> bool:
-        parser = self._get_parser(title)
-        quality_profile = self._get_quality_profile()
-        profile = Profile.get_from_name(quality_profile.quality)
-        size_gb = size_bytes / (1024**3)
-        mismatch = None
-
-        # title
-        if not self._is_match(parser):
-            mismatch = 'title'
-        # quality
-        elif not parser.is_quality_match(profile):
-            mismatch = 'quality'
-        # size
-        elif quality_profile.min_size_gb is not None and size_gb < quality_profile.min_size_gb:
-            mismatch = f'size min: {size_gb} < {quality_profile.min_size_gb}'
-        elif quality_profile.max_size_gb is not None and size_gb > quality_profile.max_size_gb:
-            mismatch = f'size max: {size_gb} > {quality_profile.max_size_gb}'
-        # subs
-        elif not parser.is_hardcoded_subs_match(self.nefarious_settings.allow_hardcoded_subs):
-            mismatch = f'hardcoded subs'
-        # hdr
-        elif not parser.is_hdr_match(quality_profile.require_hdr):
-            mismatch = 'hdr'
-        # 5.1 surround sound
-        elif not parser.is_five_point_one_match(quality_profile.require_five_point_one):
-            mismatch = 'five_point_one'
-        # keyword filters
-        elif not parser.is_keyword_search_filter_match(
-                self.nefarious_settings.keyword_search_filters.keys() if self.nefarious_settings.keyword_search_filters else []
-        ):
-            mismatch = f'keyword search filters'
+    def is_match(self, parser: ParserBase, size_bytes: int) -> bool:
+        return self.mismatch(parser, size_bytes) is None
+
+    def mismatch(self, parser: ParserBase, size_bytes: int) -> Optional[str]:
+        # returns the reason the result isn't a match, otherwise None
+        if self.match_plan is None:
+            self.match_plan = self._get_match_plan()
+
+        mismatch = self.match_plan.mismatch(parser, size_bytes)
 
         # failed
         if mismatch:
-            logger_background.info('[SEARCH: {}][NOT MATCHED: {}][PROFILE: {}][REASON: {}]'.format(self.watch_media, title, quality_profile, mismatch))
-            return False
-
-        # success
-        return True
+            logger_background.info('[SEARCH: {}][NOT MATCHED: {}][PROFILE: {}][REASON: {}]'.format(
+                self.watch_media, parser.title_query, self.match_plan.profile_name, mismatch))
+
+        return mismatch
+
+    def get_rejected_results(self) -> RejectedResults:
+        if self.match_plan is None:
+            self.match_plan = self._get_match_plan()
+        return RejectedResults(self._get_watch_media_type(), self.watch_media.id, self.match_plan)
+
+    def _get_valid_search_results(self, results: list, parsers: list = None) -> list:
+        # every matching result, most seeded first
+        return list(self._iter_valid_search_results(results, parsers))
+
+    def _iter_valid_search_results(self, results: list, parsers: list = None):
+        """
+        Yields the matching results from the most seeded, parsing and matching each one only when it's reached.
+        "parsers" are the already parsed results, otherwise large result sets are matched up front across the process pool.
+        """
+        rejected_results = self.get_rejected_results()
+
+        # skip results which were already rejected for this media by an earlier search
+        rejected = rejected_results.get(results)
+        if rejected:
+            logger_background.info('Skipping {} search results previously rejected for {}'.format(len(rejected), self.watch_media))
+        candidates = [
+            (result, parsers[i] if parsers is not None else None)
+            for i, result in enumerate(results) if result.guid not in rejected
+        ]
+
+        # most seeded first (stable so equally seeded results keep their order)
+        candidates.sort(key=lambda candidate: -(candidate[0].seeders or 0))
+
+        # parse and match large result sets across the process pool
+        mismatches = None
+        if parsers is None and use_pool(len(candidates)):
+            mismatches = match_in_pool(
+                self.match_plan, [result.title for result, _ in candidates], [result.size for result, _ in candidates])
+            logger_background.info('Matched {} of {} search results in the process pool for {}'.format(
+                mismatches.count(None), len(candidates), self.watch_media))
+
+        rejections = {}
+        try:
+            for i, (result, parser) in enumerate(candidates):
+                if mismatches is not None:
+                    mismatch = mismatches[i]
+                else:
+                    mismatch = self.mismatch(parser or self._get_parser(result.title), result.size)
+                if mismatch:
+                    rejections[result.guid] = mismatch
+                    continue
+                yield result
+        finally:
+            # remember the rejections for the next search (including when the caller stops early)
+            rejected_results.set(rejections)
+
+    def _get_match_plan(self) -> MatchPlan:
+        return MatchPlan.compile(
+            parser_class=self._get_parser_class(),
+            titles=self.get_match_titles(),
+            quality_profile=self._get_quality_profile(),
+            nefarious_settings=self.nefarious_settings,
+            **self._get_match_media(),
+        )
 
     def _set_last_attempt_date(self):
         self.watch_media.last_attempt_date = timezone.utc.localize(datetime.utcnow())
         self.watch_media.save()
 
-    def _sanitize_title(self, title: str):
-        # conditionally remove possessive apostrophes
-        if self._reprocess_without_possessive_apostrophes:
-            return self._possessive_apostrophes_regex.sub('s', title)
-        return title
+    def get_title_variants(self) -> List[str]:
+        """
+        Titles the media is searched by: the title, the title without possessive apostrophes
+        (e.g. The Handmaids Tale vs The Handmaid's Tale), the original title and then tmdb's alternative titles.
+        Results are matched against most of them (see get_match_titles).
+        """
+        title = self._get_match_title()
+        candidates = [title, self._possessive_apostrophes_regex.sub('s', title)] + self._get_alternative_titles()
+
+        variants = []
+        seen = set()
+        for candidate in candidates:
+            key = ' '.join(candidate.lower().split()) if candidate else None
+            if key and key not in seen:
+                seen.add(key)
+                variants.append(candidate)
+        return variants[:MAX_TITLE_VARIANTS]
+
+    def get_match_titles(self) -> List[str]:
+        """
+        Titles the results are matched against: the title variants, except for alternative titles which aren't
+        distinctive enough (see MIN_ALTERNATIVE_MATCH_TITLE_LENGTH). Those are still searched.
+        """
+        title = self._get_match_title()
+        original_title = self._get_tmdb_title_media().get('original_{}'.format(self._get_tmdb_title_key()))
+        known_titles = {title, self._possessive_apostrophes_regex.sub('s', title), original_title}
+        parser = self._get_parser_class().__new__(self._get_parser_class())
+        titles = []
+        for variant in self.get_title_variants():
+            normalized = parser.normalize_media_title(variant)
+            if variant in known_titles or (
+                    len(normalized.split()) >= MIN_ALTERNATIVE_MATCH_TITLE_WORDS and len(normalized) >= MIN_ALTERNATIVE_MATCH_TITLE_LENGTH):
+                titles.append(variant)
+        return titles
+
+    def _get_alternative_titles(self) -> List[str]:
+        # original title and then alternative titles from the chosen language's country first
+        media = self._get_tmdb_title_media()
+        alternative_titles = media.get('alternative_titles') or {}
+        # movies and shows name their lists differently
+        alternative_titles = alternative_titles.get('titles') or alternative_titles.get('results') or []
+        countries = get_language_countries(self.nefarious_settings.language)
+        # stable so the language's countries are in their order, then everything else as tmdb returned them
+        alternative_titles = sorted(
+            alternative_titles, key=lambda t: countries.index(t.get('iso_3166_1')) if t.get('iso_3166_1') in countries else len(countries))
+        return [media.get('original_{}'.format(self._get_tmdb_title_key()))] + [t.get('title') for t in alternative_titles]
 
     def _results_with_valid_urls(self, results: list):
         return results_with_valid_urls(results, self.nefarious_settings)
 
-    def _get_best_torrent_result(self, results: list):
-        return get_best_torrent_result(results)
-
     def _get_quality_profile(self) -> QualityProfile:
         raise NotImplementedError
 
@@ -225,6 +349,9 @@ class WatchProcessorBase:
         raise NotImplementedError
 
     def _get_parser(self, title: str) -> ParserBase:
+        return self._get_parser_class().cached(title)
+
+    def _get_parser_class(self) -> Type[ParserBase]:
         raise NotImplementedError
 
     def _get_tmdb_title_key(self):
@@ -238,10 +365,23 @@ class WatchProcessorBase:
         self.watch_media.transmission_torrent_hash = torrent.hashString
         self.watch_media.save()
 
-    def _is_match(self, parser) -> bool:
+    def _get_match_title(self) -> str:
+        # title the results are matched against
+        return self._get_tmdb_title_media()[self._get_tmdb_title_key()]
+
+    def _get_tmdb_title_media(self) -> dict:
+        # tmdb media with the title (and alternative titles)
+        return self.tmdb_media
+
+    def _get_match_media(self) -> dict:
+        # year, season and/or episode the results are matched against
+        raise NotImplementedError
+
+    def _get_watch_media_type(self) -> str:
         raise NotImplementedError
 
-    def _get_search_results(self):
+    def _get_search_tiers(self) -> List[Tuple[str, List[str]]]:
+        # (tier, queries) from the most specific queries to the broadest
         raise NotImplementedError
 
 
@@ -251,15 +391,15 @@ class WatchMovieProcessor(WatchProcessorBase):
         # try custom quality profile then fallback to global setting
         return self.watch_media.quality_profile or self.nefarious_settings.quality_profile_movies
 
-    def _get_parser(self, title: str) -> MovieParser:
-        return MovieParser(title)
+    def _get_parser_class(self) -> Type[MovieParser]:
+        return MovieParser
 
-    def _is_match(self, parser):
-        release_year = dateparse.parse_date(self.tmdb_media['release_date']).strftime('%Y')
-        return parser.is_match(
-            title=self.tmdb_media[self._get_tmdb_title_key()],
-            year=release_year,
-        )
+    def _get_match_media(self) -> dict:
+        # unreleased or obscure movies can be missing their release date so the year isn't matched
+        release_date = dateparse.parse_date(self.tmdb_media.get('release_date') or '')
+        if not release_date:
+            return {}
+        return dict(year=release_date.strftime('%Y'))
 
     def _get_media_type(self) -> str:
         return SEARCH_MEDIA_TYPE_MOVIE
@@ -275,6 +415,7 @@ class WatchMovieProcessor(WatchProcessorBase):
         movie_result = self.tmdb_client.Movies(self.watch_media.tmdb_movie_id)
         params = {
             'language': self.nefarious_settings.language,
+            'append_to_response': TMDB_APPEND_TO_RESPONSE,
         }
         movie = movie_result.info(**params)
         return movie
@@ -283,9 +424,13 @@ class WatchMovieProcessor(WatchProcessorBase):
         watch_movie = WatchMovie.objects.get(pk=watch_media_id)
         return watch_movie
 
-    def _get_search_results(self):
-        media = self.tmdb_media
-        return SearchTorrents(SEARCH_MEDIA_TYPE_MOVIE, self._sanitize_title(media[self._get_tmdb_title_key()]))
+    def _get_watch_media_type(self) -> str:
+        return MEDIA_TYPE_MOVIE
+
+    def _get_search_tiers(self) -> List[Tuple[str, List[str]]]:
+        return [
+            (TIER_TITLE, self.get_title_variants()),
+        ]
 
 
 class WatchTVProcessorBase(WatchProcessorBase):
@@ -295,8 +440,8 @@ class WatchTVProcessorBase(WatchProcessorBase):
         watch_media = self.watch_media  # type: WatchTVEpisode|WatchTVSeason
         return watch_media.watch_tv_show.quality_profile or self.nefarious_settings.quality_profile_tv
 
-    def _get_parser(self, title: str) -> TVParser:
-        return TVParser(title)
+    def _get_parser_class(self) -> Type[TVParser]:
+        return TVParser
 
     def _get_media_type(self) -> str:
         return SEARCH_MEDIA_TYPE_TV
@@ -315,52 +460,128 @@ class WatchTVEpisodeProcessor(WatchTVProcessorBase):
     """
     show = None
 
+    def __init__(self, watch_media_id: int, show: dict = None, transmission_client=None):
+        # the tmdb show can be supplied when it's already been fetched (i.e processing several episodes of the same show)
+        self.show = show
+        super().__init__(watch_media_id, transmission_client=transmission_client)
+
     def _get_watch_media(self, watch_media_id: int):
         watch_episode = WatchTVEpisode.objects.get(pk=watch_media_id)
         return watch_episode
 
-    def _is_match(self, parser):
+    def _get_tmdb_title_media(self) -> dict:
         # supply show's name vs episode name for title matching
-        return parser.is_match(
-            title=self.show[self._get_tmdb_title_key()],
+        return self.show
+
+    def _get_match_media(self) -> dict:
+        return dict(
             season_number=self.tmdb_media['season_number'],
             episode_number=self.tmdb_media['episode_number'],
         )
 
     def _get_tmdb_media(self):
-        # store show on instance
-        show_result = self.tmdb_client.TV(self.watch_media.watch_tv_show.tmdb_show_id)
         params = {
             'language': self.nefarious_settings.language,
         }
-        self.show = show_result.info(**params)
+
+        # store show on instance
+        if self.show is None:
+            show_result = self.tmdb_client.TV(self.watch_media.watch_tv_show.tmdb_show_id)
+            self.show = show_result.info(append_to_response=TMDB_APPEND_TO_RESPONSE, **params)
 
         episode_result = self.tmdb_client.TV_Episodes(self.watch_media.watch_tv_show.tmdb_show_id, self.watch_media.season_number, self.watch_media.episode_number)
         episode = episode_result.info(**params)
         return episode
 
-    def _get_search_results(self):
-        # query the show name AND the season/episode name separately
-        # i.e. search for "Atlanta" and "Atlanta s01e05" individually for best results
-        watch_episode = self.watch_media  # type: WatchTVEpisode
-        show_result = self.tmdb_client.TV(watch_episode.watch_tv_show.tmdb_show_id)
-        params = {
-            'language': self.nefarious_settings.language,
-        }
-        show = show_result.info(**params)
+    def get_episode_query(self, title: str) -> str:
+        # i.e. "Atlanta s01e05"
+        return '{} s{:02d}e{:02d}'.format(
+            title,
+            self.tmdb_media['season_number'],
+            self.tmdb_media['episode_number'],
+        )
+
+    def _get_watch_media_type(self) -> str:
+        return MEDIA_TYPE_TV_EPISODE
+
+    def _get_search_tiers(self) -> List[Tuple[str, List[str]]]:
+        # i.e. search for "Atlanta s01e05" and only then "Atlanta"
+        titles = self.get_title_variants()
+        return [
+            (TIER_EPISODE, [self.get_episode_query(title) for title in titles]),
+            (TIER_TITLE, titles),
+        ]
+
+
+class WatchTVShowEpisodesProcessor:
+    """
+    Several episodes of the same show.
+
+    The show is looked up and searched once (along with a targeted search per episode) and the combined results
+    are parsed once and then matched against each episode.
+    An episode which can't be looked up is left out (and searched again next time) rather than failing the rest.
+    """
+    show = None
+    processors: List[WatchTVEpisodeProcessor] = None
+
+    def __init__(self, watch_episode_ids: list):
+        self.nefarious_settings = NefariousSettings.get()
+        self.tmdb_client = get_tmdb_client(self.nefarious_settings)
+        self.processors = []
+
+        watch_episodes = WatchTVEpisode.objects.filter(id__in=watch_episode_ids).order_by('season_number', 'episode_number')
+        if not watch_episodes:
+            return
 
-        media_title = self._sanitize_title(show['name'])
+        show_ids = set(watch_episode.watch_tv_show_id for watch_episode in watch_episodes)
+        if len(show_ids) > 1:
+            raise Exception('Episodes must belong to the same show: {}'.format(watch_episode_ids))
+
+        show_result = self.tmdb_client.TV(watch_episodes[0].watch_tv_show.tmdb_show_id)
+        self.show = show_result.info(language=self.nefarious_settings.language, append_to_response=TMDB_APPEND_TO_RESPONSE)
+        transmission_client = get_transmission_client(self.nefarious_settings)
+        for watch_episode in watch_episodes:
+            try:
+                self.processors.append(WatchTVEpisodeProcessor(watch_episode.id, show=self.show, transmission_client=transmission_client))
+            except Exception as e:
+                logger_background.exception(e)
+                logger_background.error('Skipping {} since it could not be looked up'.format(watch_episode))
+
+    def fetch(self) -> dict:
+        # returns whether each episode was found, keyed by the episode id
+        processors = []
+        for processor in self.processors:
+            # skip attempt if media hasn't been released yet
+            if processor.is_released():
+                processors.append(processor)
+            else:
+                logger_background.warning('skipping search for "{}" since it has not been released yet ({})'.format(
+                    processor.watch_media, processor.watch_media.release_date))
+
+        if not processors:
+            return {}
 
-        return SearchTorrentsCombined([
-            # search the show name
-            SearchTorrents(SEARCH_MEDIA_TYPE_TV, media_title),
-            # search the show name and the season/episode combination
-            SearchTorrents(SEARCH_MEDIA_TYPE_TV, '{} s{:02d}e{:02d}'.format(
-                media_title,
-                self.tmdb_media['season_number'],
-                self.tmdb_media['episode_number'],
-            )),
-        ])
+        logger_background.info('Processing request to watch {} episodes of {}'.format(len(processors), self.show['name']))
+
+        # search the show's titles once plus each episode, all concurrently
+        titles = processors[0].get_title_variants()
+        search = SearchTorrentsCombined(
+            [SearchTorrents(SEARCH_MEDIA_TYPE_TV, title, defer=True) for title in titles] +
+            [SearchTorrents(SEARCH_MEDIA_TYPE_TV, processor.get_episode_query(titles[0]), defer=True) for processor in processors]
+        )
+
+        # parse the results once for every episode, except those every episode has already rejected
+        parsers = None
+        if search.ok:
+            rejected = set.intersection(*[set(processor.get_rejected_results().get(search.results)) for processor in processors])
+            parsed = iter(TVParser.parse_many([result.title for result in search.results if result.guid not in rejected]))
+            parsers = [None if result.guid in rejected else next(parsed) for result in search.results]
+
+        results = {}
+        for processor in processors:
+            logger_background.info('Processing request to watch {}'.format(processor.watch_media))
+            results[processor.watch_media.id] = processor.process_search_results(search, parsers)
+        return results
 
 
 class WatchTVSeasonProcessor(WatchTVProcessorBase):
@@ -372,20 +593,25 @@ class WatchTVSeasonProcessor(WatchTVProcessorBase):
         watch_season = WatchTVSeason.objects.get(pk=watch_media_id)
         return watch_season
 
-    def _is_match(self, parser):
-        return parser.is_match(
-            title=self.tmdb_media[self._get_tmdb_title_key()],
-            season_number=self.watch_media.season_number,
-        )
+    def _get_match_media(self) -> dict:
+        return dict(season_number=self.watch_media.season_number)
 
     def _get_tmdb_media(self):
         show_result = self.tmdb_client.TV(self.watch_media.watch_tv_show.tmdb_show_id)
         params = {
             'language': self.nefarious_settings.language,
+            'append_to_response': TMDB_APPEND_TO_RESPONSE,
         }
         show = show_result.info(**params)
         return show
 
-    def _get_search_results(self):
-        media = self.tmdb_media
-        return SearchTorrents(SEARCH_MEDIA_TYPE_TV, self._sanitize_title(media[self._get_tmdb_title_key()]))
+    def _get_watch_media_type(self) -> str:
+        return MEDIA_TYPE_TV_SEASON
+
+    def _get_search_tiers(self) -> List[Tuple[str, List[str]]]:
+        # i.e. search for "Atlanta s01" and only then "Atlanta"
+        titles = self.get_title_variants()
+        return [
+            (TIER_SEASON, ['{} s{:02d}'.format(title, self.watch_media.season_number) for title in titles]),
+            (TIER_TITLE, titles),
+        ]
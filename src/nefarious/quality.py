@@ -11,11 +11,13 @@ class Quality:
     weight: int
     name: str
     resolution: int
+    mask: int  # single bit (by weight) used in profile bitsets
 
     def __init__(self, weight, name, resolution):
         self.weight = weight
         self.name = name
         self.resolution = resolution
+        self.mask = 1 << weight
 
     def __str__(self):
         return self.name
@@ -31,19 +33,23 @@ class Quality:
 
     @staticmethod
     def get_from_name(quality_name: str):
-        for quality in QUALITIES:
-            if quality == quality_name:
-                return quality
-        raise Exception('Quality {} does not exist'.format(quality_name))
+        quality = QUALITIES_BY_NAME.get(quality_name.lower())
+        if quality is None:
+            raise Exception('Quality {} does not exist'.format(quality_name))
+        return quality
 
 
 class Profile:
     name: str
     qualities: list
+    mask: int  # bitset of the profile's qualities
 
     def __init__(self, name, qualities):
         self.name = name
         self.qualities = qualities
+        self.mask = 0
+        for quality in qualities:
+            self.mask |= quality.mask
 
     def __str__(self):
         return self.name
@@ -57,12 +63,17 @@ class Profile:
     def __repr__(self):
         return '<Profile: {}>'.format(self.name)
 
+    def allows(self, quality_name: str) -> bool:
+        # whether the quality (by name) is part of this profile using a single bit test
+        quality = QUALITIES_BY_NAME.get(quality_name.lower()) if quality_name else None
+        return quality is not None and bool(self.mask & quality.mask)
+
     @staticmethod
     def get_from_name(profile_name: str):
-        for profile in PROFILES:
-            if profile == profile_name:
-                return profile
-        raise Exception('Profile {} does not exist'.format(profile_name))
+        profile = PROFILES_BY_NAME.get(profile_name.lower())
+        if profile is None:
+            raise Exception('Profile {} does not exist'.format(profile_name))
+        return profile
 
 
 UNKNOWN = Quality(0, "Unknown", 0)
@@ -123,6 +134,9 @@ QUALITIES = [
 
 QUALITY_NAMES = [q.name for q in QUALITIES]
 
+# lookup by lower cased name
+QUALITIES_BY_NAME = {q.name.lower(): q for q in QUALITIES}
+
 
 PROFILE_ANY = Profile('any', [
     UNKNOWN,
@@ -194,6 +208,9 @@ PROFILES = [
 
 PROFILE_NAMES = [p.name for p in PROFILES]
 
+# lookup by lower cased name
+PROFILES_BY_NAME = {p.name.lower(): p for p in PROFILES}
+
 EXTENSIONS = {
     # Unknown
     ".webm": UNKNOWN,
@@ -253,10 +270,7 @@ EXTENSIONS = {
 
 
 def quality_from_extension(extension):
-    for ext, quality in EXTENSIONS.items():
-        if ext == extension:
-            return quality
-    return UNKNOWN
+    return EXTENSIONS.get(extension.lower() if extension else extension, UNKNOWN)
 
 
 def video_extensions():
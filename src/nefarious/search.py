@@ -1,38 +1,277 @@
-import requests
-from typing import List
-from nefarious.jackett import get_jackett_search_url
+import base64
+import binascii
+import copy
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, as_completed, TimeoutError as FuturesTimeoutError
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from django.conf import settings
+from django.core.cache import cache
+from nefarious import http_client
+from nefarious.indexers import get_indexers, search_indexer, record_statuses, open_circuits
+from nefarious.jackett import get_jackett_search_url, iter_results
 from nefarious.models import NefariousSettings
+from nefarious.search_result import SearchResult
 from nefarious.utils import logger_background
 
 SEARCH_MEDIA_TYPE_TV = 'tv'
 SEARCH_MEDIA_TYPE_MOVIE = 'movie'
 
+# seconds to wait on a single jackett search
+SEARCH_TIMEOUT = 90
+
+# bump when the cached search entry format changes
+SEARCH_CACHE_VERSION = 2
+
+# link query parameters which differ between copies of the same result
+LINK_IGNORED_PARAMS = {'jackett_apikey', 'apikey', 'file'}
+
+
+def _info_hash(result: SearchResult) -> Optional[str]:
+    # hex info hash from the result or its magnet uri (which may be base32 encoded)
+    info_hash = result.info_hash
+    if not info_hash and result.magnet_uri:
+        for key, value in parse_qsl(urlsplit(result.magnet_uri).query):
+            if key == 'xt' and value.lower().startswith('urn:btih:'):
+                info_hash = value[len('urn:btih:'):]
+                break
+    if not info_hash:
+        return None
+    if len(info_hash) == 32:
+        try:
+            info_hash = binascii.hexlify(base64.b32decode(info_hash.upper())).decode()
+        except (binascii.Error, ValueError):
+            pass
+    return info_hash.lower()
+
+
+def _normalize_link(link: str) -> str:
+    parts = urlsplit(link)
+    query = urlencode(sorted((key, value) for key, value in parse_qsl(parts.query) if key.lower() not in LINK_IGNORED_PARAMS))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip('/'), query, ''))
+
+
+def result_key(result: SearchResult) -> Optional[tuple]:
+    # identifies the torrent by its info hash, falling back to the guid or the normalized link
+    info_hash = _info_hash(result)
+    if info_hash:
+        return 'hash', info_hash
+    if result.guid:
+        return 'guid', result.guid
+    if result.link:
+        return 'link', _normalize_link(result.link)
+    return None
+
+
+def dedupe_results(results: list) -> Tuple[list, int]:
+    """
+    Removes duplicate results (i.e the same torrent from several indexers or searches) keeping the copy with the most seeders
+    in the place the torrent was first found.
+    Returns the unique results and how many were removed.
+    """
+    unique = []
+    positions = {}
+    for result in results:
+        key = result_key(result)
+        if key is None:
+            unique.append(result)
+        elif key not in positions:
+            positions[key] = len(unique)
+            unique.append(result)
+        elif (result.seeders or 0) > (unique[positions[key]].seeders or 0):
+            unique[positions[key]] = result
+    return unique, len(results) - len(unique)
+
 
 class SearchTorrents:
+    """
+    Searches jackett for torrents.
+
+    Results are cached (settings.JACKETT_CACHE_TTL) and served stale for a while longer (settings.JACKETT_CACHE_STALE)
+    while a single background task refreshes them, so repeat searches (i.e every episode searching the show name) don't hit jackett.
+    "cache_age" is how old (seconds) the results are when they came from the cache.
+    Duplicate results (see dedupe_results) are removed and counted in "duplicates_removed".
+
+    With "jackett_fan_out_search" each configured indexer is searched individually and concurrently, and any indexer
+    that misses its deadline (settings.JACKETT_INDEXER_DEADLINE) is skipped rather than holding up the entire search.
+
+    Indexers which keep failing are excluded for a while (see indexers._update_circuit). Since jackett can only search
+    "all" of them together, the remaining indexers are searched individually until they're all healthy again.
+    Results without the failing or excluded indexers ("degraded") are still cached, but only until the excluded indexers
+    are retried (settings.JACKETT_INDEXER_COOL_DOWN). Results cut off by the deadline ("partial") aren't cached.
+    """
     results: list = None
     ok = True
     error_content = None
+    searched = False
+    cache_age: float = None
+    duplicates_removed = 0
+    partial = False  # some indexers missed the deadline so the results are incomplete
+    degraded = False  # some indexers failed or were left out
     nefarious_settings: NefariousSettings
 
-    def __init__(self, media_type: str, query: str):
+    def __init__(self, media_type: str, query: str, defer: bool = False, use_cache: bool = True):
+        # "defer" postpones the actual request until search() is called (i.e to run it concurrently with other searches)
         assert media_type in [SEARCH_MEDIA_TYPE_TV, SEARCH_MEDIA_TYPE_MOVIE]
         self.nefarious_settings = NefariousSettings.get()
+        self.media_type = media_type
+        self.query = query
+        self.use_cache = use_cache and settings.JACKETT_CACHE_TTL > 0
 
-        params = {
+        if not defer:
+            self.search()
+
+    def search(self, timeout: float = SEARCH_TIMEOUT):
+        # only uses the already loaded settings so it's safe to run outside the calling thread (no database access)
+
+        if self.use_cache:
+            entry = cache.get(self.cache_key())
+            if entry:
+                self.results = entry['results']
+                self.cache_age = time.time() - entry['cached_at']
+                logger_background.info(f'jackett search (cached {self.cache_age:.0f}s): query={self.query}')
+                # stale so refresh it in the background
+                if self.cache_age > entry.get('ttl', settings.JACKETT_CACHE_TTL):
+                    self._refresh()
+                self.searched = True
+                return self
+
+        excluded = self.excluded_indexers()
+        if self.fan_out() or excluded:
+            self._search_indexers(timeout, excluded)
+        else:
+            self._search_aggregate(timeout)
+
+        if self.ok:
+            self.results, self.duplicates_removed = dedupe_results(self.results)
+            if self.duplicates_removed:
+                logger_background.info(f'jackett search: query={self.query}, removed {self.duplicates_removed} duplicate results')
+
+        # results cut off by the deadline aren't cached so the next search waits on every indexer again, while
+        # results without the failing indexers are refreshed once those are retried
+        if self.ok and not self.partial and settings.JACKETT_CACHE_TTL > 0:
+            ttl = settings.JACKETT_CACHE_TTL
+            if self.degraded:
+                ttl = min(ttl, settings.JACKETT_INDEXER_COOL_DOWN)
+            cache.set(
+                self.cache_key(), {'results': self.results, 'cached_at': time.time(), 'ttl': ttl},
+                timeout=ttl + settings.JACKETT_CACHE_STALE)
+
+        self.searched = True
+        return self
+
+    def fan_out(self) -> bool:
+        # a filter-index is searched as is
+        return self.nefarious_settings.jackett_fan_out_search and not self.nefarious_settings.jackett_filter_index
+
+    def excluded_indexers(self) -> List[str]:
+        # failing indexers to leave out, although a filter-index is searched as is
+        if self.nefarious_settings.jackett_filter_index:
+            return []
+        return open_circuits()
+
+    def _params(self) -> dict:
+        return {
             'apikey': self.nefarious_settings.jackett_token,
-            'Query': query,
-            'Category[]': self._categories(media_type),
+            'Query': self.query,
+            'Category[]': self._categories(self.media_type),
         }
 
-        res = requests.get(get_jackett_search_url(self.nefarious_settings), params, timeout=90)
-        logger_background.info(f'jackett search: query={query}, url={res.url}')
+    def _search_aggregate(self, timeout: float):
+        # search all indexers (or the filter-index) through jackett in a single request
+        res = http_client.get(get_jackett_search_url(self.nefarious_settings), self._params(), timeout=timeout, stream=True)
+        logger_background.info(f'jackett search: query={self.query}, url={res.url}')
 
-        if res.ok:
-            response = res.json()
-            self.results = response['Results']
-        else:
+        try:
+            if res.ok:
+                # stream the results rather than loading the entire response, along with each indexer's status
+                statuses = []
+                self.results = list(iter_results(res, statuses))
+                if record_statuses(statuses):
+                    self.degraded = True
+            else:
+                self.ok = False
+                self.error_content = res.content
+        finally:
+            res.close()
+
+    def _search_indexers(self, timeout: float, excluded: List[str] = None):
+        try:
+            indexers = get_indexers(self.nefarious_settings)
+        except Exception as e:
+            logger_background.warning(f'jackett search: could not fetch indexers ({e}), searching all indexers together')
+            return self._search_aggregate(timeout)
+
+        # leave out the failing indexers
+        healthy = [indexer for indexer in indexers if indexer not in (excluded or [])]
+        if healthy and len(healthy) < len(indexers):
+            logger_background.info('jackett search: query={}, excluding failing indexers: {}'.format(
+                self.query, ', '.join(sorted(set(indexers) - set(healthy)))))
+            indexers = healthy
+            self.degraded = True
+        elif not self.fan_out():
+            # every indexer is failing (so there's nothing to leave out) or none of the failing ones are configured anymore
+            return self._search_aggregate(timeout)
+
+        deadline = min(settings.JACKETT_INDEXER_DEADLINE, timeout)
+        params = self._params()
+        errors = []
+        succeeded = 0
+        self.results = []
+
+        logger_background.info(f'jackett search: query={self.query}, indexers={len(indexers)}')
+
+        executor = ThreadPoolExecutor(max_workers=max(len(indexers), 1))
+        futures = {
+            executor.submit(search_indexer, self.nefarious_settings, indexer, params, deadline): indexer
+            for indexer in indexers
+        }
+        try:
+            # merge results as each indexer responds
+            for future in as_completed(futures, timeout=deadline):
+                try:
+                    self.results += future.result()
+                    succeeded += 1
+                except Exception as e:
+                    errors.append('{}: {}'.format(futures[future], e))
+                    self.degraded = True
+        except FuturesTimeoutError:
+            pending = [indexer for future, indexer in futures.items() if not future.done()]
+            errors.append('indexers did not finish within {}s: {}'.format(deadline, ', '.join(pending)))
+            self.partial = True
+        finally:
+            # don't wait on the slow indexers
+            executor.shutdown(wait=False)
+
+        if errors:
+            logger_background.warning('jackett search: query={}, errors:\n{}'.format(self.query, '\n'.join(errors)))
+
+        # partial results are fine as long as an indexer responded
+        if not succeeded:
             self.ok = False
-            self.error_content = res.content
+            self.error_content = '\n'.join(errors) or 'no configured indexers'
+
+    def cache_key(self) -> str:
+        # normalize the query so trivially different queries share results (no query is the latest results)
+        query = ' '.join((self.query or '').lower().split())
+        key = '{media_type}|{query}|{categories}|{filter_index}'.format(
+            media_type=self.media_type,
+            query=query,
+            categories=','.join(str(c) for c in self._categories(self.media_type)),
+            filter_index=self.nefarious_settings.jackett_filter_index or 'all',
+        )
+        return 'jackett-search:v{}:{}'.format(SEARCH_CACHE_VERSION, hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    def refresh_lock_key(self) -> str:
+        return '{}:refresh'.format(self.cache_key())
+
+    def _refresh(self):
+        # only queue a single refresh at a time
+        if cache.add(self.refresh_lock_key(), True, timeout=SEARCH_TIMEOUT * 2):
+            from nefarious.tasks import refresh_search_torrents_task
+            logger_background.info(f'jackett search: refreshing stale results for query={self.query}')
+            refresh_search_torrents_task.delay(self.media_type, self.query)
 
     def _categories(self, media_type: str) -> list:
         # https://github.com/nZEDb/nZEDb/blob/dev/docs/newznab_api_specification.txt
@@ -44,14 +283,94 @@ class SearchTorrents:
             return cat_tv
 
 
+class SearchResults:
+    """
+    Results found without searching (i.e by the release monitor) to hand to the processors in place of a search.
+    """
+    ok = True
+    error_content = None
+    cache_age = None
+
+    def __init__(self, results: list):
+        self.results = results
+
+
 class SearchTorrentsCombined:
-    def __init__(self, search_torrents: List[SearchTorrents]):
+    """
+    Combines the results of multiple searches.
+
+    Deferred searches are run concurrently and bound by an overall deadline (settings.JACKETT_SEARCH_DEADLINE),
+    so it takes as long as the slowest search instead of all of them back to back.
+    Searches that fail or miss the deadline are skipped and whatever results were found are returned.
+    Results found by more than one search are only included once (see dedupe_results).
+    """
+
+    def __init__(self, search_torrents: List[SearchTorrents], deadline: float = None):
         self.results: list = []
-        self.ok = any([search.ok for search in search_torrents])
         self.error_content = ''
+        self.cache_age = None
+        self.duplicates_removed = 0
 
-        for search in search_torrents:
+        searches, errors = self._search(search_torrents, deadline if deadline is not None else settings.JACKETT_SEARCH_DEADLINE)
+
+        self.ok = any([search.ok for search in searches])
+
+        for search in searches:
             if search.ok:
                 self.results += search.results
+                # age of the oldest cached results
+                if search.cache_age is not None:
+                    self.cache_age = max(self.cache_age or 0, search.cache_age)
+            else:
+                errors.append(search.error_content)
+        for error in errors:
+            self.error_content += '\n{}'.format(error)
+
+        # overlapping searches (i.e "Atlanta" and "Atlanta s01e05") return many of the same results
+        self.results, duplicates_removed = dedupe_results(self.results)
+        self.duplicates_removed = duplicates_removed + sum(search.duplicates_removed for search in searches if search.ok)
+        if duplicates_removed:
+            logger_background.info('jackett search: removed {} duplicate results across {} searches'.format(duplicates_removed, len(search_torrents)))
+
+    @staticmethod
+    def _search(search_torrents: List[SearchTorrents], deadline: float) -> Tuple[list, list]:
+        """
+        Returns the finished searches and the errors of those which failed or missed the deadline.
+
+        Each deferred search runs on its own copy which is only handed back through its future, so a search that
+        misses the deadline can finish (and cache its results) on its own without changing anything read here.
+        """
+        pending = [search for search in search_torrents if not search.searched]
+        futures = {}
+        if pending:
+            executor = ThreadPoolExecutor(max_workers=len(pending))
+            futures = {search: executor.submit(_search_copy, search, min(SEARCH_TIMEOUT, deadline)) for search in pending}
+            wait(futures.values(), timeout=deadline)
+            # don't wait on searches that missed the deadline (they'll finish on their own with the same timeout)
+            executor.shutdown(wait=False)
+
+        searches = []
+        errors = []
+        for search in search_torrents:
+            future = futures.get(search)
+            if future is None:
+                # already searched
+                searches.append(search)
+                continue
+            if not future.done():
+                errors.append('search "{}" did not finish within {}s'.format(search.query, deadline))
+            elif future.exception():
+                errors.append('search "{}" failed: {}'.format(search.query, future.exception()))
             else:
-                self.error_content += '\n{}'.format(search.error_content)
+                searches.append(future.result())
+                continue
+            logger_background.warning('jackett search: {}'.format(errors[-1]))
+
+        return searches, errors
+
+
+def _search_copy(search: SearchTorrents, timeout: float) -> SearchTorrents:
+    # runs the search on a copy so the original isn't changed from another thread
+    search_copy = copy.copy(search)
+    search_copy.search(timeout)
+    return search_copy
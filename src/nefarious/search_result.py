@@ -0,0 +1,122 @@
+class SearchResult:
+    """
+    Compact jackett search result.
+
+    Only the fields nefarious uses are kept (jackett returns dozens per result, i.e descriptions and category lists),
+    with Size and Seeders as ints, and __slots__ avoids a per-instance dict.
+
+    It's also a mapping view with jackett's keys, i.e result['Title'], where a field set to None is an absent key.
+    """
+
+    __slots__ = (
+        'title',
+        'size',  # bytes
+        'seeders',
+        'guid',
+        'link',
+        'magnet_uri',
+        'info_hash',
+        'tracker',
+        'torrent_url',  # traced magnet or torrent url (see results_with_valid_urls)
+    )
+
+    # mapping keys (jackett's) -> slots
+    KEYS = {
+        'Title': 'title',
+        'Size': 'size',
+        'Seeders': 'seeders',
+        'Guid': 'guid',
+        'Link': 'link',
+        'MagnetUri': 'magnet_uri',
+        'InfoHash': 'info_hash',
+        'Tracker': 'tracker',
+        'torrent_url': 'torrent_url',
+    }
+
+    def __init__(self, title: str = None, size: int = None, seeders: int = None, guid: str = None, link: str = None,
+                 magnet_uri: str = None, info_hash: str = None, tracker: str = None, torrent_url: str = None):
+        self.title = title
+        self.size = size
+        self.seeders = seeders
+        self.guid = guid
+        self.link = link
+        self.magnet_uri = magnet_uri
+        self.info_hash = info_hash
+        self.tracker = tracker
+        self.torrent_url = torrent_url
+
+    @classmethod
+    def from_jackett(cls, result: dict) -> 'SearchResult':
+        # also accepts a dict from to_dict()
+        return cls(
+            title=result.get('Title'),
+            size=cls._int(result.get('Size')),
+            seeders=cls._int(result.get('Seeders')),
+            guid=result.get('Guid'),
+            link=result.get('Link'),
+            magnet_uri=result.get('MagnetUri'),
+            info_hash=result.get('InfoHash'),
+            tracker=result.get('Tracker'),
+            torrent_url=result.get('torrent_url'),
+        )
+
+    @staticmethod
+    def _int(value):
+        try:
+            return int(value) if value is not None else None
+        except (TypeError, ValueError):
+            return None
+
+    def to_dict(self) -> dict:
+        # i.e for the api and task arguments
+        return dict(self.items())
+
+    #
+    # mapping view
+    #
+
+    def __getitem__(self, key):
+        value = getattr(self, self._slot(key))
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        setattr(self, self._slot(key), value)
+
+    def __contains__(self, key):
+        return key in self.KEYS and getattr(self, self.KEYS[key]) is not None
+
+    def get(self, key, default=None):
+        if key not in self.KEYS:
+            return default
+        value = getattr(self, self.KEYS[key])
+        return default if value is None else value
+
+    def keys(self):
+        return [key for key, slot in self.KEYS.items() if getattr(self, slot) is not None]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __bool__(self):
+        return True
+
+    def __eq__(self, other):
+        if isinstance(other, (SearchResult, dict)):
+            return self.to_dict() == dict(other.items())
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+    def _slot(self, key: str) -> str:
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return self.KEYS[key]
@@ -0,0 +1,50 @@
+from django.core.cache import cache
+
+from nefarious.models import MEDIA_TYPE_MOVIE, MEDIA_TYPE_TV_SEASON, MEDIA_TYPE_TV_EPISODE
+
+# search query tiers from the most specific to the broadest (see WatchProcessorBase.fetch)
+TIER_EPISODE = 'episode'  # i.e "Atlanta s02e04"
+TIER_SEASON = 'season'  # i.e "Atlanta s02"
+TIER_TITLE = 'title'  # i.e "Atlanta"
+
+# results that weren't searched for a single media
+TIER_COMBINED = 'combined'  # several episodes sharing the same searches
+TIER_LATEST = 'latest'  # the release monitor
+
+TIERS = {
+    MEDIA_TYPE_MOVIE: [TIER_TITLE, TIER_LATEST],
+    MEDIA_TYPE_TV_SEASON: [TIER_SEASON, TIER_TITLE, TIER_LATEST],
+    MEDIA_TYPE_TV_EPISODE: [TIER_EPISODE, TIER_TITLE, TIER_COMBINED, TIER_LATEST],
+}
+
+
+def _key(media_type: str, tier: str, counter: str) -> str:
+    return 'search-tiers:{}:{}:{}'.format(media_type, tier, counter)
+
+
+def _increment(key: str):
+    # counters never expire
+    cache.add(key, 0, timeout=None)
+    cache.incr(key)
+
+
+def record_tier_search(media_type: str, tier: str):
+    _increment(_key(media_type, tier, 'searches'))
+
+
+def record_tier_win(media_type: str, tier: str):
+    # the tier produced the result which was downloaded
+    _increment(_key(media_type, tier, 'wins'))
+
+
+def tier_stats() -> dict:
+    # i.e {"TV_EPISODE": {"episode": {"searches": 10, "wins": 8}, ...}, ...}
+    keys = [_key(media_type, tier, counter) for media_type, tiers in TIERS.items() for tier in tiers for counter in ('searches', 'wins')]
+    counts = cache.get_many(keys)
+    return {
+        media_type: {
+            tier: {counter: counts.get(_key(media_type, tier, counter), 0) for counter in ('searches', 'wins')}
+            for tier in tiers
+        }
+        for media_type, tiers in TIERS.items()
+    }
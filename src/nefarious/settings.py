@@ -183,12 +183,55 @@ CELERY_WORKER_PREFETCH_MULTIPLIER = 1
 # this ensures the task is acknowledged AFTER it runs, not before.
 CELERY_TASK_ACKS_LATE = True
 
+# seconds between polling jackett's latest releases for wanted media (0 disables)
+RELEASE_MONITOR_INTERVAL = int(os.environ.get('RELEASE_MONITOR_INTERVAL', 60 * 15))
+# while the release monitor is healthy, wanted media searched within this many seconds aren't searched again by
+# the wanted media task (0 searches everything every time)
+WANTED_MEDIA_BACKFILL_INTERVAL = int(os.environ.get('WANTED_MEDIA_BACKFILL_INTERVAL', 60 * 60 * 24))
+
+# seconds to wait on each indexer when searching them individually (see NefariousSettings.jackett_fan_out_search)
+JACKETT_INDEXER_DEADLINE = int(os.environ.get('JACKETT_INDEXER_DEADLINE', 30))
+
+# failed (or timed out) searches in a row before an indexer is excluded from searches (0 disables),
+# and seconds until it's searched again
+JACKETT_INDEXER_FAILURES = int(os.environ.get('JACKETT_INDEXER_FAILURES', 3))
+JACKETT_INDEXER_COOL_DOWN = int(os.environ.get('JACKETT_INDEXER_COOL_DOWN', 60 * 10))
+
+# seconds jackett search results are cached (0 disables) and then how much longer stale results are still
+# used while they're refreshed in the background
+JACKETT_CACHE_TTL = int(os.environ.get('JACKETT_CACHE_TTL', 60 * 30))
+JACKETT_CACHE_STALE = int(os.environ.get('JACKETT_CACHE_STALE', 60 * 60 * 3))
+
+# overall time (seconds) to wait on concurrent jackett searches before using whatever results were found
+JACKETT_SEARCH_DEADLINE = float(os.environ.get('JACKETT_SEARCH_DEADLINE', 90))
+
+# time budgets (seconds) for release title parsing which guard against catastrophic regex backtracking.
+# titles exceeding either budget are treated as non-matches and recorded to NEFARIOUS_LOG_FILE_PARSER_TIMEOUTS (0 disables)
+PARSER_PATTERN_TIMEOUT = float(os.environ.get('PARSER_PATTERN_TIMEOUT', .25))
+PARSER_TITLE_TIMEOUT = float(os.environ.get('PARSER_TITLE_TIMEOUT', 1))
+
+# search result sets with at least this many results are parsed and matched in a shared process pool (0 disables)
+PARSER_POOL_THRESHOLD = int(os.environ.get('PARSER_POOL_THRESHOLD', 1000))
+# number of pool processes. every celery worker process starts its own pool so keep it small (0 uses the number of CPUs)
+PARSER_POOL_PROCESSES = int(os.environ.get('PARSER_POOL_PROCESSES', 2))
+
+# matching results whose torrent urls are traced at once (in total and per host) and the overall seconds to trace them
+TORRENT_TRACE_CONCURRENCY = int(os.environ.get('TORRENT_TRACE_CONCURRENCY', 8))
+TORRENT_TRACE_HOST_CONCURRENCY = int(os.environ.get('TORRENT_TRACE_HOST_CONCURRENCY', 4))
+TORRENT_TRACE_DEADLINE = float(os.environ.get('TORRENT_TRACE_DEADLINE', 60))
+# best matching candidates traced together before trying to add them, and then the next best if none were added
+TORRENT_TRACE_CANDIDATES = int(os.environ.get('TORRENT_TRACE_CANDIDATES', 4))
+
+# seconds search results rejected for a wanted media are remembered so later searches don't parse them again (0 disables)
+MATCH_REJECTED_CACHE_TTL = int(os.environ.get('MATCH_REJECTED_CACHE_TTL', 60 * 60 * 24 * 7))
+
 CONFIG_PATH = os.environ.get('CONFIG_PATH', '/nefarious-db')
 
 # log to shared config path when using default container configuration, otherwise fallback to /tmp
 log_path = CONFIG_PATH if os.path.exists(CONFIG_PATH) else '/tmp'
 NEFARIOUS_LOG_FILE_FOREGROUND = os.path.join(log_path, '.foreground.log')
 NEFARIOUS_LOG_FILE_BACKGROUND = os.path.join(log_path, '.background.log')
+NEFARIOUS_LOG_FILE_PARSER_TIMEOUTS = os.path.join(log_path, '.parser-timeouts.log')
 
 MAX_LOG_BYTES = 1024 ** 2 * 5
 
@@ -221,6 +264,13 @@ LOGGING = {
             'maxBytes': MAX_LOG_BYTES,
             'backupCount': 1,  # only keep a single backup which gets overwritten during rotation
         },
+        'file-parser-timeouts': {
+            'level': 'INFO',
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': NEFARIOUS_LOG_FILE_PARSER_TIMEOUTS,
+            'maxBytes': MAX_LOG_BYTES,
+            'backupCount': 1,  # only keep a single backup which gets overwritten during rotation
+        },
     },
     'loggers': {
         "nefarious-background": {
@@ -231,5 +281,9 @@ LOGGING = {
             "handlers": ["console", "file-foreground"],
             "level": "INFO",
         },
+        "nefarious-parser-timeouts": {
+            "handlers": ["console", "file-parser-timeouts"],
+            "level": "INFO",
+        },
     }
 }
@@ -3,9 +3,10 @@ import pytz
 from celery import chain
 from celery.signals import task_failure
 from datetime import datetime, timedelta
-from celery_once import QueueOnce
+from celery_once import QueueOnce, AlreadyQueued
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.db import IntegrityError
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
@@ -19,7 +20,11 @@ from nefarious.models import (
     MEDIA_TYPE_MOVIE, MEDIA_TYPE_TV_SEASON, MEDIA_TYPE_TV_EPISODE,
 )
 from nefarious.opensubtitles import OpenSubtitles
-from nefarious.processors import WatchMovieProcessor, WatchTVEpisodeProcessor, WatchTVSeasonProcessor
+from nefarious.processors import WatchMovieProcessor, WatchTVEpisodeProcessor, WatchTVSeasonProcessor, WatchTVShowEpisodesProcessor
+from nefarious.monitor import ReleaseMonitor, mark_releases_seen
+from nefarious.search import SearchTorrents, SearchResults
+from nefarious.search_result import SearchResult
+from nefarious.search_tiers import TIER_LATEST
 from nefarious.tmdb import get_tmdb_client
 from nefarious.transmission import get_transmission_client
 from nefarious.utils import get_media_new_path_and_name, update_media_release_date, blacklist_media_and_retry
@@ -58,6 +63,12 @@ app.conf.beat_schedule = {
     },
 }
 
+if settings.RELEASE_MONITOR_INTERVAL:
+    app.conf.beat_schedule['Release Monitor Task'] = {
+        'task': 'nefarious.tasks.release_monitor_task',
+        'schedule': settings.RELEASE_MONITOR_INTERVAL,
+    }
+
 
 @task_failure.connect
 def log_exception(**kwargs):
@@ -80,12 +91,7 @@ def watch_tv_show_season_task(watch_tv_season_id: int):
 
     # success so update the season request instance as "collected"
     if success:
-        season_request = WatchTVSeasonRequest.objects.filter(
-            watch_tv_show=watch_tv_season.watch_tv_show, season_number=watch_tv_season.season_number)
-        if season_request.exists():
-            season_request = season_request.first()
-            season_request.collected = True
-            season_request.save()
+        _collect_season_request(watch_tv_season)
     # failed so delete season instance and fallback to trying individual episodes
     else:
         logger_background.info('Failed fetching entire season {} - falling back to individual episodes'.format(watch_tv_season))
@@ -94,6 +100,7 @@ def watch_tv_show_season_task(watch_tv_season_id: int):
         season_request = tmdb.TV_Seasons(watch_tv_season.watch_tv_show.tmdb_show_id, watch_tv_season.season_number)
         season = season_request.info()
 
+        watch_tv_episode_ids = []
         for episode in season['episodes']:
             # save individual episode watches
             watch_tv_episode, was_created = WatchTVEpisode.objects.get_or_create(
@@ -107,25 +114,118 @@ def watch_tv_show_season_task(watch_tv_season_id: int):
                     release_date=parse_date(episode.get('air_date') or ''),
                 )
             )
-            # queue task to watch episode
-            watch_tv_episode_task.delay(watch_tv_episode.id)
+            watch_tv_episode_ids.append(watch_tv_episode.id)
+
+        # queue task to watch the episodes together (sharing the show search)
+        watch_tv_show_episodes_task.delay(watch_tv_episode_ids)
 
         # remove the "watch season" now that we've requested to fetch all individual episodes
         watch_tv_season.delete()
 
 
+def _collect_season_request(watch_tv_season: WatchTVSeason):
+    season_request = WatchTVSeasonRequest.objects.filter(
+        watch_tv_show=watch_tv_season.watch_tv_show, season_number=watch_tv_season.season_number)
+    if season_request.exists():
+        season_request = season_request.first()
+        season_request.collected = True
+        season_request.save()
+
+
 @app.task(base=QueueOnce, once={'graceful': True})
 def watch_tv_episode_task(watch_tv_episode_id: int):
     processor = WatchTVEpisodeProcessor(watch_media_id=watch_tv_episode_id)
     processor.fetch()
 
 
+def _lock_once(task, **kwargs):
+    # takes the task's once-lock for the arguments (as if it were queued with them) and returns its key, or None when it's already taken
+    key = task.get_key(kwargs=kwargs)
+    try:
+        task.once_backend.raise_or_lock(key, timeout=task.once.get('timeout', task.default_timeout))
+    except AlreadyQueued:
+        return None
+    return key
+
+
+@app.task(base=QueueOnce, once={'graceful': True})
+def watch_tv_show_episodes_task(watch_tv_episode_ids: list):
+    # watch several episodes of the same show at once.
+    # each episode takes the same lock as watch_tv_episode_task so an episode is never processed twice at the same time
+    locks = {}
+    try:
+        for watch_tv_episode_id in watch_tv_episode_ids:
+            key = _lock_once(watch_tv_episode_task, watch_tv_episode_id=watch_tv_episode_id)
+            if not key:
+                logger_background.info('skipping episode {} since it is already queued'.format(watch_tv_episode_id))
+                continue
+            locks[watch_tv_episode_id] = key
+
+        if locks:
+            processor = WatchTVShowEpisodesProcessor(list(locks.keys()))
+            processor.fetch()
+    finally:
+        for key in locks.values():
+            watch_tv_episode_task.once_backend.clear_lock(key)
+
+
 @app.task(base=QueueOnce, once={'graceful': True})
 def watch_movie_task(watch_movie_id: int):
     processor = WatchMovieProcessor(watch_media_id=watch_movie_id)
     processor.fetch()
 
 
+@app.task(base=QueueOnce, once={'graceful': True})
+def release_monitor_task():
+    # match the latest releases against all wanted media and process the matches
+    monitor = ReleaseMonitor()
+    logger_background.info('release monitor: {} wanted media'.format(len(monitor.index)))
+    for (media_type, watch_media_id), results in monitor.poll().items():
+        process_release_results_task.delay(media_type, watch_media_id, [result.to_dict() for result in results])
+
+
+@app.task(base=QueueOnce, once={'graceful': True, 'keys': ['media_type', 'watch_media_id']})
+def process_release_results_task(media_type: str, watch_media_id: int, results: list):
+    # process releases found by the release monitor for a wanted movie, season or episode
+    processor_classes = {
+        MEDIA_TYPE_MOVIE: (WatchMovie, WatchMovieProcessor, watch_movie_task, 'watch_movie_id'),
+        MEDIA_TYPE_TV_SEASON: (WatchTVSeason, WatchTVSeasonProcessor, watch_tv_show_season_task, 'watch_tv_season_id'),
+        MEDIA_TYPE_TV_EPISODE: (WatchTVEpisode, WatchTVEpisodeProcessor, watch_tv_episode_task, 'watch_tv_episode_id'),
+    }
+    model, processor_class, task, task_kwarg = processor_classes[media_type]
+
+    # take the same lock as the media's own search task so they never both add a torrent
+    key = _lock_once(task, **{task_kwarg: watch_media_id})
+    if not key:
+        logger_background.info('release monitor: skipping {} {} since it is already being searched'.format(media_type, watch_media_id))
+        return
+    try:
+        # skip if it's no longer wanted (i.e found by a search in the meantime)
+        if model.objects.filter(id=watch_media_id, collected=False, transmission_torrent_hash__isnull=True).exists():
+            processor = processor_class(watch_media_id=watch_media_id)
+            results = [SearchResult.from_jackett(result) for result in results]
+            # not finding anything in the latest releases isn't a search attempt (see wanted_media_task)
+            success = processor.process_search_results(SearchResults(results), tier=TIER_LATEST, record_attempt=False)
+
+            if success and media_type == MEDIA_TYPE_TV_SEASON:
+                _collect_season_request(processor.watch_media)
+
+        # only once they've been processed so they're matched again if processing them fails
+        mark_releases_seen([result['Guid'] for result in results if result.get('Guid')])
+    finally:
+        task.once_backend.clear_lock(key)
+
+
+@app.task
+def refresh_search_torrents_task(media_type: str, query: str):
+    # re-runs a jackett search whose cached results have gone stale, which also updates the cache
+    search = SearchTorrents(media_type, query, defer=True, use_cache=False)
+    try:
+        search.search()
+    finally:
+        cache.delete(search.refresh_lock_key())
+
+
 @app.task
 def refresh_tmdb_configuration():
 
@@ -344,18 +444,39 @@ def wanted_media_task():
 
     today = timezone.now().date()
 
+    # the release monitor finds new releases of the wanted media so searching each of them is only a backfill
+    # for what it missed, i.e older releases
+    backfill_after = None
+    if settings.WANTED_MEDIA_BACKFILL_INTERVAL and ReleaseMonitor.is_healthy():
+        backfill_after = timezone.now() - timedelta(seconds=settings.WANTED_MEDIA_BACKFILL_INTERVAL)
+
+    # wanted episodes grouped by show so they share the show search
+    wanted_episodes = {}
+
     for media_type, data in wanted_media_data.items():
         # process media with the oldest attempt first
         for media in data['query'].order_by('last_attempt_date'):
             # media has been released (or it's missing its release date so try anyway) so create a task to try and fetch it
             if not media.release_date or media.release_date <= today:
+                if backfill_after and media.last_attempt_date and media.last_attempt_date > backfill_after:
+                    logger_background.info('Skipping wanted {type} since it was searched recently: {media}'.format(type=media_type, media=media))
+                    continue
                 logger_background.info('Wanted {type}: {media}'.format(type=media_type, media=media))
-                # queue task for wanted media
-                data['task'].delay(media.id)
+                if media_type == 'episode':
+                    wanted_episodes.setdefault(media.watch_tv_show_id, []).append(media.id)
+                else:
+                    # queue task for wanted media
+                    data['task'].delay(media.id)
             # media has not been released so skip
             else:
                 logger_background.info("Skipping wanted {type} since it hasn't aired yet: {media} ".format(type=media_type, media=media))
 
+    for watch_tv_episode_ids in wanted_episodes.values():
+        if len(watch_tv_episode_ids) == 1:
+            watch_tv_episode_task.delay(watch_tv_episode_ids[0])
+        else:
+            watch_tv_show_episodes_task.delay(watch_tv_episode_ids)
+
 
 @app.task
 def wanted_tv_season_task():
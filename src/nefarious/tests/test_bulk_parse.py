@@ -0,0 +1,51 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from nefarious.parsers.bulk import bulk_parse, iter_chunks, MEDIA_TYPE_TV
+from nefarious.parsers.tv import TVParser
+
+
+class BulkParseTest(TestCase):
+    titles = [
+        "Sonny.With.a.Chance.S02E15\n",
+        "\n",
+        "Chuck.4x05.HDTV.XviD-LOL\r\n",
+        "not a release name\n",
+        "Atlanta.S02.720p.AMZN.WEBRip.DDP5.1.x264-NTb[rartv]\n",
+    ]
+
+    def test_chunks(self):
+        self.assertEqual(
+            [["Sonny.With.a.Chance.S02E15", "Chuck.4x05.HDTV.XviD-LOL"], ["not a release name", "Atlanta.S02.720p.AMZN.WEBRip.DDP5.1.x264-NTb[rartv]"]],
+            list(iter_chunks(self.titles, 2)))
+
+    def test_pool_keeps_input_order(self):
+        for processes in [1, 2]:
+            lines = []
+            matched = 0
+            for chunk_lines, chunk_matched in bulk_parse(self.titles, MEDIA_TYPE_TV, processes=processes, chunk_size=1):
+                lines += chunk_lines
+                matched += chunk_matched
+            results = [json.loads(line) for line in lines]
+            self.assertEqual([t.strip() for t in self.titles if t.strip()], [r['title'] for r in results])
+            self.assertEqual(3, matched)
+            for result in results:
+                parser = TVParser(result['title'])
+                self.assertEqual(parser.match.to_dict() if parser.match else None, result['match'])
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            input_path = os.path.join(tmp, 'titles.txt')
+            output_path = os.path.join(tmp, 'titles.jsonl')
+            with open(input_path, 'w') as fh:
+                fh.writelines(self.titles)
+            stderr = StringIO()
+            call_command('parse-titles', 'tv', input_path, output=output_path, processes=1, stderr=stderr)
+            with open(output_path) as fh:
+                self.assertEqual(4, len(fh.readlines()))
+            self.assertIn('Parsed 4 titles (3 matched)', stderr.getvalue())
@@ -0,0 +1,100 @@
+from unittest.mock import Mock, patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from nefarious import quality
+from nefarious.models import NefariousSettings, QualityProfile, TorrentBlacklist, WatchTVEpisode, WatchTVShow
+from nefarious.parsers.tv import TVParser
+from nefarious.processors import WatchTVEpisodeProcessor
+from nefarious.tests.test_search import jackett_response
+from nefarious.tests.test_watch_show_episodes import tmdb_client
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+@patch('nefarious.processors.get_tmdb_client', Mock(return_value=tmdb_client()))
+class FetchCandidatesTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        quality_profile, _ = QualityProfile.objects.get_or_create(name=quality.PROFILE_ANY.name, quality=quality.PROFILE_ANY.name)
+        NefariousSettings.objects.create(quality_profile_tv=quality_profile, quality_profile_movies=quality_profile)
+        user = User.objects.create_superuser('test', 'test@test.com', 'test')
+        show = WatchTVShow.objects.create(user=user, tmdb_show_id=1, name='Atlanta', poster_image_url='')
+        self.watch_episode = WatchTVEpisode.objects.create(user=user, watch_tv_show=show, tmdb_episode_id=1, season_number=2, episode_number=4)
+
+    def result(self, title: str, seeders: int) -> dict:
+        return {'Title': title, 'Size': 1, 'Seeders': seeders, 'Guid': title, 'Link': 'http://jackett/dl/{}'.format(title)}
+
+    def fetch(self, results: list):
+        # returns whether it was found, the torrent urls that were traced, the titles that were parsed and the torrents added
+        transmission_client = Mock()
+
+        def add_torrent(url, paused, download_dir):
+            torrent = Mock(id=1, hashString=url.rsplit(':', 1)[-1])
+            torrent.name = 'Atlanta'
+            return torrent
+        transmission_client.add_torrent.side_effect = add_torrent
+        transmission_client.session_stats.return_value = Mock(download_dir='/downloads')
+
+        def get(url, params=None, timeout=None, stream=False, allow_redirects=True):
+            # torrent links redirect to a magnet named after the title
+            if '/dl/' in url:
+                return Mock(ok=True, is_redirect=True, headers={'Location': 'magnet:?xt=urn:btih:{}'.format(url.split('?')[0].rsplit('/', 1)[-1])})
+            return jackett_response(results if params['Query'] == 'Atlanta s02e04' else [])
+
+        with patch('nefarious.processors.get_transmission_client', Mock(return_value=transmission_client)), \
+                patch('nefarious.http_client.get', side_effect=get) as requests_get, \
+                patch.object(TVParser, 'cached', wraps=TVParser.cached) as cached:
+            found = WatchTVEpisodeProcessor(self.watch_episode.id).fetch()
+
+        traced = [call[0][0].split('?')[0].rsplit('/', 1)[-1] for call in requests_get.call_args_list if '/dl/' in call[0][0]]
+        parsed = [call[0][0] for call in cached.call_args_list]
+        added = [call[0][0].rsplit(':', 1)[-1] for call in transmission_client.add_torrent.call_args_list]
+        return found, traced, parsed, added
+
+    @override_settings(TORRENT_TRACE_CANDIDATES=1)
+    def test_only_the_best_candidate_is_traced(self):
+        found, traced, parsed, added = self.fetch([
+            self.result('Atlanta.S02E04.720p.HDTV.x264', 10),
+            self.result('Atlanta.S02E04.1080p.WEB.x264', 50),
+            self.result('Atlanta.S02E05.1080p.WEB.x264', 100),  # most seeded but not a match
+            self.result('Atlanta.S02E04.480p.HDTV.x264', 50),
+        ])
+        self.assertTrue(found)
+        self.assertEqual(['Atlanta.S02E04.1080p.WEB.x264'], traced)
+        self.assertEqual(['Atlanta.S02E04.1080p.WEB.x264'], added)
+        # results after the added torrent aren't parsed
+        self.assertEqual(['Atlanta.S02E05.1080p.WEB.x264', 'Atlanta.S02E04.1080p.WEB.x264'], parsed)
+
+        self.watch_episode.refresh_from_db()
+        self.assertEqual('Atlanta.S02E04.1080p.WEB.x264', self.watch_episode.transmission_torrent_hash)
+
+    @override_settings(TORRENT_TRACE_CANDIDATES=2)
+    def test_best_candidates_are_traced_together(self):
+        found, traced, parsed, added = self.fetch([
+            self.result('Atlanta.S02E04.720p.HDTV.x264', 10),
+            self.result('Atlanta.S02E04.1080p.WEB.x264', 50),
+            self.result('Atlanta.S02E05.1080p.WEB.x264', 100),  # not a match
+            self.result('Atlanta.S02E04.480p.HDTV.x264', 50),
+            self.result('Atlanta.S02E04.2160p.WEB.x264', 5),
+        ])
+        self.assertTrue(found)
+        # the two best matches are traced (concurrently) but only the best is added
+        self.assertEqual({'Atlanta.S02E04.1080p.WEB.x264', 'Atlanta.S02E04.480p.HDTV.x264'}, set(traced))
+        self.assertEqual(['Atlanta.S02E04.1080p.WEB.x264'], added)
+        self.assertEqual(['Atlanta.S02E05.1080p.WEB.x264', 'Atlanta.S02E04.1080p.WEB.x264', 'Atlanta.S02E04.480p.HDTV.x264'], parsed)
+
+    @override_settings(TORRENT_TRACE_CANDIDATES=1)
+    def test_blacklisted_candidate_is_skipped(self):
+        TorrentBlacklist.objects.create(hash='Atlanta.S02E04.1080p.WEB.x264', name='blacklisted')
+        found, traced, parsed, added = self.fetch([
+            self.result('Atlanta.S02E04.720p.HDTV.x264', 10),
+            self.result('Atlanta.S02E04.1080p.WEB.x264', 50),
+            self.result('Atlanta.S02E04.480p.HDTV.x264', 50),
+        ])
+        self.assertTrue(found)
+        # equally seeded results keep their order
+        self.assertEqual(['Atlanta.S02E04.1080p.WEB.x264', 'Atlanta.S02E04.480p.HDTV.x264'], traced)
+        self.assertEqual(['Atlanta.S02E04.1080p.WEB.x264', 'Atlanta.S02E04.480p.HDTV.x264'], added)
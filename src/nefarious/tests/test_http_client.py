@@ -0,0 +1,56 @@
+import http.server
+import threading
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from nefarious import http_client
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def do_GET(self):
+        body = b'ok'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class HTTPClientTest(TestCase):
+
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = 'http://127.0.0.1:{}/'.format(self.server.server_address[1])
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_keep_alive(self):
+        for _ in range(3):
+            self.assertEqual('ok', http_client.get(self.url).text)
+        stats = [s for s in http_client.pool_stats() if s['port'] == self.server.server_address[1]]
+        self.assertEqual(1, len(stats))
+        self.assertEqual(1, stats[0]['connections'])
+        self.assertEqual(3, stats[0]['requests'])
+        self.assertEqual(1, stats[0]['idle'])
+
+    def test_default_timeout(self):
+        adapter = http_client.get_session().get_adapter(self.url)
+        self.assertEqual(http_client.HTTP_DEFAULT_TIMEOUT, adapter.timeout)
+        self.assertIs(http_client.get_session(), http_client.get_session())
+
+    def test_stats_view(self):
+        http_client.get(self.url)
+        client = APIClient()
+        client.force_authenticate(User.objects.create_superuser('test', 'test@test.com', 'test'))
+        response = client.get('/api/stats/http/')
+        self.assertEqual(200, response.status_code)
+        self.assertIn(self.server.server_address[1], [s['port'] for s in response.json()['pools']])
@@ -0,0 +1,51 @@
+import json
+
+from django.test import TestCase
+
+from nefarious.jackett import iter_json_results
+from nefarious.search_result import SearchResult
+
+
+def chunked(content: bytes, size: int) -> list:
+    return [content[i:i + size] for i in range(0, len(content), size)]
+
+
+class JackettResultsTest(TestCase):
+    results = [
+        {
+            'Title': 'Atlanta S02E04 720p ★', 'Size': 1024 ** 3, 'Seeders': 10, 'Guid': 'https://tracker/1', 'Link': None,
+            'MagnetUri': 'magnet:?xt=urn:btih:abc', 'InfoHash': 'abc', 'Tracker': 'tracker', 'Description': 'x' * 100, 'Peers': 2,
+        },
+        {
+            'Title': 'Atlanta S02E05 "quoted" \\ [1080p]', 'Size': 5, 'Seeders': 0, 'Guid': 'https://tracker/2', 'Link': 'https://tracker/2.torrent',
+        },
+    ]
+
+    def test_results_are_streamed_in_any_chunk_size(self):
+        content = json.dumps({'Results': self.results, 'Indexers': [{'ID': 'tracker', 'Results': 2}]}).encode('utf-8')
+        fields = ('Title', 'Size', 'Seeders', 'Guid', 'Link', 'MagnetUri', 'InfoHash', 'Tracker')
+        expected = [{field: result[field] for field in fields if result.get(field) is not None} for result in self.results]
+        # single bytes split multi-byte characters, escapes and numbers
+        for size in (1, 2, 7, len(content)):
+            results = list(iter_json_results(chunked(content, size)))
+            self.assertTrue(all(isinstance(result, SearchResult) for result in results))
+            self.assertEqual(expected, [result.to_dict() for result in results], size)
+
+    def test_other_keys_are_skipped(self):
+        content = json.dumps({'Indexers': [{'ID': 'Results'}], 'Results': self.results[:1]}, indent=2).encode('utf-8')
+        self.assertEqual(['abc'], [result['InfoHash'] for result in iter_json_results(chunked(content, 3))])
+        self.assertEqual([], list(iter_json_results([b'{"Results": [], "Indexers": []}'])))
+        self.assertEqual([], list(iter_json_results([b'{}'])))
+
+    def test_indexer_statuses(self):
+        statuses = [{'ID': 'tracker', 'Name': 'Tracker', 'Status': 2, 'Results': 2, 'Error': None, 'ElapsedTime': 150}]
+        content = json.dumps({'Results': self.results, 'Indexers': statuses}).encode('utf-8')
+        indexers = []
+        self.assertEqual(2, len(list(iter_json_results(chunked(content, 5), indexers))))
+        self.assertEqual(statuses, indexers)
+
+    def test_malformed_response(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_results([b'{"Results": [{"Title": "Atlanta"']))
+        with self.assertRaises(ValueError):
+            list(iter_json_results([b'<html>']))
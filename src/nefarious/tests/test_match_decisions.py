@@ -0,0 +1,95 @@
+from unittest.mock import Mock, patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from nefarious import quality
+from nefarious.models import NefariousSettings, QualityProfile, WatchTVEpisode, WatchTVShow
+from nefarious.parsers.cache import parse_cache
+from nefarious.parsers.tv import TVParser
+from nefarious.processors import WatchTVEpisodeProcessor
+from nefarious.search_result import SearchResult
+from nefarious.tests.test_watch_show_episodes import tmdb_client
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+@patch('nefarious.processors.get_tmdb_client', Mock(return_value=tmdb_client()))
+@patch('nefarious.processors.get_transmission_client', Mock())
+class RejectedResultsTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        parse_cache.clear()
+        self.quality_profile, _ = QualityProfile.objects.get_or_create(name=quality.PROFILE_ANY.name, quality=quality.PROFILE_ANY.name)
+        self.nefarious_settings = NefariousSettings.objects.create(
+            quality_profile_tv=self.quality_profile, quality_profile_movies=self.quality_profile)
+        user = User.objects.create_superuser('test', 'test@test.com', 'test')
+        show = WatchTVShow.objects.create(user=user, tmdb_show_id=1, name='Atlanta', poster_image_url='')
+        self.watch_episode = WatchTVEpisode.objects.create(user=user, watch_tv_show=show, tmdb_episode_id=1, season_number=2, episode_number=4)
+        self.results = [
+            SearchResult(title='Atlanta.S02E04.720p.HDTV.x264', size=1, seeders=1, guid='1'),
+            SearchResult(title='Atlanta.S02E05.720p.HDTV.x264', size=1, seeders=1, guid='2'),
+            SearchResult(title='Atlanta.S02E04.720p.HDTV.x264.HC', size=1, seeders=1, guid='3'),
+            SearchResult(title='Atlanta.S02E04.1080p.WEB.x264', size=1, seeders=1),  # no guid
+        ]
+
+    def valid_results(self):
+        # returns the valid results' titles and the titles which were parsed
+        processor = WatchTVEpisodeProcessor(self.watch_episode.id)
+        with patch.object(TVParser, 'cached', wraps=TVParser.cached) as cached:
+            valid = processor._get_valid_search_results(self.results)
+        return [result.title for result in valid], [call[0][0] for call in cached.call_args_list]
+
+    def test_rejects_are_not_parsed_again(self):
+        expected = ['Atlanta.S02E04.720p.HDTV.x264', 'Atlanta.S02E04.1080p.WEB.x264']
+        valid, parsed = self.valid_results()
+        self.assertEqual(expected, valid)
+        self.assertEqual(4, len(parsed))
+
+        valid, parsed = self.valid_results()
+        self.assertEqual(expected, valid)
+        self.assertEqual(['Atlanta.S02E04.720p.HDTV.x264', 'Atlanta.S02E04.1080p.WEB.x264'], parsed)
+
+        # the reason is remembered
+        processor = WatchTVEpisodeProcessor(self.watch_episode.id)
+        self.assertEqual({'2': 'title', '3': 'hardcoded subs'}, processor.get_rejected_results().get(self.results))
+
+    def test_settings_change_invalidates(self):
+        self.valid_results()
+
+        # allowing hardcoded subs
+        self.nefarious_settings.allow_hardcoded_subs = True
+        self.nefarious_settings.save()
+        valid, parsed = self.valid_results()
+        self.assertEqual(4, len(parsed))
+        self.assertIn('Atlanta.S02E04.720p.HDTV.x264.HC', valid)
+
+        # keyword filters
+        self.nefarious_settings.keyword_search_filters = {'web': 'WEB'}
+        self.nefarious_settings.save()
+        valid, parsed = self.valid_results()
+        self.assertEqual(4, len(parsed))
+        self.assertNotIn('Atlanta.S02E04.1080p.WEB.x264', valid)
+
+        # quality profile
+        self.quality_profile.min_size_gb = 1
+        self.quality_profile.save()
+        valid, parsed = self.valid_results()
+        self.assertEqual(4, len(parsed))
+        self.assertEqual([], valid)
+
+    def test_parse_timeouts_are_not_remembered(self):
+        with self.settings(PARSER_PATTERN_TIMEOUT=1e-9):
+            valid, parsed = self.valid_results()
+        self.assertEqual([], valid)
+        # tried again once the parsing isn't timing out
+        valid, parsed = self.valid_results()
+        self.assertEqual(4, len(parsed))
+        self.assertEqual(['Atlanta.S02E04.720p.HDTV.x264', 'Atlanta.S02E04.1080p.WEB.x264'], valid)
+
+    @override_settings(MATCH_REJECTED_CACHE_TTL=0)
+    def test_disabled(self):
+        self.valid_results()
+        valid, parsed = self.valid_results()
+        self.assertEqual(4, len(parsed))
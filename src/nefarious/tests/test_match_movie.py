@@ -1,6 +1,13 @@
-from nefarious.parsers.movie import MovieParser
+from unittest.mock import Mock, patch
+
+from django.contrib.auth.models import User
 from django.test import TestCase
 
+from nefarious import quality
+from nefarious.models import NefariousSettings, QualityProfile, WatchMovie
+from nefarious.parsers.movie import MovieParser
+from nefarious.processors import WatchMovieProcessor
+
 
 class MovieMatch(TestCase):
     movie_tests = []
@@ -34,3 +41,31 @@ class MovieMatch(TestCase):
         for name, title in self.movie_tests:
             parser = MovieParser(name)
             self.assertTrue(parser.is_match(title), '{} ({})'.format(name, parser.match))
+
+
+@patch('nefarious.processors.get_transmission_client', Mock())
+class MovieProcessorMatch(TestCase):
+
+    def setUp(self):
+        quality_profile, _ = QualityProfile.objects.get_or_create(name=quality.PROFILE_ANY.name, quality=quality.PROFILE_ANY.name)
+        NefariousSettings.objects.create(quality_profile_tv=quality_profile, quality_profile_movies=quality_profile)
+        user = User.objects.create_superuser('test', 'test@test.com', 'test')
+        self.watch_movie = WatchMovie.objects.create(user=user, tmdb_movie_id=1, name='The Matrix', poster_image_url='')
+
+    def processor(self, tmdb_movie: dict) -> WatchMovieProcessor:
+        tmdb_client = Mock()
+        tmdb_client.Movies.return_value.info.return_value = tmdb_movie
+        with patch('nefarious.processors.get_tmdb_client', Mock(return_value=tmdb_client)):
+            return WatchMovieProcessor(self.watch_movie.id)
+
+    def test_year(self):
+        processor = self.processor({'title': 'The Matrix', 'release_date': '1999-03-31'})
+        self.assertTrue(processor.is_match(MovieParser('The.Matrix.1999.1080p.BluRay.x264'), 1))
+        self.assertFalse(processor.is_match(MovieParser('The.Matrix.2021.1080p.BluRay.x264'), 1))
+
+    def test_missing_release_date(self):
+        # the year isn't matched
+        for tmdb_movie in ({'title': 'The Matrix', 'release_date': ''}, {'title': 'The Matrix', 'release_date': None}, {'title': 'The Matrix'}):
+            processor = self.processor(tmdb_movie)
+            self.assertIsNone(processor._get_match_plan().year)
+            self.assertTrue(processor.is_match(MovieParser('The.Matrix.2021.1080p.BluRay.x264'), 1))
@@ -0,0 +1,81 @@
+import pickle
+from decimal import Decimal
+
+from django.test import TestCase
+
+from nefarious.match_plan import MatchPlan, GB
+from nefarious.models import QualityProfile, NefariousSettings
+from nefarious.parsers.movie import MovieParser
+from nefarious.parsers.tv import TVParser
+from nefarious.quality import PROFILE_ANY, PROFILE_HD_720P
+
+
+class MatchPlanTest(TestCase):
+
+    def setUp(self):
+        self.nefarious_settings = NefariousSettings(keyword_search_filters={'KORSUB': 'Korean subs', 'dubbed': None, 'two words': None})
+        self.quality_profile = QualityProfile(name='hd', quality=PROFILE_HD_720P.name, min_size_gb=Decimal('.5'), max_size_gb=Decimal('4'))
+
+    def _plan(self, parser_class, title, **media) -> MatchPlan:
+        return MatchPlan.compile(
+            parser_class=parser_class,
+            titles=[title],
+            quality_profile=self.quality_profile,
+            nefarious_settings=self.nefarious_settings,
+            **media,
+        )
+
+    def test_episode(self):
+        plan = self._plan(TVParser, 'Atlanta', season_number=2, episode_number=4)
+        self.assertEqual(frozenset(['atlanta']), plan.titles)
+        self.assertIsNone(plan.mismatch(TVParser('Atlanta.S02E04.720p.AMZN.WEBRip.x264-GalaxyTV.mkv'), GB))
+        self.assertEqual('title', plan.mismatch(TVParser('Atlanta.S02E05.720p.AMZN.WEBRip.x264-GalaxyTV.mkv'), GB))
+        self.assertEqual('title', plan.mismatch(TVParser('Atlanta.S02.720p.AMZN.WEBRip.x264-GalaxyTV'), GB))
+        self.assertEqual('quality', plan.mismatch(TVParser('Atlanta.S02E04.1080p.AMZN.WEBRip.x264-GalaxyTV.mkv'), GB))
+        self.assertTrue(plan.mismatch(TVParser('Atlanta.S02E04.720p.AMZN.WEBRip.x264-GalaxyTV.mkv'), GB / 10).startswith('size min'))
+        self.assertTrue(plan.mismatch(TVParser('Atlanta.S02E04.720p.AMZN.WEBRip.x264-GalaxyTV.mkv'), GB * 5).startswith('size max'))
+        self.assertEqual('hardcoded subs', plan.mismatch(TVParser('Atlanta.S02E04.720p.HC.WEBRip.x264-GalaxyTV.mkv'), GB))
+        self.assertEqual('keyword search filters', plan.mismatch(TVParser('Atlanta.S02E04.720p.WEBRip.DUBBED-GalaxyTV.mkv'), GB))
+        # partial words aren't excluded
+        self.assertIsNone(plan.mismatch(TVParser('Atlanta.S02E04.720p.WEBRip.Undubbed-GalaxyTV.mkv'), GB))
+
+    def test_season(self):
+        plan = self._plan(TVParser, 'Atlanta', season_number=2)
+        self.assertIsNone(plan.mismatch(TVParser('Atlanta.S02.720p.AMZN.WEBRip.x264-GalaxyTV'), GB))
+        self.assertEqual('title', plan.mismatch(TVParser('Atlanta.S02E04.720p.AMZN.WEBRip.x264-GalaxyTV.mkv'), GB))
+
+    def test_movie(self):
+        self.quality_profile.require_hdr = True
+        plan = self._plan(MovieParser, 'The Man from U.N.C.L.E.', year='2015')
+        self.assertIsNone(plan.mismatch(MovieParser('The.Man.from.U.N.C.L.E.2015.720p.BluRay.HDR.x264-SPARKS'), GB))
+        self.assertEqual('hdr', plan.mismatch(MovieParser('The.Man.from.U.N.C.L.E.2015.720p.BluRay.x264-SPARKS'), GB))
+        self.assertEqual('title', plan.mismatch(MovieParser('The.Man.from.U.N.C.L.E.2016.720p.BluRay.HDR.x264-SPARKS'), GB))
+
+    def test_same_as_parser_checks(self):
+        # the plan agrees with the individual parser checks it replaces
+        self.quality_profile = QualityProfile(name='any', quality=PROFILE_ANY.name)
+        self.nefarious_settings.allow_hardcoded_subs = True
+        plan = self._plan(TVParser, 'Atlanta', season_number=2, episode_number=4)
+        exclusions = self.nefarious_settings.keyword_search_filters.keys()
+        for title in [
+                'Atlanta.S02E04.720p.AMZN.WEBRip.x264-GalaxyTV.mkv',
+                'Atlanta.S02E04.HC.1080p.WEB-DL.x264-KORSUB',
+                'Atlanta S02E04 two words',
+                'Atlanta S02E04 two-words',
+                'Atlanta.S02E04.DVDRip.XviD',
+                'Atlanta.S02E04.2160p.WEB-DL.x265']:
+            parser = TVParser(title)
+            expected = all([
+                parser.is_match('Atlanta', season_number=2, episode_number=4),
+                parser.is_quality_match(PROFILE_ANY),
+                parser.is_keyword_search_filter_match(exclusions),
+            ])
+            self.assertEqual(expected, plan.is_match(parser, GB), title)
+
+    def test_pickle(self):
+        plan = self._plan(TVParser, 'Atlanta', season_number=2, episode_number=4)
+        unpickled = pickle.loads(pickle.dumps(plan))
+        self.assertEqual(plan._replace(exclusions_regex=None), unpickled._replace(exclusions_regex=None))
+        self.assertEqual(plan.exclusions_regex.pattern, unpickled.exclusions_regex.pattern)
+        with self.assertRaises(AttributeError):
+            plan.season_number = 3
@@ -0,0 +1,53 @@
+from unittest.mock import Mock, patch
+
+from billiard.exceptions import TimeoutError as PoolTimeoutError
+from django.test import TestCase, override_settings
+
+from nefarious.match_plan import MatchPlan, GB
+from nefarious.match_pool import match_in_pool, match_chunk, use_pool, close_pool
+from nefarious.models import QualityProfile, NefariousSettings
+from nefarious.parsers.benchmark import load_corpus, CORPUS_TV
+from nefarious.parsers.tv import TVParser
+from nefarious.quality import PROFILE_ANY
+
+
+class MatchPoolTest(TestCase):
+
+    def tearDown(self):
+        close_pool()
+
+    def _plan(self):
+        return MatchPlan.compile(
+            parser_class=TVParser,
+            titles=['Game of Thrones'],
+            quality_profile=QualityProfile(name='any', quality=PROFILE_ANY.name),
+            nefarious_settings=NefariousSettings(),
+            season_number=6,
+        )
+
+    @override_settings(PARSER_POOL_THRESHOLD=100)
+    def test_use_pool(self):
+        self.assertFalse(use_pool(99))
+        self.assertTrue(use_pool(100))
+        with self.settings(PARSER_POOL_THRESHOLD=0):
+            self.assertFalse(use_pool(10 ** 6))
+
+    @override_settings(PARSER_POOL_PROCESSES=2)
+    def test_pool_matches_in_process(self):
+        plan = self._plan()
+        titles = load_corpus(CORPUS_TV) + ['Game.of.Thrones.S06.720p.HDTV.x264', 'Game of Thrones Season 6 1080p']
+        sizes = [GB] * len(titles)
+        expected = match_chunk(plan, titles, sizes)
+        self.assertIn(None, expected)
+        self.assertIn('title', expected)
+        self.assertEqual(expected, match_in_pool(plan, titles, sizes, chunk_size=100))
+
+    @patch('nefarious.match_pool.close_pool')
+    @patch('nefarious.match_pool.get_pool')
+    def test_pool_failure_falls_back_to_in_process(self, get_pool, close_pool):
+        get_pool.return_value.apply_async.return_value = Mock(get=Mock(side_effect=PoolTimeoutError()))
+        plan = self._plan()
+        titles = ['Game.of.Thrones.S06.720p.HDTV.x264', 'Atlanta.S02E04.720p.HDTV.x264']
+        self.assertEqual([None, 'title'], match_in_pool(plan, titles, [GB, GB]))
+        # a new pool is started next time
+        close_pool.assert_called_once_with()
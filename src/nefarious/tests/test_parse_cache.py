@@ -0,0 +1,59 @@
+from django.test import TestCase
+
+from nefarious.parsers.cache import ParseCache, parse_cache
+from nefarious.parsers.movie import MovieParser
+from nefarious.parsers.tv import TVParser
+
+
+class ParseCacheTest(TestCase):
+
+    def setUp(self):
+        parse_cache.clear()
+
+    def test_cached_parse_matches_uncached_parse(self):
+        titles = [
+            ("Atlanta.S02E04.720p.AMZN.WEBRip.x264-GalaxyTV.mkv", TVParser),
+            ("Some.Show.S01.1080p.WEB-DL", TVParser),
+            ("The.Man.from.U.N.C.L.E.2015.1080p.BluRay.x264-SPARKS", MovieParser),
+            ("not a release name", MovieParser),
+        ]
+        for title, parser_class in titles:
+            # miss then hit
+            for _ in range(2):
+                self.assertEqual(parser_class(title).match, parser_class.cached(title).match, title)
+
+        stats = parse_cache.stats()
+        self.assertEqual(len(titles), stats['misses'])
+        self.assertEqual(len(titles), stats['hits'])
+        self.assertEqual(len(titles), stats['size'])
+
+    def test_cache_is_keyed_by_parser_class(self):
+        title = "Mission.Impossible.3.2006.720p.BluRay"
+        self.assertNotEqual(TVParser.cached(title).match, MovieParser.cached(title).match)
+        self.assertEqual(2, parse_cache.stats()['misses'])
+
+    def test_cached_match_is_not_shared(self):
+        title = "Sonny.With.a.Chance.S02E15"
+        parser = TVParser.cached(title)
+        parser.match['season'].append(99)
+        parser.match['title'] = 'mutated'
+        self.assertEqual(TVParser(title).match, TVParser.cached(title).match)
+
+    def test_least_recently_used_eviction(self):
+        cache = ParseCache(max_size=2)
+        cache.set(TVParser, 'a', {'title': 'a'})
+        cache.set(TVParser, 'b', {'title': 'b'})
+        # touch "a" so "b" is the least recently used
+        self.assertTrue(cache.get(TVParser, 'a')[0])
+        cache.set(TVParser, 'c', {'title': 'c'})
+        self.assertFalse(cache.get(TVParser, 'b')[0])
+        self.assertEqual((True, {'title': 'a'}), cache.get(TVParser, 'a'))
+        self.assertEqual(2, cache.stats()['size'])
+
+    def test_parse_many_shares_repeated_titles(self):
+        titles = ["Atlanta.S02E04.720p", "Atlanta.S02E05.720p", "Atlanta.S02E04.720p"]
+        parsers = TVParser.parse_many(titles)
+        self.assertEqual(len(titles), len(parsers))
+        self.assertIs(parsers[0], parsers[2])
+        self.assertEqual([TVParser(t).match for t in titles], [p.match for p in parsers])
+        self.assertEqual(2, parse_cache.stats()['misses'])
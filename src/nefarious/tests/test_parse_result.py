@@ -0,0 +1,53 @@
+import pickle
+
+from django.test import TestCase
+
+from nefarious.parsers.movie import MovieParser
+from nefarious.parsers.result import ParseResult
+from nefarious.parsers.tv import TVParser
+
+
+class ParseResultTest(TestCase):
+
+    def test_mapping_view(self):
+        match = TVParser('Atlanta.S02E04.720p.AMZN.WEBRip.x264-GalaxyTV.mkv').match
+        self.assertIsInstance(match, ParseResult)
+        self.assertEqual('atlanta', match['title'])
+        self.assertEqual([2], match['season'])
+        self.assertEqual([4], match.get('episode'))
+        # the pattern has a year group which didn't capture anything
+        self.assertIn('year', match)
+        self.assertEqual([], match['year'])
+        self.assertEqual('fallback', match.get('not a key', 'fallback'))
+        self.assertEqual(set(match.keys()), set(match.to_dict().keys()))
+        self.assertEqual(len(match.keys()), len(match))
+        self.assertEqual(match.to_dict(), match)
+
+    def test_season_only(self):
+        match = TVParser('Atlanta.S02.720p.AMZN.WEBRip.DDP5.1.x264-NTb[rartv]').match
+        self.assertEqual([2], match['season'])
+        self.assertNotIn('episode', match)
+        self.assertIsNone(match.get('episode'))
+        with self.assertRaises(KeyError):
+            match['episode']
+
+    def test_update(self):
+        match = ParseResult(title='', seasons=[1], episodes=[5])
+        match.update(ParseResult(title='show', seasons=[2]))
+        self.assertEqual({'title': 'show', 'season': [2], 'episode': [5]}, match)
+        match.update({'episode': [6]})
+        self.assertEqual([6], match.episodes)
+        with self.assertRaises(KeyError):
+            match['not a key'] = True
+
+    def test_copy_and_pickle(self):
+        match = MovieParser('The.Man.from.U.N.C.L.E.2015.1080p.BluRay.x264-SPARKS').match
+        self.assertEqual(['2015'], match['year'])
+        for copied in [match.copy(), pickle.loads(pickle.dumps(match))]:
+            self.assertEqual(match, copied)
+        copied = match.copy()
+        copied['year'].append('2016')
+        self.assertEqual(['2015'], match['year'])
+
+    def test_no_instance_dict(self):
+        self.assertFalse(hasattr(ParseResult(), '__dict__'))
@@ -0,0 +1,43 @@
+from io import StringIO
+
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+
+from nefarious.parsers.benchmark import ParserBenchmark, CORPUS_PARSERS, CORPUS_ANIME, load_corpus, percentile
+
+
+class ParserBenchmarkTest(TestCase):
+
+    def test_corpus(self):
+        titles = []
+        for name in CORPUS_PARSERS.keys():
+            titles += load_corpus(name)
+        self.assertTrue(len(titles) >= 5000)
+        self.assertEqual(len(titles), len(set(titles)))
+
+    def test_corpus_first_match_is_the_same_as_every_match(self):
+        for name, parser_class in CORPUS_PARSERS.items():
+            parser = parser_class.__new__(parser_class)
+            for title in load_corpus(name):
+                normalized = parser.normalize_title(title)
+                matches = parser.matches(normalized)
+                self.assertEqual(matches[0] if matches else None, parser.first_match(normalized), title)
+
+    def test_report(self):
+        report = ParserBenchmark(corpora=[CORPUS_ANIME], iterations=1, track_allocations=True).run()
+        result = report['corpora'][CORPUS_ANIME]
+        self.assertEqual(len(load_corpus(CORPUS_ANIME)), result['titles'])
+        self.assertTrue(result['titles_per_sec'] > 0)
+        self.assertTrue(result['p50_us'] <= result['p99_us'] <= result['max_us'])
+        self.assertTrue(result['alloc_max_bytes'] > 0)
+        self.assertEqual(result['titles'], sum(f['count'] for f in report['families'].values()))
+
+    def test_threshold(self):
+        with self.assertRaises(CommandError):
+            call_command('benchmark-parsers', corpus=[CORPUS_ANIME], iterations=1, no_allocations=True, min_titles_per_sec=float('inf'), stdout=StringIO())
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(50, percentile(values, 50))
+        self.assertEqual(99, percentile(values, 99))
+        self.assertEqual(1, percentile([1], 99))
@@ -0,0 +1,100 @@
+from django.test import TestCase, override_settings
+
+from nefarious.parsers.dispatch import (
+    PatternDispatcher, PatternTimeout, title_features,
+    FEATURE_LEADING_BRACKET, FEATURE_SEASON_TOKEN, FEATURE_EPISODE_TOKEN, FEATURE_FOUR_DIGITS, FEATURE_PART_WORD,
+)
+from nefarious.parsers.cache import parse_cache
+from nefarious.parsers.movie import MovieParser
+from nefarious.parsers.timeouts import parser_timeouts
+from nefarious.parsers.tv import TVParser
+
+
+class PatternDispatchTest(TestCase):
+    titles = [
+        "Sonny.With.a.Chance.S02E15",
+        "Two.and.a.Half.Me.103.720p.HDTV.X264-DIMENSION",
+        "Chuck.4x05.HDTV.XviD-LOL",
+        "S03E09 WS PDTV XviD FUtV",
+        "Looney Tunes - S1936E18 - I Love to Singa",
+        "2020.NZ.2011.12.02.PDTV.XviD-C4TV",
+        "The.Daily.Show.2010.10.11.Johnny.Knoxville.iTouch-MW",
+        "[SubDESU]_High_School_DxD_07_(1280x720_x264-AAC)_[6B7FD717]",
+        "[Hatsuyuki] Naruto Shippuuden - 363 [848x480][ADE35E38]",
+        "[Doki] Mahouka Koukou no Rettousei - 07 (1280x720 Hi10P AAC) [80AF7DDE]",
+        "Dragon Ball Super Episode 56 [1080p][Hi10]",
+        "The.Kennedys.Part.2.DSR.XviD-SYS",
+        "Band.Of.Brothers.Part.One.720p.HDTV.x264-ORENJI",
+        "Wonders.of.the.Universe.1of4.HDTV.XviD-ARiA",
+        "House.S06.Season.6.720p.HDTV",
+        "Breaking.Bad.Season.5.Part.1.1080p.BluRay",
+        "Game.of.Thrones.S06E10.The.Winds.of.Winter.1080p.WEB-DL.DD5.1.H264-NTb",
+        "The.Man.from.U.N.C.L.E.2015.1080p.BluRay.x264-SPARKS",
+        "Star.Wars[PassThePopcorn]",
+        "Passengers.German.DL.AC3.Dubbed..BluRay.x264-PsO",
+        "just some words without numbers",
+    ]
+
+    def test_first_match_is_the_same_as_every_match(self):
+        for parser_class in [TVParser, MovieParser]:
+            parser = parser_class.__new__(parser_class)
+            for title in self.titles:
+                normalized = parser.normalize_title(title)
+                matches = parser.matches(normalized)
+                self.assertEqual(
+                    matches[0] if matches else None, parser.first_match(normalized),
+                    '{}: {}'.format(parser_class.__name__, title))
+
+    def test_title_features(self):
+        self.assertEqual(
+            {FEATURE_LEADING_BRACKET, FEATURE_EPISODE_TOKEN, FEATURE_FOUR_DIGITS},
+            title_features('[subdesu] high school dxd 07 (1280x720 x264-aac) [6b7fd717]'))
+        self.assertEqual(
+            {FEATURE_SEASON_TOKEN, FEATURE_EPISODE_TOKEN},
+            title_features('sonny with a chance s02e15'))
+        self.assertEqual({FEATURE_PART_WORD}, title_features('band of brothers part one'))
+        self.assertEqual(set(), title_features('just some words'))
+
+    def test_hit_counters(self):
+        dispatcher = PatternDispatcher(TVParser.media_regex_list, TVParser.media_regex_features)
+        name, match = dispatcher.first_match('sonny with a chance s02e15')
+        self.assertIsNotNone(match)
+        dispatcher.first_match('just some words')
+        stats = dispatcher.stats()
+        self.assertEqual({name: 1}, stats['hits'])
+        self.assertEqual(1, stats['misses'])
+        self.assertTrue(stats['skips'] > 0)
+
+    def test_unknown_pattern_feature(self):
+        with self.assertRaises(Exception):
+            PatternDispatcher(TVParser.media_regex_list, {'Not a pattern': FEATURE_PART_WORD})
+
+    def test_pattern_timeout(self):
+        dispatcher = PatternDispatcher(TVParser.media_regex_list, TVParser.media_regex_features)
+        title = 'word ' * 2000
+        for timeouts in [dict(pattern_timeout=1e-9), dict(title_timeout=1e-9)]:
+            with self.assertRaises(PatternTimeout):
+                dispatcher.first_match(title, **timeouts)
+        self.assertEqual(2, dispatcher.stats()['timeouts'])
+        self.assertEqual(0, dispatcher.stats()['misses'])
+        # generous budgets don't change the result
+        self.assertEqual(
+            dispatcher.first_match('sonny with a chance s02e15')[0],
+            dispatcher.first_match('sonny with a chance s02e15', pattern_timeout=5, title_timeout=5)[0])
+
+    @override_settings(PARSER_PATTERN_TIMEOUT=1e-9)
+    def test_timed_out_title_is_a_non_match(self):
+        parser_timeouts.clear()
+        title = 'Sonny.With.a.Chance.S02E15.' + 'word.' * 2000
+        with self.assertLogs('nefarious-parser-timeouts', level='WARNING') as logs:
+            self.assertIsNone(TVParser(title).match)
+            self.assertIsNone(TVParser(title).match)
+        # only logged once
+        self.assertEqual(1, len(logs.records))
+        self.assertEqual(2, parser_timeouts.count)
+        self.assertEqual(title, parser_timeouts.recent()[0]['title'])
+
+        # the timeout could be transient so it isn't cached
+        parse_cache.clear()
+        self.assertTrue(TVParser.cached(title).timed_out)
+        self.assertEqual(0, parse_cache.stats()['size'])
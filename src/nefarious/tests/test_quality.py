@@ -1,5 +1,6 @@
 from nefarious.parsers.base import ParserBase
 from nefarious import quality
+from nefarious.quality import Resolution
 from django.test import TestCase
 
 
@@ -216,3 +217,38 @@ class QualityMatch(TestCase):
             parser = ParserBase(name)
             parser_quality = parser.parse_quality(name)
             self.assertTrue(parser_quality == expected_quality, '{} : {} != {}'.format(name, parser_quality, expected_quality))
+
+    def test_release_tags(self):
+        parser = ParserBase('')
+        tags_tests = [
+            # title, resolution, hardcoded subs, hdr, 5.1
+            ("Movie.2019.2160p.UHD.BluRay.HDR.DDP5.1.x265", Resolution.R2160p, False, True, True),
+            ("Movie 2019 720p HDRip KORSUB x264", Resolution.R720p, True, False, False),
+            ("Show.S01E01.HC.1080i.HDTV.DD5.1.MPEG2", Resolution.R1080p, True, False, True),
+            ("Show.S01E01.UHD-4k.5 1", Resolution.R2160p, False, False, True),
+            ("Show.S01E01.480p.720p", Resolution.R480P, False, False, False),
+            ("Show.S01E01", Resolution.Unknown, False, False, False),
+        ]
+        for name, resolution, hc, hdr, five_point_one in tags_tests:
+            tags = parser.parse_release_tags(name)
+            self.assertEqual(
+                (resolution, hc, hdr, five_point_one),
+                (tags['resolution'], tags['hc'], tags['hdr'], tags['five_point_one']),
+                name)
+            self.assertEqual(parser.parse_quality(name), tags['quality'], name)
+
+    def test_registry(self):
+        # every quality has its own bit
+        self.assertEqual(len(quality.QUALITIES), len({q.mask for q in quality.QUALITIES}))
+        for profile in quality.PROFILES:
+            self.assertIs(profile, quality.Profile.get_from_name(profile.name.upper()))
+            for q in quality.QUALITIES:
+                self.assertIs(q, quality.Quality.get_from_name(q.name.lower()))
+                self.assertEqual(q.name in profile.qualities, profile.allows(q.name), '{} {}'.format(profile, q))
+            self.assertFalse(profile.allows('not a quality'))
+            self.assertFalse(profile.allows(None))
+        with self.assertRaises(Exception):
+            quality.Profile.get_from_name('not a profile')
+        self.assertIs(quality.HDTV_720P, quality.quality_from_extension('.MKV'))
+        self.assertIs(quality.UNKNOWN, quality.quality_from_extension('.txt'))
+        self.assertIs(quality.UNKNOWN, quality.quality_from_extension(None))
@@ -0,0 +1,145 @@
+import datetime
+from unittest.mock import Mock, patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from nefarious import quality
+from nefarious.models import (
+    NefariousSettings, QualityProfile, WatchMovie, WatchTVEpisode, WatchTVSeason, WatchTVShow,
+    MEDIA_TYPE_MOVIE, MEDIA_TYPE_TV_EPISODE, MEDIA_TYPE_TV_SEASON,
+)
+from nefarious.monitor import ReleaseMonitor, WantedIndex, mark_releases_seen, RELEASE_MONITOR_HEALTHY_KEY
+from nefarious.parsers.movie import MovieParser
+from nefarious.parsers.tv import TVParser
+from nefarious.tasks import process_release_results_task, wanted_media_task, watch_tv_episode_task
+from nefarious.tests.test_search import jackett_response
+from nefarious.tests.test_watch_show_episodes import tmdb_client
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ReleaseMonitorTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        quality_profile, _ = QualityProfile.objects.get_or_create(name=quality.PROFILE_ANY.name, quality=quality.PROFILE_ANY.name)
+        NefariousSettings.objects.create(quality_profile_tv=quality_profile, quality_profile_movies=quality_profile)
+        user = User.objects.create_superuser('test', 'test@test.com', 'test')
+        show = WatchTVShow.objects.create(user=user, tmdb_show_id=1, name="The Handmaid's Tale", poster_image_url='')
+        self.watch_episode = WatchTVEpisode.objects.create(user=user, watch_tv_show=show, tmdb_episode_id=1, season_number=2, episode_number=4)
+        self.watch_season = WatchTVSeason.objects.create(user=user, watch_tv_show=show, season_number=3)
+        self.watch_movie = WatchMovie.objects.create(
+            user=user, tmdb_movie_id=1, name='The Matrix', poster_image_url='', release_date=datetime.date(1999, 3, 31))
+        # not wanted
+        WatchTVEpisode.objects.create(user=user, watch_tv_show=show, tmdb_episode_id=2, season_number=2, episode_number=5, collected=True)
+        WatchTVEpisode.objects.create(
+            user=user, watch_tv_show=show, tmdb_episode_id=3, season_number=2, episode_number=6, release_date=datetime.date.today() + datetime.timedelta(days=7))
+
+    def test_wanted_index(self):
+        index = WantedIndex.build()
+        self.assertEqual(3, len(index))
+        self.assertEqual([(MEDIA_TYPE_TV_EPISODE, self.watch_episode.id)], index.match_tv(TVParser('The.Handmaids.Tale.S02E04.720p.HDTV.x264')))
+        self.assertEqual([(MEDIA_TYPE_TV_SEASON, self.watch_season.id)], index.match_tv(TVParser("The Handmaid's Tale S03 1080p WEB")))
+        self.assertEqual([(MEDIA_TYPE_MOVIE, self.watch_movie.id)], index.match_movie(MovieParser('The.Matrix.1999.1080p.BluRay.x264')))
+        # collected, unreleased, wrong year and unknown media
+        self.assertEqual([], index.match_tv(TVParser('The.Handmaids.Tale.S02E05.720p.HDTV.x264')))
+        self.assertEqual([], index.match_tv(TVParser('The.Handmaids.Tale.S02E06.720p.HDTV.x264')))
+        self.assertEqual([], index.match_movie(MovieParser('The.Matrix.2021.1080p.BluRay.x264')))
+        self.assertEqual([], index.match_tv(TVParser('Atlanta.S02E04.720p.HDTV.x264')))
+
+    @patch('nefarious.http_client.get')
+    def test_poll_matches_new_releases_once(self, requests_get):
+        releases = {
+            'tv': [
+                {'Title': 'The.Handmaids.Tale.S02E04.720p.HDTV.x264', 'Guid': 'tv-1', 'Size': 1, 'Seeders': 1},
+                {'Title': 'The.Handmaids.Tale.S02E04.1080p.WEB.x264', 'Guid': 'tv-2', 'Size': 1, 'Seeders': 1},
+                {'Title': 'Atlanta.S02E04.720p.HDTV.x264', 'Guid': 'tv-3', 'Size': 1, 'Seeders': 1},
+            ],
+            'movie': [
+                {'Title': 'The.Matrix.1999.1080p.BluRay.x264', 'Guid': 'movie-1', 'Size': 1, 'Seeders': 1},
+            ],
+        }
+        requests_get.side_effect = lambda url, params, timeout, stream: jackett_response(
+            releases['movie' if 2000 in params['Category[]'] else 'tv'])
+
+        matches = ReleaseMonitor().poll()
+        self.assertEqual(2, requests_get.call_count)
+        self.assertEqual(['tv-1', 'tv-2'], [r['Guid'] for r in matches[(MEDIA_TYPE_TV_EPISODE, self.watch_episode.id)]])
+        self.assertEqual(['movie-1'], [r['Guid'] for r in matches[(MEDIA_TYPE_MOVIE, self.watch_movie.id)]])
+        self.assertEqual(2, len(matches))
+
+        # matched releases are matched again until they've been processed
+        with patch.object(TVParser, 'parse_many', wraps=TVParser.parse_many) as parse_many:
+            self.assertEqual(2, len(ReleaseMonitor().poll()))
+        # the unmatched release was remembered right away
+        self.assertEqual(['The.Handmaids.Tale.S02E04.720p.HDTV.x264', 'The.Handmaids.Tale.S02E04.1080p.WEB.x264'], parse_many.call_args[0][0])
+        mark_releases_seen(['tv-1', 'tv-2', 'movie-1'])
+        self.assertEqual({}, ReleaseMonitor().poll())
+        self.assertTrue(ReleaseMonitor.is_healthy())
+
+    @patch('nefarious.http_client.get')
+    def test_releases_are_seen_once_processed(self, requests_get):
+        requests_get.side_effect = lambda url, params, timeout, stream: jackett_response(
+            [] if 2000 in params['Category[]'] else [{'Title': 'The.Handmaids.Tale.S02E04.720p.HDTV.x264', 'Guid': 'tv-1', 'Size': 1, 'Seeders': 1}])
+        results = [result.to_dict() for result in ReleaseMonitor().poll()[(MEDIA_TYPE_TV_EPISODE, self.watch_episode.id)]]
+
+        # processing failed so it's matched again
+        with patch('nefarious.tasks.WatchTVEpisodeProcessor', Mock(side_effect=Exception('transmission is down'))):
+            with self.assertRaises(Exception):
+                process_release_results_task(MEDIA_TYPE_TV_EPISODE, self.watch_episode.id, results)
+        self.assertEqual(1, len(ReleaseMonitor().poll()))
+
+        with patch('nefarious.tasks.WatchTVEpisodeProcessor'):
+            process_release_results_task(MEDIA_TYPE_TV_EPISODE, self.watch_episode.id, results)
+        self.assertEqual({}, ReleaseMonitor().poll())
+
+    @patch('nefarious.tasks.WatchTVEpisodeProcessor')
+    def test_skips_media_already_being_searched(self, processor_class):
+        key = watch_tv_episode_task.get_key(args=(self.watch_episode.id,))
+        watch_tv_episode_task.once_backend.raise_or_lock(key, timeout=60)
+        try:
+            process_release_results_task(MEDIA_TYPE_TV_EPISODE, self.watch_episode.id, [])
+        finally:
+            watch_tv_episode_task.once_backend.clear_lock(key)
+        processor_class.assert_not_called()
+
+        # the lock is released afterwards
+        process_release_results_task(MEDIA_TYPE_TV_EPISODE, self.watch_episode.id, [])
+        processor_class.assert_called_once_with(watch_media_id=self.watch_episode.id)
+        watch_tv_episode_task.once_backend.raise_or_lock(key, timeout=60)
+        watch_tv_episode_task.once_backend.clear_lock(key)
+
+    @patch('nefarious.processors.get_transmission_client', Mock())
+    @patch('nefarious.processors.get_tmdb_client', Mock(return_value=tmdb_client()))
+    def test_unmatched_releases_are_not_a_search_attempt(self):
+        results = [{'Title': 'The.Handmaids.Tale.S02E04.720p.HDTV.x264.HC', 'Guid': 'tv-1', 'Size': 1, 'Seeders': 1}]
+        process_release_results_task(MEDIA_TYPE_TV_EPISODE, self.watch_episode.id, results)
+        self.watch_episode.refresh_from_db()
+        self.assertIsNone(self.watch_episode.last_attempt_date)
+
+    @override_settings(WANTED_MEDIA_BACKFILL_INTERVAL=60 * 60)
+    @patch('nefarious.tasks.watch_movie_task.delay')
+    @patch('nefarious.tasks.watch_tv_show_season_task.delay')
+    @patch('nefarious.tasks.watch_tv_episode_task.delay')
+    def test_wanted_media_is_backfilled(self, watch_episode_delay, watch_season_delay, watch_movie_delay):
+        # searched recently
+        WatchTVEpisode.objects.filter(id=self.watch_episode.id).update(last_attempt_date=timezone.now() - datetime.timedelta(minutes=30))
+        WatchMovie.objects.filter(id=self.watch_movie.id).update(last_attempt_date=timezone.now() - datetime.timedelta(hours=2))
+
+        # everything is searched without the monitor
+        wanted_media_task()
+        watch_episode_delay.assert_called_once_with(self.watch_episode.id)
+        watch_season_delay.assert_called_once_with(self.watch_season.id)
+        watch_movie_delay.assert_called_once_with(self.watch_movie.id)
+
+        # only what wasn't searched recently while the monitor is healthy
+        watch_episode_delay.reset_mock()
+        watch_season_delay.reset_mock()
+        watch_movie_delay.reset_mock()
+        cache.set(RELEASE_MONITOR_HEALTHY_KEY, True)
+        wanted_media_task()
+        watch_episode_delay.assert_not_called()
+        watch_season_delay.assert_called_once_with(self.watch_season.id)
+        watch_movie_delay.assert_called_once_with(self.watch_movie.id)
@@ -0,0 +1,312 @@
+import json
+import pickle
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import requests
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from nefarious import quality
+from nefarious.indexers import indexer_stats, open_circuits, record_search
+from nefarious.models import NefariousSettings, QualityProfile
+from nefarious.search import SearchTorrents, SearchTorrentsCombined, SEARCH_MEDIA_TYPE_TV, dedupe_results
+from nefarious.search_result import SearchResult
+
+
+def jackett_response(results: list, ok=True, indexers: list = None):
+    content = json.dumps({'Results': results, 'Indexers': indexers or []}).encode('utf-8')
+    return Mock(ok=ok, url='http://jackett', content=b'error', iter_content=Mock(return_value=[content]))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class SearchTorrentsTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        quality_profile, _ = QualityProfile.objects.get_or_create(name=quality.PROFILE_ANY.name, quality=quality.PROFILE_ANY.name)
+        self.nefarious_settings = NefariousSettings.objects.create(quality_profile_tv=quality_profile, quality_profile_movies=quality_profile)
+
+    @patch('nefarious.http_client.get')
+    def test_deferred_search(self, requests_get):
+        requests_get.return_value = jackett_response([{'Title': 'Atlanta S02E04'}])
+        search = SearchTorrents(SEARCH_MEDIA_TYPE_TV, 'atlanta', defer=True)
+        requests_get.assert_not_called()
+        self.assertFalse(search.searched)
+        search.search()
+        self.assertTrue(search.searched)
+        self.assertEqual([{'Title': 'Atlanta S02E04'}], search.results)
+
+    @patch('nefarious.http_client.get')
+    def test_combined_searches_run_concurrently(self, requests_get):
+        def get(url, params, timeout, stream):
+            time.sleep(.3)
+            return jackett_response([{'Title': params['Query']}])
+        requests_get.side_effect = get
+
+        started = time.monotonic()
+        search = SearchTorrentsCombined([
+            SearchTorrents(SEARCH_MEDIA_TYPE_TV, 'atlanta', defer=True),
+            SearchTorrents(SEARCH_MEDIA_TYPE_TV, 'atlanta s02e04', defer=True),
+        ])
+        self.assertTrue(time.monotonic() - started < .55)
+        self.assertTrue(search.ok)
+        self.assertEqual(['atlanta', 'atlanta s02e04'], [r['Title'] for r in search.results])
+
+    @patch('nefarious.http_client.get')
+    def test_combined_partial_results(self, requests_get):
+        def get(url, params, timeout, stream):
+            if params['Query'] == 'slow':
+                time.sleep(1)
+            elif params['Query'] == 'broken':
+                raise requests.ConnectionError('connection refused')
+            return jackett_response([{'Title': params['Query']}])
+        requests_get.side_effect = get
+
+        slow = SearchTorrents(SEARCH_MEDIA_TYPE_TV, 'slow', defer=True)
+        search = SearchTorrentsCombined([
+            SearchTorrents(SEARCH_MEDIA_TYPE_TV, 'fast', defer=True),
+            slow,
+            SearchTorrents(SEARCH_MEDIA_TYPE_TV, 'broken', defer=True),
+        ], deadline=.3)
+        self.assertTrue(search.ok)
+        self.assertEqual(['fast'], [r['Title'] for r in search.results])
+        self.assertIn('did not finish', search.error_content)
+        self.assertIn('connection refused', search.error_content)
+
+        # the late search finishes (and is cached) on its own without changing what was returned
+        time.sleep(1)
+        self.assertEqual(['fast'], [r['Title'] for r in search.results])
+        self.assertFalse(slow.searched)
+        self.assertIsNone(slow.results)
+        self.assertEqual(['slow'], [r['Title'] for r in cache.get(slow.cache_key())['results']])
+
+    @patch('nefarious.http_client.get')
+    def test_cached_search(self, requests_get):
+        requests_get.return_value = jackett_response([{'Title': 'Atlanta S02E04'}])
+        search = SearchTorrents(SEARCH_MEDIA_TYPE_TV, 'Atlanta')
+        self.assertIsNone(search.cache_age)
+        # normalized query shares the cached results
+        search = SearchTorrents(SEARCH_MEDIA_TYPE_TV, '  atlanta ')
+        self.assertEqual(1, requests_get.call_count)
+        self.assertIsNotNone(search.cache_age)
+        self.assertEqual([{'Title': 'Atlanta S02E04'}], search.results)
+        # failed searches aren't cached
+        requests_get.return_value = jackett_response([], ok=False)
+        SearchTorrents(SEARCH_MEDIA_TYPE_TV, 'atlanta s02e04')
+        SearchTorrents(SEARCH_MEDIA_TYPE_TV, 'atlanta s02e04')
+        self.assertEqual(3, requests_get.call_count)
+
+    @patch('nefarious.tasks.refresh_search_torrents_task.delay')
+    @patch('nefarious.http_client.get')
+    def test_stale_search_refreshes_once(self, requests_get, refresh_delay):
+        requests_get.return_value = jackett_response([{'Title': 'Atlanta S02E04'}])
+        with override_settings(JACKETT_CACHE_TTL=1):
+            SearchTorrents(SEARCH_MEDIA_TYPE_TV, 'atlanta')
+            refresh_delay.assert_not_called()
+            with patch('nefarious.search.time.time', return_value=time.time() + 5):
+                search = SearchTorrents(SEARCH_MEDIA_TYPE_TV, 'atlanta')
+                SearchTorrents(SEARCH_MEDIA_TYPE_TV, 'atlanta')
+        # stale results are still used while a single refresh is queued
+        self.assertEqual([{'Title': 'Atlanta S02E04'}], search.results)
+        self.assertTrue(search.cache_age > 1)
+        self.assertEqual(1, requests_get.call_count)
+        refresh_delay.assert_called_once_with(SEARCH_MEDIA_TYPE_TV, 'atlanta')
+
+    @patch('nefarious.http_client.get')
+    def test_search_without_query(self, requests_get):
+        requests_get.return_value = jackett_response([{'Title': 'Atlanta S02E04'}])
+        for _ in range(2):
+            search = SearchTorrents(SEARCH_MEDIA_TYPE_TV, None)
+            self.assertEqual([{'Title': 'Atlanta S02E04'}], search.results)
+        # the same as an empty query
+        self.assertEqual(search.cache_key(), SearchTorrents(SEARCH_MEDIA_TYPE_TV, '', defer=True).cache_key())
+        self.assertEqual(1, requests_get.call_count)
+
+    @override_settings(JACKETT_INDEXER_DEADLINE=.3)
+    @patch('nefarious.search.get_indexers')
+    @patch('nefarious.http_client.get')
+    def test_fan_out_search(self, requests_get, get_indexers):
+        self.nefarious_settings.jackett_fan_out_search = True
+        self.nefarious_settings.save()
+        get_indexers.return_value = ['fast', 'slow', 'broken']
+
+        def get(url, params, timeout, stream):
+            indexer = url.split('/')[-2]
+            if indexer == 'slow':
+                time.sleep(.6)
+            elif indexer == 'broken':
+                raise requests.ConnectionError('connection refused')
+            return jackett_response([{'Title': indexer}])
+        requests_get.side_effect = get
+
+        started = time.monotonic()
+        search = SearchTorrents(SEARCH_MEDIA_TYPE_TV, 'atlanta')
+        # the slow indexer doesn't hold up the search
+        self.assertTrue(time.monotonic() - started < .55)
+        self.assertTrue(search.ok)
+        self.assertEqual(['fast'], [r['Title'] for r in search.results])
+        # incomplete results aren't cached
+        self.assertTrue(search.partial)
+        self.assertIsNone(cache.get(search.cache_key()))
+
+        stats = {s['indexer']: s for s in indexer_stats(['fast', 'broken'])}
+        self.assertEqual(1, stats['fast']['searches'])
+        self.assertEqual(1, stats['fast']['results'])
+        self.assertIsNotNone(stats['fast']['latency_avg'])
+        self.assertEqual(1, stats['broken']['errors'])
+        self.assertIn('connection refused', stats['broken']['last_error'])
+
+        # every indexer responding is cached
+        get_indexers.return_value = ['fast']
+        search = SearchTorrents(SEARCH_MEDIA_TYPE_TV, 'atlanta s02e03')
+        self.assertFalse(search.partial)
+        self.assertIsNotNone(cache.get(search.cache_key()))
+
+        # every indexer failing fails the search
+        get_indexers.return_value = ['broken']
+        search = SearchTorrents(SEARCH_MEDIA_TYPE_TV, 'atlanta s02e04')
+        self.assertFalse(search.ok)
+        self.assertIn('connection refused', search.error_content)
+
+    @override_settings(JACKETT_INDEXER_FAILURES=2, JACKETT_INDEXER_COOL_DOWN=.3)
+    @patch('nefarious.search.get_indexers', Mock(return_value=['good', 'down']))
+    @patch('nefarious.http_client.get')
+    def test_failing_indexers_are_excluded(self, requests_get):
+        statuses = [
+            {'ID': 'good', 'Name': 'Good', 'Status': 2, 'Results': 1, 'Error': None, 'ElapsedTime': 500},
+            {'ID': 'down', 'Name': 'Down', 'Status': 1, 'Results': 0, 'Error': 'The operation has timed out.', 'ElapsedTime': 20000},
+        ]
+        requests_get.side_effect = lambda url, params, timeout, stream: jackett_response(
+            [{'Title': url.split('/')[-2]}], indexers=statuses if '/all/' in url else [])
+
+        # the aggregate response's indexer statuses are recorded
+        SearchTorrents(SEARCH_MEDIA_TYPE_TV, 'atlanta s02e01')
+        stats = {s['indexer']: s for s in indexer_stats(['good', 'down'])}
+        self.assertEqual(1, stats['good']['results'])
+        self.assertEqual(.5, stats['good']['latency_last'])
+        self.assertEqual(1, stats['down']['errors'])
+        self.assertIn('timed out', stats['down']['last_error'])
+        self.assertEqual([], open_circuits())
+
+        # failing again opens its circuit so only the healthy indexer is searched
+        SearchTorrents(SEARCH_MEDIA_TYPE_TV, 'atlanta s02e02')
+        self.assertEqual(['down'], open_circuits())
+        self.assertFalse({s['indexer']: s for s in indexer_stats(['down'])}['down']['healthy'])
+        requests_get.reset_mock()
+        search = SearchTorrents(SEARCH_MEDIA_TYPE_TV, 'atlanta s02e03')
+        self.assertTrue(search.ok)
+        self.assertEqual(['good'], [call[0][0].split('/')[-2] for call in requests_get.call_args_list])
+        # and the results without it are cached until it's retried
+        self.assertTrue(search.degraded)
+        self.assertFalse(search.partial)
+        self.assertEqual(.3, cache.get(search.cache_key())['ttl'])
+
+        # it's retried after the cool-down and closes once it succeeds
+        time.sleep(.35)
+        statuses[1].update(Status=2, Error=None, ElapsedTime=1000)
+        requests_get.reset_mock()
+        SearchTorrents(SEARCH_MEDIA_TYPE_TV, 'atlanta s02e04')
+        self.assertEqual(['all'], [call[0][0].split('/')[-2] for call in requests_get.call_args_list])
+        self.assertEqual([], open_circuits())
+        self.assertTrue({s['indexer']: s for s in indexer_stats(['down'])}['down']['healthy'])
+
+    @patch('nefarious.http_client.get')
+    def test_failing_indexer_results_are_cached(self, requests_get):
+        statuses = [
+            {'ID': 'good', 'Name': 'Good', 'Status': 2, 'Results': 1, 'Error': None, 'ElapsedTime': 500},
+            {'ID': 'down', 'Name': 'Down', 'Status': 1, 'Results': 0, 'Error': 'The operation has timed out.', 'ElapsedTime': 20000},
+        ]
+        requests_get.return_value = jackett_response([{'Title': 'Atlanta S02E04'}], indexers=statuses)
+        search = SearchTorrents(SEARCH_MEDIA_TYPE_TV, 'atlanta')
+        self.assertTrue(search.degraded)
+        self.assertIsNone(search.cache_age)
+        # an indexer that's down doesn't stop the next search being served from the cache
+        search = SearchTorrents(SEARCH_MEDIA_TYPE_TV, 'atlanta')
+        self.assertEqual([{'Title': 'Atlanta S02E04'}], search.results)
+        self.assertIsNotNone(search.cache_age)
+        self.assertEqual(1, requests_get.call_count)
+
+    @override_settings(JACKETT_INDEXER_FAILURES=2)
+    @patch('nefarious.search.get_indexers', Mock(return_value=['down']))
+    @patch('nefarious.http_client.get')
+    def test_every_indexer_failing_searches_all(self, requests_get):
+        requests_get.side_effect = lambda url, params, timeout, stream: jackett_response([{'Title': url.split('/')[-2]}])
+        record_search('down', 1, error='timed out')
+        record_search('down', 1, error='timed out')
+        self.assertEqual(['down'], open_circuits())
+        # there's nothing left to fan out to so it's still a single search of all indexers
+        search = SearchTorrents(SEARCH_MEDIA_TYPE_TV, 'atlanta')
+        self.assertEqual(['all'], [r['Title'] for r in search.results])
+
+    @override_settings(JACKETT_INDEXER_FAILURES=50)
+    def test_concurrent_failures_are_counted(self):
+        threads = [threading.Thread(target=record_search, args=('busy', 1), kwargs=dict(error='timed out')) for _ in range(50)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = indexer_stats(['busy'])[0]
+        self.assertEqual(50, stats['errors'])
+        self.assertEqual(50, stats['failures_consecutive'])
+        self.assertFalse(stats['healthy'])
+        self.assertEqual(['busy'], open_circuits())
+
+    @patch('nefarious.http_client.get')
+    def test_combined_results_are_unique(self, requests_get):
+        requests_get.side_effect = lambda url, params, timeout, stream: jackett_response([
+            {'Title': 'Atlanta S02E04', 'Guid': 'https://tracker/1'},
+            {'Title': params['Query'], 'Guid': params['Query']},
+        ])
+        search = SearchTorrentsCombined([
+            SearchTorrents(SEARCH_MEDIA_TYPE_TV, 'atlanta', defer=True),
+            SearchTorrents(SEARCH_MEDIA_TYPE_TV, 'atlanta s02e04', defer=True),
+        ])
+        self.assertEqual(['https://tracker/1', 'atlanta', 'atlanta s02e04'], [r['Guid'] for r in search.results])
+
+
+class DedupeResultsTest(TestCase):
+
+    def test_dedupe_results(self):
+        info_hash = 'c12fe1c06bba254a9dc9f519b335aa7c1367a88a'
+        results = [
+            {'Title': 'hash', 'InfoHash': info_hash.upper(), 'Seeders': 5, 'Guid': 'a'},
+            {'Title': 'guid', 'Guid': 'https://tracker/1', 'Seeders': 1},
+            # same info hash, base32 encoded in the magnet, with more seeders
+            {'Title': 'magnet', 'MagnetUri': 'magnet:?xt=urn:btih:YEX6DQDLXISUVHOJ6UM3GNNKPQJWPKEK&dn=test', 'Seeders': 9, 'Guid': 'b'},
+            {'Title': 'guid copy', 'Guid': 'https://tracker/1', 'Seeders': None},
+            {'Title': 'link', 'Link': 'http://jackett:9117/dl/tracker/?jackett_apikey=abc&path=1&file=Atlanta', 'Seeders': 2},
+            {'Title': 'link copy', 'Link': 'HTTP://Jackett:9117/dl/tracker?path=1&jackett_apikey=xyz', 'Seeders': 3},
+            {'Title': 'unknown', 'Seeders': 1},
+            {'Title': 'unknown', 'Seeders': 1},
+        ]
+        unique, removed = dedupe_results([SearchResult.from_jackett(result) for result in results])
+        # the best seeded copy is kept where the torrent was first found
+        self.assertEqual(['magnet', 'guid', 'link copy', 'unknown', 'unknown'], [r['Title'] for r in unique])
+        self.assertEqual(3, removed)
+
+
+class SearchResultTest(TestCase):
+
+    def test_search_result(self):
+        result = SearchResult.from_jackett({
+            'Title': 'Atlanta S02E04', 'Size': '1073741824', 'Seeders': 10, 'Guid': 'https://tracker/1',
+            'Link': None, 'MagnetUri': 'magnet:?xt=urn:btih:abc', 'Description': 'dropped', 'Category': [5000],
+        })
+        self.assertEqual(1024 ** 3, result.size)
+        self.assertEqual(10, result['Seeders'])
+        # absent and null fields aren't keys
+        self.assertNotIn('Link', result)
+        self.assertNotIn('Description', result)
+        self.assertIsNone(result.get('Link'))
+        with self.assertRaises(KeyError):
+            result['Link']
+        result['torrent_url'] = result.magnet_uri
+        self.assertEqual({
+            'Title': 'Atlanta S02E04', 'Size': 1024 ** 3, 'Seeders': 10, 'Guid': 'https://tracker/1',
+            'MagnetUri': 'magnet:?xt=urn:btih:abc', 'torrent_url': 'magnet:?xt=urn:btih:abc',
+        }, result.to_dict())
+        # round trips through the cache and task arguments
+        self.assertEqual(result, pickle.loads(pickle.dumps(result)))
+        self.assertEqual(result, SearchResult.from_jackett(json.loads(json.dumps(result.to_dict()))))
@@ -0,0 +1,136 @@
+from unittest.mock import Mock, patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from nefarious import quality
+from nefarious.models import NefariousSettings, QualityProfile, WatchTVEpisode, WatchTVShow, MEDIA_TYPE_TV_EPISODE
+from nefarious.parsers.tv import TVParser
+from nefarious.processors import WatchTVEpisodeProcessor
+from nefarious.search_tiers import tier_stats, TIER_EPISODE, TIER_TITLE
+from nefarious.tests.test_search import jackett_response
+from nefarious.tests.test_watch_show_episodes import tmdb_client
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+@patch('nefarious.processors.get_tmdb_client', Mock(return_value=tmdb_client()))
+class SearchTiersTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        quality_profile, _ = QualityProfile.objects.get_or_create(name=quality.PROFILE_ANY.name, quality=quality.PROFILE_ANY.name)
+        NefariousSettings.objects.create(quality_profile_tv=quality_profile, quality_profile_movies=quality_profile)
+        user = User.objects.create_superuser('test', 'test@test.com', 'test')
+        show = WatchTVShow.objects.create(user=user, tmdb_show_id=1, name='Atlanta', poster_image_url='')
+        self.watch_episode = WatchTVEpisode.objects.create(user=user, watch_tv_show=show, tmdb_episode_id=1, season_number=2, episode_number=4)
+
+    def fetch(self, results: dict):
+        # "results" are the jackett results for each query
+        transmission_client = Mock()
+        torrent = Mock(id=1, hashString='abc')
+        torrent.name = 'Atlanta'
+        transmission_client.add_torrent.return_value = torrent
+        transmission_client.session_stats.return_value = Mock(download_dir='/downloads')
+        with patch('nefarious.processors.get_transmission_client', Mock(return_value=transmission_client)), \
+                patch('nefarious.http_client.get') as requests_get:
+            requests_get.side_effect = lambda url, params, timeout, stream: jackett_response(results.get(params['Query'], []))
+            found = WatchTVEpisodeProcessor(self.watch_episode.id).fetch()
+        return found, [call[0][1]['Query'] for call in requests_get.call_args_list]
+
+    def result(self, title: str) -> dict:
+        return {'Title': title, 'Size': 1, 'Seeders': 1, 'Guid': title, 'Link': None, 'MagnetUri': 'magnet:?xt=urn:btih:abc'}
+
+    def test_specific_query_first(self):
+        found, queries = self.fetch({
+            'Atlanta s02e04': [self.result('Atlanta.S02E04.720p.HDTV.x264')],
+            'Atlanta': [self.result('Atlanta.S02E04.1080p.WEB.x264')],
+        })
+        self.assertTrue(found)
+        # the broad query isn't needed
+        self.assertEqual(['Atlanta s02e04'], queries)
+        self.assertEqual({'searches': 1, 'wins': 1}, tier_stats()[MEDIA_TYPE_TV_EPISODE][TIER_EPISODE])
+        self.assertEqual({'searches': 0, 'wins': 0}, tier_stats()[MEDIA_TYPE_TV_EPISODE][TIER_TITLE])
+
+    def test_widens_without_acceptable_results(self):
+        found, queries = self.fetch({
+            'Atlanta s02e04': [self.result('Atlanta.S02E05.720p.HDTV.x264')],
+            'Atlanta': [self.result('Atlanta.S02E04.1080p.WEB.x264')],
+        })
+        self.assertTrue(found)
+        self.assertEqual(['Atlanta s02e04', 'Atlanta'], queries)
+        self.assertEqual({'searches': 1, 'wins': 0}, tier_stats()[MEDIA_TYPE_TV_EPISODE][TIER_EPISODE])
+        self.assertEqual({'searches': 1, 'wins': 1}, tier_stats()[MEDIA_TYPE_TV_EPISODE][TIER_TITLE])
+
+        # nothing acceptable in any tier
+        cache.clear()
+        found, queries = self.fetch({})
+        self.assertFalse(found)
+        self.watch_episode.refresh_from_db()
+        self.assertIsNotNone(self.watch_episode.last_attempt_date)
+
+    def test_title_variants_are_searched_together(self):
+        client = tmdb_client()
+        client.TV.return_value.info.return_value = {
+            'name': "The Handmaid's Tale", 'original_name': "The Handmaid's Tale",
+            'alternative_titles': {'results': [
+                {'iso_3166_1': 'FR', 'title': 'La Servante écarlate'},
+                {'iso_3166_1': 'DE', 'title': 'Der Report der Magd'},
+                {'iso_3166_1': 'GB', 'title': 'Handmaids Tale'},
+            ]},
+        }
+        with patch('nefarious.processors.get_tmdb_client', Mock(return_value=client)):
+            found, queries = self.fetch({
+                # only found by the possessive-stripped title
+                'The Handmaids Tale': [self.result('The.Handmaids.Tale.S02E04.1080p.WEB.x264')],
+            })
+        self.assertTrue(found)
+        # every variant of a tier is searched (concurrently) before widening
+        self.assertEqual(
+            {"The Handmaid's Tale s02e04", 'The Handmaids Tale s02e04', 'Handmaids Tale s02e04', 'La Servante écarlate s02e04'},
+            set(queries[:4]))
+        self.assertEqual(
+            {"The Handmaid's Tale", 'The Handmaids Tale', 'Handmaids Tale', 'La Servante écarlate'},
+            set(queries[4:]))
+
+    def test_alternative_titles_of_the_languages_country_first(self):
+        client = tmdb_client()
+        client.TV.return_value.info.return_value = {
+            'name': 'Attack on Titan', 'original_name': '進撃の巨人',
+            'alternative_titles': {'results': [
+                {'iso_3166_1': 'US', 'title': 'AoT'},
+                {'iso_3166_1': 'FR', 'title': "L'Attaque des Titans"},
+                {'iso_3166_1': 'JP', 'title': 'Shingeki no Kyojin'},
+            ]},
+        }
+        nefarious_settings = NefariousSettings.get()
+        nefarious_settings.language = 'ja'
+        nefarious_settings.save()
+        with patch('nefarious.processors.get_tmdb_client', Mock(return_value=client)), \
+                patch('nefarious.processors.get_transmission_client', Mock()):
+            processor = WatchTVEpisodeProcessor(self.watch_episode.id)
+        # japanese is "ja" while japan is "JP"
+        self.assertEqual(['Attack on Titan', '進撃の巨人', 'Shingeki no Kyojin', 'AoT'], processor.get_title_variants())
+
+    @patch('nefarious.processors.MAX_TITLE_VARIANTS', 5)
+    def test_generic_alternative_titles_are_not_matched(self):
+        client = tmdb_client()
+        client.TV.return_value.info.return_value = {
+            'name': 'Attack on Titan', 'original_name': '進撃の巨人',
+            'alternative_titles': {'results': [
+                {'iso_3166_1': 'US', 'title': 'AoT'},
+                {'iso_3166_1': 'US', 'title': 'The Titans'},
+                {'iso_3166_1': 'US', 'title': 'Shingeki no Kyojin'},
+            ]},
+        }
+        with patch('nefarious.processors.get_tmdb_client', Mock(return_value=client)), \
+                patch('nefarious.processors.get_transmission_client', Mock()):
+            processor = WatchTVEpisodeProcessor(self.watch_episode.id)
+        # every title is searched but only the distinctive alternative titles are matched
+        self.assertEqual(['Attack on Titan', '進撃の巨人', 'AoT', 'The Titans', 'Shingeki no Kyojin'], processor.get_title_variants())
+        self.assertEqual(['Attack on Titan', '進撃の巨人', 'Shingeki no Kyojin'], processor.get_match_titles())
+        # so unrelated releases with a generic alternative title aren't a match
+        self.assertFalse(processor.is_match(TVParser('Titans.S02E04.720p.HDTV.x264'), 1))
+        self.assertFalse(processor.is_match(TVParser('AoT.S02E04.720p.HDTV.x264'), 1))
+        self.assertTrue(processor.is_match(TVParser('Attack.on.Titan.S02E04.720p.HDTV.x264'), 1))
+        self.assertTrue(processor.is_match(TVParser('Shingeki.no.Kyojin.S02E04.720p.HDTV.x264'), 1))
@@ -0,0 +1,70 @@
+import threading
+import time
+from unittest.mock import Mock, patch
+
+from django.test import TestCase, override_settings
+
+from nefarious.models import NefariousSettings
+from nefarious.search_result import SearchResult
+from nefarious.utils import results_with_valid_urls
+
+
+def torrent_response(url: str):
+    return Mock(ok=True, is_redirect=True, headers={'Location': 'magnet:?xt=urn:btih:{}'.format(url.split('?')[0].rsplit('/', 1)[-1])})
+
+
+class TraceUrlsTest(TestCase):
+
+    def nefarious_settings(self, host: str):
+        # each test uses its own host so the per-host limits don't carry over
+        return NefariousSettings(jackett_host=host, jackett_port=9117)
+
+    @override_settings(TORRENT_TRACE_CONCURRENCY=10, TORRENT_TRACE_HOST_CONCURRENCY=3)
+    @patch('nefarious.http_client.get')
+    def test_traced_concurrently_per_host(self, requests_get):
+        active = []
+        most_active = []
+        lock = threading.Lock()
+
+        def get(url, allow_redirects, timeout):
+            with lock:
+                active.append(url)
+                most_active.append(len(active))
+            time.sleep(.1)
+            with lock:
+                active.remove(url)
+            return torrent_response(url)
+        requests_get.side_effect = get
+
+        results = [SearchResult(title=str(i), link='http://jackett/dl/{}'.format(i)) for i in range(9)]
+        results.insert(4, SearchResult(title='magnet', magnet_uri='magnet:?xt=urn:btih:magnet'))
+
+        started = time.monotonic()
+        traced = results_with_valid_urls(results, self.nefarious_settings('concurrent'))
+        # three at a time rather than one after another
+        self.assertTrue(time.monotonic() - started < .6)
+        self.assertEqual(3, max(most_active))
+        self.assertEqual(9, requests_get.call_count)
+        # in the original order
+        self.assertEqual([result.title for result in results], [result.title for result in traced])
+        self.assertEqual('magnet:?xt=urn:btih:0', traced[0].torrent_url)
+        self.assertEqual('magnet:?xt=urn:btih:magnet', traced[4].torrent_url)
+
+    @override_settings(TORRENT_TRACE_DEADLINE=.3)
+    @patch('nefarious.http_client.get')
+    def test_deadline_and_failures(self, requests_get):
+        def get(url, allow_redirects, timeout):
+            self.assertTrue(timeout <= .3)
+            if '/slow' in url:
+                time.sleep(1)
+            elif '/broken' in url:
+                raise Exception('connection refused')
+            return torrent_response(url)
+        requests_get.side_effect = get
+
+        results = [SearchResult(title=name, link='http://jackett/dl/{}'.format(name)) for name in ('slow', 'fast', 'broken')]
+        started = time.monotonic()
+        traced = results_with_valid_urls(results, self.nefarious_settings('deadline'))
+        # the slow trace doesn't hold up the others
+        self.assertTrue(time.monotonic() - started < .6)
+        self.assertEqual(['fast'], [result.title for result in traced])
@@ -0,0 +1,109 @@
+from unittest.mock import Mock, patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from nefarious import quality
+from nefarious.models import NefariousSettings, QualityProfile, WatchTVEpisode, WatchTVShow
+from nefarious.parsers.tv import TVParser
+from nefarious.tasks import watch_tv_episode_task, watch_tv_show_episodes_task
+from nefarious.tests.test_search import jackett_response
+
+
+def tmdb_client():
+    client = Mock()
+    client.TV.return_value.info.return_value = {'name': 'Atlanta'}
+
+    def tv_episodes(show_id, season_number, episode_number):
+        episode = Mock()
+        episode.info.return_value = {'season_number': season_number, 'episode_number': episode_number}
+        return episode
+    client.TV_Episodes.side_effect = tv_episodes
+    return client
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class WatchTVShowEpisodesTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        quality_profile, _ = QualityProfile.objects.get_or_create(name=quality.PROFILE_ANY.name, quality=quality.PROFILE_ANY.name)
+        NefariousSettings.objects.create(quality_profile_tv=quality_profile, quality_profile_movies=quality_profile)
+        user = User.objects.create_superuser('test', 'test@test.com', 'test')
+        show = WatchTVShow.objects.create(user=user, tmdb_show_id=1, name='Atlanta', poster_image_url='')
+        self.watch_episodes = [
+            WatchTVEpisode.objects.create(
+                user=user, watch_tv_show=show, tmdb_episode_id=episode_number, season_number=2, episode_number=episode_number)
+            for episode_number in range(1, 4)
+        ]
+
+    @patch('nefarious.processors.get_transmission_client')
+    @patch('nefarious.processors.get_tmdb_client')
+    @patch('nefarious.http_client.get')
+    def test_show_is_searched_and_parsed_once(self, requests_get, get_tmdb_client, get_transmission_client):
+        client = tmdb_client()
+        get_tmdb_client.return_value = client
+        requests_get.side_effect = lambda url, params, timeout, stream: jackett_response(
+            [{'Title': 'Other Show S02E01', 'Size': 1, 'Guid': params['Query']}])
+
+        with patch('nefarious.processors.TVParser.parse_many', wraps=TVParser.parse_many) as parse_many:
+            watch_tv_show_episodes_task([e.id for e in self.watch_episodes])
+
+        # one show lookup, one show search plus one per episode, and a single parse
+        self.assertEqual(1, client.TV.call_count)
+        self.assertEqual(
+            ['Atlanta', 'Atlanta s02e01', 'Atlanta s02e02', 'Atlanta s02e03'],
+            sorted(call[0][1]['Query'] for call in requests_get.call_args_list))
+        self.assertEqual(1, parse_many.call_count)
+        for watch_episode in self.watch_episodes:
+            watch_episode.refresh_from_db()
+            self.assertIsNotNone(watch_episode.last_attempt_date)
+
+    @patch('nefarious.processors.get_transmission_client')
+    @patch('nefarious.processors.get_tmdb_client')
+    @patch('nefarious.http_client.get')
+    def test_episode_lookup_failure_skips_only_that_episode(self, requests_get, get_tmdb_client, get_transmission_client):
+        client = tmdb_client()
+        tv_episodes = client.TV_Episodes.side_effect
+
+        def tv_episodes_missing(show_id, season_number, episode_number):
+            if episode_number == 2:
+                raise Exception('404 Client Error: Not Found')
+            return tv_episodes(show_id, season_number, episode_number)
+        client.TV_Episodes.side_effect = tv_episodes_missing
+        get_tmdb_client.return_value = client
+        requests_get.side_effect = lambda url, params, timeout, stream: jackett_response(
+            [{'Title': 'Other Show S02E01', 'Size': 1, 'Guid': params['Query']}])
+
+        watch_tv_show_episodes_task([e.id for e in self.watch_episodes])
+
+        # the other episodes are still searched, sharing a single transmission client
+        self.assertEqual(
+            ['Atlanta', 'Atlanta s02e01', 'Atlanta s02e03'],
+            sorted(call[0][1]['Query'] for call in requests_get.call_args_list))
+        self.assertEqual(1, get_transmission_client.call_count)
+        missing = self.watch_episodes[1]
+        for watch_episode in self.watch_episodes:
+            watch_episode.refresh_from_db()
+            if watch_episode == missing:
+                self.assertIsNone(watch_episode.last_attempt_date)
+            else:
+                self.assertIsNotNone(watch_episode.last_attempt_date)
+
+    @patch('nefarious.tasks.WatchTVShowEpisodesProcessor')
+    def test_skips_episodes_already_queued(self, processor_class):
+        queued, *others = self.watch_episodes
+        queued_key = watch_tv_episode_task.get_key(args=(queued.id,))
+        watch_tv_episode_task.once_backend.raise_or_lock(queued_key, timeout=60)
+        try:
+            watch_tv_show_episodes_task([e.id for e in self.watch_episodes])
+        finally:
+            watch_tv_episode_task.once_backend.clear_lock(queued_key)
+
+        processor_class.assert_called_once_with([e.id for e in others])
+        # the episode locks are released afterwards
+        for watch_episode in others:
+            key = watch_tv_episode_task.get_key(args=(watch_episode.id,))
+            watch_tv_episode_task.once_backend.raise_or_lock(key, timeout=60)
+            watch_tv_episode_task.once_backend.clear_lock(key)
@@ -1,7 +1,67 @@
 import tmdbsimple as tmdb
+from nefarious import http_client
 from nefarious.models import NefariousSettings
 
 
 def get_tmdb_client(nefarious_settings: NefariousSettings):
     tmdb.API_KEY = nefarious_settings.tmdb_token
+    # use the shared keep-alive session (which also applies a default timeout)
+    tmdb.REQUESTS_SESSION = http_client.get_session()
     return tmdb
+
+
+# countries (tmdb's iso_3166_1) where each language (iso_639_1) is primarily spoken, most populous first.
+# the codes often differ, i.e japanese "ja" is japan "JP" and english "en" isn't a country at all
+LANGUAGE_COUNTRIES = {
+    'ar': ['EG', 'SA', 'AE', 'MA'],
+    'bg': ['BG'],
+    'bn': ['BD', 'IN'],
+    'ca': ['ES'],
+    'cs': ['CZ'],
+    'da': ['DK'],
+    'de': ['DE', 'AT', 'CH'],
+    'el': ['GR', 'CY'],
+    'en': ['US', 'GB', 'CA', 'AU', 'NZ', 'IE'],
+    'es': ['ES', 'MX', 'AR', 'CO'],
+    'et': ['EE'],
+    'fa': ['IR'],
+    'fi': ['FI'],
+    'fr': ['FR', 'CA', 'BE', 'CH'],
+    'he': ['IL'],
+    'hi': ['IN'],
+    'hr': ['HR'],
+    'hu': ['HU'],
+    'id': ['ID'],
+    'it': ['IT'],
+    'ja': ['JP'],
+    'ka': ['GE'],
+    'ko': ['KR'],
+    'lt': ['LT'],
+    'lv': ['LV'],
+    'ms': ['MY'],
+    'nb': ['NO'],
+    'nl': ['NL', 'BE'],
+    'no': ['NO'],
+    'pl': ['PL'],
+    'pt': ['BR', 'PT'],
+    'ro': ['RO'],
+    'ru': ['RU'],
+    'sk': ['SK'],
+    'sl': ['SI'],
+    'sr': ['RS'],
+    'sv': ['SE'],
+    'ta': ['IN', 'LK'],
+    'te': ['IN'],
+    'th': ['TH'],
+    'tl': ['PH'],
+    'tr': ['TR'],
+    'uk': ['UA'],
+    'ur': ['PK'],
+    'vi': ['VN'],
+    'zh': ['CN', 'TW', 'HK', 'SG'],
+}
+
+
+def get_language_countries(language: str) -> list:
+    # countries of the language, which is none for an unknown language (rather than guessing its code is also a country)
+    return LANGUAGE_COUNTRIES.get((language or '').lower(), [])
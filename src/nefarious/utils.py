@@ -1,13 +1,17 @@
 import re
 import os
 import logging
+import threading
+import time
 import regex
-import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 from typing import List
+from django.conf import settings
 import xml.etree.ElementTree as ET
 from urllib.parse import urlparse
 from transmissionrpc import TransmissionError
 
+from nefarious import http_client
 from nefarious.jackett import get_jackett_search_url
 from nefarious.models import NefariousSettings, WatchMovie, WatchTVSeason, WatchTVEpisode, WatchMediaBase, TorrentBlacklist
 from nefarious.tmdb import get_tmdb_client
@@ -30,13 +34,13 @@ def swap_jackett_host(url: str, nefarious_settings: NefariousSettings) -> str:
     )
 
 
-def trace_torrent_url(url: str) -> str:
+def trace_torrent_url(url: str, timeout: float = 30) -> str:
 
     if is_magnet_url(url):
         return url
 
     # validate torrent file response
-    response = requests.get(url, allow_redirects=False, timeout=30)
+    response = http_client.get(url, allow_redirects=False, timeout=timeout)
     if not response.ok:
         raise Exception(response.content)
     # redirected to a magnet link so use that instead
@@ -72,7 +76,7 @@ def verify_settings_jackett(nefarious_settings: NefariousSettings):
     """
     try:
         # make an unspecified query to the indexer results endpoint and see if it's successful
-        response = requests.get(
+        response = http_client.get(
             get_jackett_search_url(nefarious_settings),
             params={"apikey": nefarious_settings.jackett_token},
             timeout=60,
@@ -89,7 +93,7 @@ def fetch_jackett_indexers(nefarious_settings: NefariousSettings) -> List[str]:
     To get all Jackett indexers including their capabilities you can use t=indexers on the all indexer.
     To get only configured/unconfigured indexers you can also add configured=true/false as query parameter.
     """
-    response = requests.get('http://{}:{}/api/v2.0/indexers/all/results/torznab/api'.format(
+    response = http_client.get('http://{}:{}/api/v2.0/indexers/all/results/torznab/api'.format(
         nefarious_settings.jackett_host, nefarious_settings.jackett_port),
         params={
             'apikey': nefarious_settings.jackett_token,
@@ -104,39 +108,73 @@ def fetch_jackett_indexers(nefarious_settings: NefariousSettings) -> List[str]:
     return indexers
 
 
-def get_best_torrent_result(results: list):
-    best_result = None
+# limits how many urls are traced at once per host (i.e jackett, which proxies every torrent link) across all threads
+_trace_host_semaphores = {}
+_trace_host_semaphores_lock = threading.Lock()
 
-    if results:
 
-        # find the torrent result with the highest weight (i.e seeds)
-        best_result = results[0]
-        for result in results:
-            if result['Seeders'] > best_result['Seeders']:
-                best_result = result
+def _trace_host_semaphore(url: str) -> threading.BoundedSemaphore:
+    host = urlparse(url).netloc
+    with _trace_host_semaphores_lock:
+        if host not in _trace_host_semaphores:
+            _trace_host_semaphores[host] = threading.BoundedSemaphore(settings.TORRENT_TRACE_HOST_CONCURRENCY)
+        return _trace_host_semaphores[host]
 
-    else:
-        logger_background.info('No valid best search result')
 
-    return best_result
+def _trace_result_url(result, nefarious_settings: NefariousSettings, deadline: float) -> str:
+    url = swap_jackett_host(result.link, nefarious_settings)
+    with _trace_host_semaphore(url):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise Exception('deadline exceeded before tracing')
+        return trace_torrent_url(url, timeout=min(30, remaining))
 
 
 def results_with_valid_urls(results: list, nefarious_settings: NefariousSettings):
-    populated_results = []
-
-    for result in results:
+    """
+    Traces the torrent url of each result (it can redirect to a magnet url) and returns the results which traced, in order.
 
-        # try and obtain the torrent url (it can redirect to a magnet url)
+    Results are traced concurrently (settings.TORRENT_TRACE_CONCURRENCY) with a limit per host
+    (settings.TORRENT_TRACE_HOST_CONCURRENCY) so jackett isn't overwhelmed, and any still tracing by the
+    overall deadline (settings.TORRENT_TRACE_DEADLINE) are skipped.
+    """
+    deadline = time.monotonic() + settings.TORRENT_TRACE_DEADLINE
+    torrent_urls = {}
+
+    # magnets don't need tracing
+    for i, result in enumerate(results):
+        if result.magnet_uri:
+            torrent_urls[i] = result.magnet_uri
+
+    to_trace = [i for i in range(len(results)) if i not in torrent_urls]
+    if to_trace:
+        executor = ThreadPoolExecutor(max_workers=max(min(settings.TORRENT_TRACE_CONCURRENCY, len(to_trace)), 1))
+        futures = {executor.submit(_trace_result_url, results[i], nefarious_settings, deadline): i for i in to_trace}
         try:
-            # add a new key to our result object with the traced torrent url
-            result['torrent_url'] = result['MagnetUri'] or trace_torrent_url(
-                swap_jackett_host(result['Link'], nefarious_settings))
-        except Exception as e:
-            logger_background.info('Exception tracing torrent url: {}'.format(e))
+            for future in as_completed(futures, timeout=max(deadline - time.monotonic(), 0)):
+                try:
+                    torrent_urls[futures[future]] = future.result()
+                except Exception as e:
+                    logger_background.info('Exception tracing torrent url: {}'.format(e))
+        except FuturesTimeoutError:
+            pending = [future for future in futures if not future.done()]
+            logger_background.info('Skipping {} results which did not trace within {}s'.format(len(pending), settings.TORRENT_TRACE_DEADLINE))
+            for future in pending:
+                future.cancel()
+        finally:
+            # don't wait on the slow traces
+            executor.shutdown(wait=False)
+
+    populated_results = []
+    for i, result in enumerate(results):
+        if i not in torrent_urls:
             continue
 
+        # add the traced torrent url to our result
+        result.torrent_url = torrent_urls[i]
+
         # add torrent to valid search results
-        logger_background.info('Valid Match: "{}" with {} Seeders'.format(result['Title'], result['Seeders']))
+        logger_background.info('Valid Match: "{}" with {} Seeders'.format(result.title, result.seeders))
         populated_results.append(result)
 
     return populated_results